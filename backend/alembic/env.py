@@ -0,0 +1,63 @@
+"""
+Environnement Alembic
+- URL et moteur de l'application (DATABASE_URL), métadonnées des modèles pour --autogenerate
+- Une transaction par migration : une révision peut sortir de la transaction
+  (op.get_context().autocommit_block()) pour les opérations en ligne de app/core/migrations.py
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.config import settings
+from app.db import Base, engine
+# Importer les modèles pour que Base.metadata soit complet
+import app.models  # noqa: F401
+
+config = context.config
+
+# Pas de reconfiguration des logs quand les migrations sont lancées par l'application (bootstrap)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tables gérées hors des modèles (ignorées par --autogenerate)
+IGNORED_TABLES = {"app_bootstrap"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name in IGNORED_TABLES)
+
+
+def run_migrations_offline() -> None:
+    """Générer le SQL sans connexion (alembic upgrade head --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            transaction_per_migration=True,
+            # SQLite : ALTER TABLE limité, recréation de table par lots
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
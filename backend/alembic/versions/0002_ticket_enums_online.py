@@ -0,0 +1,78 @@
+"""Statuts et type des tickets sur les bases antérieures (remplace migrate_ticket_status/type)
+
+Les anciens scripts renommaient/recréaient les types ENUM et réécrivaient toute la table
+tickets via une colonne de sauvegarde, sous verrou exclusif. Ici, sans réécriture :
+- ticketstatus : les nouvelles valeurs sont ajoutées au type (ADD VALUE), puis les anciens
+  statuts (PENDING, REVIEWING, APPROVED, REJECTED, ou en minuscules) sont convertis par lots.
+  Les anciennes valeurs restent déclarées dans le type (PostgreSQL ne sait pas en retirer
+  sans réécriture) mais ne sont plus utilisées
+- tickettype : colonne ajoutée avec une valeur par défaut constante (PostgreSQL 11+ :
+  aucune ligne réécrite), puis le défaut est retiré comme dans les modèles
+Sans effet sur une base créée par la révision 0001 ou hors PostgreSQL.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 02:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.migrations import add_enum_value, batched_backfill, enum_values, has_column, is_postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TICKET_STATUSES = ('ANALYZING', 'IN_PROGRESS', 'RESOLVED', 'CLOSED')
+TICKET_TYPES = ('INCIDENT', 'REQUEST')
+
+# Ancien statut (quelle que soit sa casse) -> nouveau statut ; inconnu : ANALYZING
+STATUS_MAPPING = """(CASE
+    WHEN upper(status::text) IN ('ANALYZING', 'IN_PROGRESS', 'RESOLVED', 'CLOSED') THEN upper(status::text)
+    WHEN upper(status::text) = 'APPROVED' THEN 'IN_PROGRESS'
+    WHEN upper(status::text) = 'REJECTED' THEN 'CLOSED'
+    ELSE 'ANALYZING'
+END)::ticketstatus"""
+
+
+def upgrade() -> None:
+    if not is_postgresql():
+        return
+
+    # Statuts
+    for value in TICKET_STATUSES:
+        add_enum_value('ticketstatus', value)
+    # Type déjà limité aux nouvelles valeurs : aucune ligne à convertir
+    if set(enum_values('ticketstatus')) != set(TICKET_STATUSES):
+        updated = batched_backfill(
+            'tickets',
+            f"status = {STATUS_MAPPING}",
+            "status::text NOT IN ('ANALYZING', 'IN_PROGRESS', 'RESOLVED', 'CLOSED')",
+        )
+        print(f"✅ {updated} ticket(s) convertis vers les nouveaux statuts")
+
+    # Type
+    if enum_values('tickettype'):
+        for value in TICKET_TYPES:
+            add_enum_value('tickettype', value)
+    else:
+        postgresql.ENUM(*TICKET_TYPES, name='tickettype').create(op.get_bind())
+    if not has_column('tickets', 'type'):
+        op.add_column('tickets', sa.Column(
+            'type', postgresql.ENUM(*TICKET_TYPES, name='tickettype', create_type=False),
+            nullable=False, server_default='INCIDENT',
+        ))
+        op.alter_column('tickets', 'type', server_default=None)
+        print("✅ Colonne 'type' ajoutée à la table tickets")
+
+
+def downgrade() -> None:
+    # Conversion des anciens statuts non réversible ; la colonne type fait partie de 0001
+    pass
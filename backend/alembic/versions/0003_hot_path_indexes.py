@@ -0,0 +1,49 @@
+"""Index des requêtes les plus fréquentes (listes filtrées, statistiques, page de statut)
+
+- incidents / tickets : liste admin filtrée par statut (copro_id, status, created_at, id)
+- incidents en cours par copropriété (partiel, resolved_at IS NULL)
+- déclarations récentes d'un équipement (détection des doublons)
+- incidents d'un équipement sur une période, et table de liaison par équipement
+- incident_updates(incident_id, created_at) : Incident.updates
+- maintenances en cours / à venir (copro_id, end_date) et (copro_id, start_date)
+Créés avec CREATE INDEX CONCURRENTLY : la table reste accessible en écriture.
+Vérification des plans : python -m app.scripts.check_query_plans
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 03:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nom, table, colonnes, condition de l'index partiel)
+INDEXES = [
+    ('ix_incidents_copro_status_created_id', 'incidents', ['copro_id', 'status', 'created_at', 'id'], None),
+    ('ix_incidents_open_copro_created', 'incidents', ['copro_id', 'created_at'], 'resolved_at IS NULL'),
+    ('ix_incidents_instance_created', 'incidents', ['service_instance_id', 'created_at'], None),
+    ('ix_incident_service_instances_instance', 'incident_service_instances', ['service_instance_id', 'incident_id'], None),
+    ('ix_incident_updates_incident_created', 'incident_updates', ['incident_id', 'created_at'], None),
+    ('ix_tickets_copro_status_created_id', 'tickets', ['copro_id', 'status', 'created_at', 'id'], None),
+    ('ix_tickets_copro_instance_created', 'tickets', ['copro_id', 'service_instance_id', 'created_at'], None),
+    ('ix_maintenances_copro_start', 'maintenances', ['copro_id', 'start_date'], None),
+    ('ix_maintenances_copro_end', 'maintenances', ['copro_id', 'end_date'], None),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, where in INDEXES:
+        create_index_concurrently(name, table, columns, where=where)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
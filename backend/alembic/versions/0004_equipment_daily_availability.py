@@ -0,0 +1,49 @@
+"""Agrégat journalier de disponibilité des équipements (equipment_daily_availability)
+
+Nouvelle table : aucune table existante n'est verrouillée. À remplir ensuite avec
+python -m app.scripts.backfill_availability.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Base créée avant Alembic : la table a pu être créée par create_all
+    if inspect(op.get_bind()).has_table('equipment_daily_availability'):
+        return
+    op.create_table('equipment_daily_availability',
+    sa.Column('service_instance_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('copro_id', sa.Integer(), nullable=False),
+    sa.Column('downtime_seconds', sa.Float(), nullable=False),
+    sa.Column('incident_count', sa.Integer(), nullable=False),
+    sa.Column('resolved_count', sa.Integer(), nullable=False),
+    sa.Column('resolution_seconds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['copro_id'], ['copros.id'], ),
+    sa.ForeignKeyConstraint(['service_instance_id'], ['service_instances.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('service_instance_id', 'day')
+    )
+    with op.batch_alter_table('equipment_daily_availability', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_equipment_daily_availability_copro_id'), ['copro_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('equipment_daily_availability', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_equipment_daily_availability_copro_id'))
+
+    op.drop_table('equipment_daily_availability')
@@ -0,0 +1,37 @@
+"""Index de pagination des listes admin (remplace migrate_pagination_indexes)
+
+(copro_id, created_at, id) sur tickets et incidents : chaque page de la pagination par
+curseur est une lecture d'index. Créés avec CREATE INDEX CONCURRENTLY ; déjà présents si
+l'ancien script a été lancé.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nom, table, colonnes)
+INDEXES = [
+    ('ix_tickets_copro_created_id', 'tickets', ['copro_id', 'created_at', 'id']),
+    ('ix_incidents_copro_created_id', 'incidents', ['copro_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        drop_index_concurrently(name, table)
@@ -0,0 +1,57 @@
+"""Slug des copropriétés (remplace migrate_copro_slug)
+
+- Colonne ajoutée nullable, sans valeur par défaut : modification du catalogue seulement
+- Slugs générés à partir du nom pour les copropriétés qui n'en ont pas (table de quelques
+  lignes : une mise à jour par copropriété)
+- Index unique créé avec CREATE INDEX CONCURRENTLY
+Déjà en place si l'ancien script a été lancé : seuls les slugs manquants sont générés.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+from app.core.migrations import create_index_concurrently, drop_index_concurrently, has_column
+from app.core.tenant import slugify
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('copros', 'slug'):
+        op.add_column('copros', sa.Column('slug', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    taken = set(bind.execute(text("SELECT slug FROM copros WHERE slug IS NOT NULL")).scalars())
+    missing = bind.execute(text("SELECT id, name FROM copros WHERE slug IS NULL ORDER BY id")).all()
+    for copro_id, name in missing:
+        # Suffixe -2, -3... en cas de collision, comme app.core.tenant.unique_copro_slug
+        base = slug = slugify(name)
+        suffix = 2
+        while slug in taken:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        taken.add(slug)
+        bind.execute(text("UPDATE copros SET slug = :slug WHERE id = :id"), {"slug": slug, "id": copro_id})
+        print(f"  {name} -> /c/{slug}")
+    if missing:
+        print(f"✅ {len(missing)} slug(s) générés")
+
+    create_index_concurrently('ix_copros_slug', 'copros', ['slug'], unique=True)
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_copros_slug', 'copros')
+    with op.batch_alter_table('copros', schema=None) as batch_op:
+        batch_op.drop_column('slug')
@@ -0,0 +1,34 @@
+"""Version de jeton des utilisateurs (remplace migrate_user_token_version)
+
+Incluse dans les JWT (claim "ver") pour révoquer les jetons déjà émis. Colonne NOT NULL
+avec une valeur par défaut constante : PostgreSQL 11+ ne réécrit aucune ligne. Les jetons
+existants (sans "ver") restent valides.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('users', 'token_version'):
+        op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
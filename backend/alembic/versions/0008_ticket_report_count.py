@@ -0,0 +1,37 @@
+"""Compteur de déclarations des tickets (remplace migrate_ticket_report_count)
+
+- report_count : NOT NULL avec une valeur par défaut constante (1) ; PostgreSQL 11+ ne
+  réécrit aucune ligne de la table tickets
+- last_reported_at : nullable, sans valeur par défaut (catalogue seulement)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('tickets', 'report_count'):
+        op.add_column('tickets', sa.Column('report_count', sa.Integer(), server_default='1', nullable=False))
+    if not has_column('tickets', 'last_reported_at'):
+        op.add_column('tickets', sa.Column('last_reported_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('last_reported_at')
+        batch_op.drop_column('report_count')
@@ -0,0 +1,35 @@
+"""Identifiant provisoire des tickets enregistrés en différé (remplace migrate_ticket_intake_id)
+
+Colonne nullable sans valeur par défaut (catalogue seulement), puis index unique créé avec
+CREATE INDEX CONCURRENTLY : la table tickets reste accessible en écriture.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 09:25:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import create_index_concurrently, drop_index_concurrently, has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column('tickets', 'intake_id'):
+        op.add_column('tickets', sa.Column('intake_id', sa.String(length=32), nullable=True))
+    create_index_concurrently('uq_tickets_intake_id', 'tickets', ['intake_id'], unique=True)
+
+
+def downgrade() -> None:
+    drop_index_concurrently('uq_tickets_intake_id', 'tickets')
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('intake_id')
@@ -5,12 +5,13 @@ API endpoints pour les administrateurs
 - Création et gestion des incidents
 - Gestion des tickets
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
-from sqlalchemy import func as sql_func, and_
+from pydantic import BaseModel, EmailStr, field_validator
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func as sql_func, and_, or_
 from app.db import get_db
 from app.models.copro import Copro, Building, ServiceInstance
 from app.models.status import Incident, IncidentUpdate as IncidentUpdateModel, IncidentComment, IncidentStatus
@@ -18,10 +19,24 @@ from app.models.ticket import Ticket, TicketStatus, TicketType
 from app.models.ticket_comment import TicketComment
 from app.models.user import User
 from app.models.maintenance import Maintenance
-from app.auth import get_current_user, get_password_hash
+from app.models.loaders import (
+    INCIDENT_DETAIL_OPTIONS, INCIDENT_LIST_OPTIONS, INCIDENT_STATISTICS_OPTIONS,
+    MAINTENANCE_OPTIONS, SERVICE_INSTANCE_OPTIONS, TICKET_COMMENT_OPTIONS, TICKET_LIST_OPTIONS,
+)
+from app.auth import get_current_principal, get_password_hash_async
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_by_created_at
+from app.core.tenant import SLUG_PATTERN, get_current_copro, require_current_copro, tenant_cache, unique_copro_slug
+from app.services.attachments import attachment_urls
+from app.services.availability import compute_equipment_availability, incident_footprint, refresh_incident_availability
+from app.services.principal_cache import Principal, principal_cache
+from app.services.statistics_cache import statistics_cache
+from app.services.status_snapshot import status_snapshot
 
 router = APIRouter()
 
+# Période couverte par les statistiques admin (6 mois)
+STATISTICS_WINDOW_DAYS = 180
+
 
 # ============ Schemas ============
 
@@ -121,40 +136,64 @@ class IncidentCommentCreate(BaseModel):
 # ============ Vérification Admin ============
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> User:
-    """Vérifier que l'utilisateur est admin"""
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
+) -> Principal:
+    """Vérifier que l'utilisateur est admin (de la copropriété de la requête s'il est rattaché à une copropriété)
+    
+    L'utilisateur vient du cache des principals : pas de requête SQL quand il y est déjà.
+    Résout aussi la copropriété de la requête : toutes les requêtes des endpoints admin
+    sont ensuite filtrées sur elle (voir app.core.tenant).
+    """
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Accès réservé aux administrateurs"
         )
+    if current_user.copro_id is not None and copro is not None and current_user.copro_id != copro.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès réservé aux administrateurs de cette copropriété"
+        )
     return current_user
 
 
 # ============ Gestion de la Copropriété ============
 
+def _validate_slug(v):
+    if v is not None and not SLUG_PATTERN.match(v):
+        raise ValueError("Le slug ne peut contenir que des minuscules, chiffres et tirets (ex: residence-du-parc)")
+    return v
+
+
 class CoproCreate(BaseModel):
     name: str
+    slug: Optional[str] = None  # Dérivé du nom si absent
     address: Optional[str] = None
     city: Optional[str] = None
     postal_code: Optional[str] = None
     country: str = "France"
 
+    _check_slug = field_validator('slug')(_validate_slug)
+
 
 class CoproUpdate(BaseModel):
     name: Optional[str] = None
+    slug: Optional[str] = None
     address: Optional[str] = None
     city: Optional[str] = None
     postal_code: Optional[str] = None
     country: Optional[str] = None
     is_active: Optional[bool] = None
 
+    _check_slug = field_validator('slug')(_validate_slug)
+
 
 class CoproResponse(BaseModel):
     id: int
     name: str
+    slug: Optional[str] = None
     address: Optional[str]
     city: Optional[str]
     postal_code: Optional[str]
@@ -170,12 +209,10 @@ class CoproResponse(BaseModel):
 @router.get("/copro", response_model=CoproResponse)
 async def get_copro(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
     """Obtenir la copropriété (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
-    if not copro:
-        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
     return copro
 
 
@@ -185,19 +222,25 @@ async def get_copro(
 async def create_copro(
     copro_data: CoproCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
-    """Créer une copropriété (admin uniquement)"""
-    # Vérifier s'il existe déjà une copropriété active
-    existing = db.query(Copro).filter(Copro.is_active == True).first()
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="Une copropriété active existe déjà. Modifiez-la ou désactivez-la d'abord."
-        )
+    """Créer une copropriété (administrateurs non rattachés à une copropriété uniquement)
+    
+    Plusieurs copropriétés peuvent être actives : chacune est servie sous /c/{slug}
+    (ou {slug}.TENANT_BASE_DOMAIN) ; sans slug dans l'URL, la plus ancienne est utilisée.
+    """
+    if admin.copro_id is not None:
+        raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs de toutes les copropriétés")
+    if copro_data.slug:
+        if db.query(Copro.id).filter(Copro.slug == copro_data.slug).first():
+            raise HTTPException(status_code=400, detail=f"Le slug '{copro_data.slug}' est déjà utilisé")
+        slug = copro_data.slug
+    else:
+        slug = unique_copro_slug(db, copro_data.name)
     
     db_copro = Copro(
         name=copro_data.name,
+        slug=slug,
         address=copro_data.address,
         city=copro_data.city,
         postal_code=copro_data.postal_code,
@@ -207,6 +250,8 @@ async def create_copro(
     
     db.add(db_copro)
     db.commit()
+    tenant_cache.invalidate()
+    status_snapshot.invalidate(db_copro.id)
     db.refresh(db_copro)
     
     return db_copro
@@ -217,14 +262,20 @@ async def update_copro(
     copro_id: int,
     copro_update: CoproUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour la copropriété (admin uniquement)"""
+    if admin.copro_id is not None and admin.copro_id != copro_id:
+        raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs de cette copropriété")
     copro = db.query(Copro).filter(Copro.id == copro_id).first()
     if not copro:
         raise HTTPException(status_code=404, detail="Copropriété non trouvée")
     
     update_data = copro_update.dict(exclude_unset=True)
+    if update_data.get("slug"):
+        taken = db.query(Copro.id).filter(Copro.slug == update_data["slug"], Copro.id != copro.id).first()
+        if taken:
+            raise HTTPException(status_code=400, detail=f"Le slug '{update_data['slug']}' est déjà utilisé")
     
     # Appliquer les mises à jour
     for field, value in update_data.items():
@@ -232,6 +283,10 @@ async def update_copro(
     
     copro.updated_at = datetime.utcnow()
     db.commit()
+    tenant_cache.invalidate()
+    # La copropriété par défaut (sans slug dans l'URL) peut changer : toutes les pages
+    status_snapshot.invalidate()
+    statistics_cache.invalidate_copro(copro.id)
     db.refresh(copro)
     
     return copro
@@ -269,10 +324,10 @@ class BuildingResponse(BaseModel):
 @router.get("/buildings", response_model=List[BuildingResponse])
 async def list_buildings(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Lister tous les bâtiments (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return []
     
@@ -287,7 +342,7 @@ async def list_buildings(
 async def get_building(
     building_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Obtenir un bâtiment par ID (admin uniquement)"""
     building = db.query(Building).filter(Building.id == building_id).first()
@@ -300,13 +355,10 @@ async def get_building(
 async def create_building(
     building: BuildingCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
     """Créer un nouveau bâtiment (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
-    if not copro:
-        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
-    
     # Vérifier l'unicité du nom dans la copropriété
     existing = db.query(Building).filter(
         Building.copro_id == copro.id,
@@ -334,7 +386,7 @@ async def update_building(
     building_id: int,
     building_update: BuildingUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour un bâtiment (admin uniquement)"""
     building = db.query(Building).filter(Building.id == building_id).first()
@@ -359,6 +411,8 @@ async def update_building(
     
     building.updated_at = datetime.utcnow()
     db.commit()
+    status_snapshot.invalidate(building.copro_id)
+    statistics_cache.invalidate_copro(building.copro_id)
     db.refresh(building)
     
     return building
@@ -368,7 +422,7 @@ async def update_building(
 async def delete_building(
     building_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Supprimer un bâtiment (admin uniquement)"""
     building = db.query(Building).filter(Building.id == building_id).first()
@@ -386,8 +440,11 @@ async def delete_building(
             detail=f"Impossible de supprimer ce bâtiment car {service_instances} équipement(s) y sont associés"
         )
     
+    copro_id = building.copro_id
     db.delete(building)
     db.commit()
+    status_snapshot.invalidate(copro_id)
+    statistics_cache.invalidate_copro(copro_id)
     return None
 
 
@@ -399,15 +456,14 @@ async def delete_building(
 async def list_service_instances(
     building_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Lister tous les équipements (admin uniquement) - Une seule copropriété"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return []
     
-    query = db.query(ServiceInstance).filter(ServiceInstance.copro_id == copro.id)
+    query = db.query(ServiceInstance).options(*SERVICE_INSTANCE_OPTIONS).filter(ServiceInstance.copro_id == copro.id)
     
     if building_id:
         query = query.filter(ServiceInstance.building_id == building_id)
@@ -416,7 +472,6 @@ async def list_service_instances(
     
     result = []
     for instance in instances:
-        db.refresh(instance, ['building'])
         result.append(ServiceInstanceResponse(
             id=instance.id,
             copro_id=instance.copro_id,
@@ -438,7 +493,7 @@ async def list_service_instances(
 async def get_service_instance(
     instance_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Obtenir un équipement par ID (admin uniquement)"""
     instance = db.query(ServiceInstance).filter(ServiceInstance.id == instance_id).first()
@@ -465,14 +520,10 @@ async def get_service_instance(
 async def create_service_instance(
     service_instance: ServiceInstanceCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
     """Créer un nouvel équipement (admin uniquement)"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
-    if not copro:
-        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
-    
     # Vérifier que le bâtiment existe et appartient à la copropriété
     building = db.query(Building).filter(
         Building.id == service_instance.building_id,
@@ -507,6 +558,8 @@ async def create_service_instance(
     
     db.add(db_service_instance)
     db.commit()
+    status_snapshot.invalidate(db_service_instance.copro_id)
+    statistics_cache.invalidate_copro(db_service_instance.copro_id)
     db.refresh(db_service_instance, ['building'])
     
     return ServiceInstanceResponse(
@@ -529,7 +582,7 @@ async def update_service_instance(
     instance_id: int,
     service_instance_update: ServiceInstanceUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour un équipement (admin uniquement)"""
     instance = db.query(ServiceInstance).filter(ServiceInstance.id == instance_id).first()
@@ -573,6 +626,8 @@ async def update_service_instance(
     
     instance.updated_at = datetime.utcnow()
     db.commit()
+    status_snapshot.invalidate(instance.copro_id)
+    statistics_cache.invalidate_copro(instance.copro_id)
     db.refresh(instance, ['building'])
     
     return ServiceInstanceResponse(
@@ -594,15 +649,18 @@ async def update_service_instance(
 async def delete_service_instance(
     instance_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Supprimer un équipement (admin uniquement)"""
     instance = db.query(ServiceInstance).filter(ServiceInstance.id == instance_id).first()
     if not instance:
         raise HTTPException(status_code=404, detail="Équipement non trouvé")
     
+    copro_id = instance.copro_id
     db.delete(instance)
     db.commit()
+    status_snapshot.invalidate(copro_id)
+    statistics_cache.invalidate_copro(copro_id)
     return None
 
 
@@ -611,7 +669,7 @@ async def update_service_status(
     instance_id: int,
     status_update: ServiceInstanceStatusUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Changer le statut d'un équipement (admin uniquement)"""
     instance = db.query(ServiceInstance).filter(ServiceInstance.id == instance_id).first()
@@ -626,6 +684,7 @@ async def update_service_status(
     instance.status = status_update.status
     instance.updated_at = datetime.utcnow()
     db.commit()
+    status_snapshot.invalidate(instance.copro_id)
     db.refresh(instance)
     
     return {"message": "Statut mis à jour", "instance": instance}
@@ -637,7 +696,8 @@ async def update_service_status(
 async def create_incident(
     incident_data: IncidentCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Créer un incident (admin uniquement) - crée un seul incident avec plusieurs équipements via table de liaison"""
     # Déterminer la liste des équipements
@@ -683,7 +743,6 @@ async def create_incident(
             )
     else:
         # Si aucun équipement, utiliser la copropriété active
-        copro = db.query(Copro).filter(Copro.is_active == True).first()
         if copro:
             copro_id = copro.id
     
@@ -716,7 +775,10 @@ async def create_incident(
                 service_instance.status = incident_data.equipment_status
                 service_instance.updated_at = datetime.utcnow()
     
+    touched_years = refresh_incident_availability(db, incident)
     db.commit()
+    status_snapshot.invalidate(incident.copro_id)
+    statistics_cache.invalidate_years(touched_years)
     db.refresh(incident, ['service_instances'])
     
     return {"message": "Incident créé", "incident_id": incident.id}
@@ -724,25 +786,30 @@ async def create_incident(
 
 @router.get("/incidents", response_model=List[dict])
 async def list_incidents(
+    response: Response,
     status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
-    """Lister tous les incidents (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
+    """Lister les incidents, du plus récent au plus ancien (admin uniquement)
+    
+    Paginé : passer le curseur reçu dans l'en-tête X-Next-Cursor pour obtenir la page suivante.
+    """
     if not copro:
         return []
     
-    query = db.query(Incident).filter(Incident.copro_id == copro.id)
+    query = db.query(Incident).options(*INCIDENT_LIST_OPTIONS).filter(Incident.copro_id == copro.id)
     
     if status_filter:
         query = query.filter(Incident.status == IncidentStatus(status_filter))
     
-    incidents = query.order_by(Incident.created_at.desc()).all()
+    incidents = paginate_by_created_at(query, Incident, cursor, limit, response)
     
     result = []
     for incident in incidents:
-        db.refresh(incident, ['service_instance', 'service_instances'])
         # Récupérer le statut de l'équipement si un équipement est associé (pour rétrocompatibilité)
         equipment_status = None
         if incident.service_instance:
@@ -775,15 +842,13 @@ async def list_incidents(
 async def get_incident(
     incident_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Obtenir un incident avec ses commentaires (admin uniquement)"""
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    incident = db.query(Incident).options(*INCIDENT_DETAIL_OPTIONS).filter(Incident.id == incident_id).first()
     if not incident:
         raise HTTPException(status_code=404, detail="Incident non trouvé")
     
-    db.refresh(incident, ['service_instance', 'service_instances', 'updates', 'comments'])
-    
     # Récupérer les équipements via la table de liaison ou service_instance pour rétrocompatibilité
     service_instance_names = []
     service_instance_ids = []
@@ -797,7 +862,6 @@ async def get_incident(
     # Charger les commentaires avec les infos des admins
     comments = []
     for comment in incident.comments:
-        db.refresh(comment, ['admin'])
         comments.append({
             "id": comment.id,
             "comment": comment.comment,
@@ -826,7 +890,7 @@ async def update_incident_status(
     incident_id: int,
     status_update: IncidentStatusUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour le statut d'un incident (admin uniquement)"""
     try:
@@ -879,6 +943,7 @@ async def update_incident_status(
         old_status_value = current_status.value
         
         # Mettre à jour le statut
+        availability_before = incident_footprint(incident)
         incident.status = new_status
         if new_status == IncidentStatus.RESOLVED or new_status == IncidentStatus.CLOSED:
             if not incident.resolved_at:
@@ -892,7 +957,10 @@ async def update_incident_status(
         )
         db.add(update)
         
+        touched_years = refresh_incident_availability(db, incident, before=availability_before)
         db.commit()
+        status_snapshot.invalidate(incident.copro_id)
+        statistics_cache.invalidate_years(touched_years)
         db.refresh(incident)
         
         return {"message": "Statut mis à jour", "incident_id": incident.id, "status": new_status.value}
@@ -916,12 +984,13 @@ async def update_incident(
     incident_id: int,
     incident_update: IncidentUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour un incident (titre, description, équipement) (admin uniquement)"""
     incident = db.query(Incident).filter(Incident.id == incident_id).first()
     if not incident:
         raise HTTPException(status_code=404, detail="Incident non trouvé")
+    availability_before = incident_footprint(incident)
     
     # Mettre à jour le titre si fourni
     if incident_update.title is not None:
@@ -951,7 +1020,10 @@ async def update_incident(
         incident.resolved_at = incident_update.resolved_at
     
     incident.updated_at = datetime.utcnow()
+    touched_years = refresh_incident_availability(db, incident, before=availability_before)
     db.commit()
+    status_snapshot.invalidate(incident.copro_id)
+    statistics_cache.invalidate_years(touched_years)
     db.refresh(incident)
     
     return {
@@ -968,7 +1040,7 @@ async def add_incident_update(
     incident_id: int,
     update_data: IncidentUpdateCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Ajouter une mise à jour à un incident (admin uniquement)"""
     incident = db.query(Incident).filter(Incident.id == incident_id).first()
@@ -984,11 +1056,15 @@ async def add_incident_update(
     db.add(update)
     
     # Mettre à jour le statut de l'incident
+    availability_before = incident_footprint(incident)
     incident.status = IncidentStatus(update_data.status)
     if update_data.status == "resolved" or update_data.status == "closed":
         incident.resolved_at = datetime.utcnow()
     
+    touched_years = refresh_incident_availability(db, incident, before=availability_before)
     db.commit()
+    status_snapshot.invalidate(incident.copro_id)
+    statistics_cache.invalidate_years(touched_years)
     db.refresh(update)
     
     return {"message": "Mise à jour ajoutée", "update_id": update.id}
@@ -999,7 +1075,7 @@ async def add_incident_comment(
     incident_id: int,
     comment_data: IncidentCommentCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Ajouter un commentaire à un incident (admin uniquement)"""
     incident = db.query(Incident).filter(Incident.id == incident_id).first()
@@ -1030,12 +1106,14 @@ async def add_incident_comment(
 @router.get("/admins", response_model=List[dict])
 async def list_admins(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Lister tous les administrateurs (admin uniquement)"""
+    """Lister les administrateurs de la copropriété et ceux de toutes les copropriétés (admin uniquement)"""
     admins = db.query(User).filter(
         User.is_superuser == True,
-        User.is_active == True
+        User.is_active == True,
+        or_(User.copro_id == copro.id, User.copro_id.is_(None))
     ).order_by(User.email).all()
     
     return [{"id": a.id, "email": a.email} for a in admins]
@@ -1045,30 +1123,33 @@ async def list_admins(
 
 @router.get("/tickets", response_model=List[dict])
 async def list_tickets(
+    response: Response,
     status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
-    """Lister tous les tickets (admin uniquement) - Une seule copropriété"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
+    """Lister les tickets, du plus récent au plus ancien (admin uniquement) - Une seule copropriété
+    
+    Paginé : passer le curseur reçu dans l'en-tête X-Next-Cursor pour obtenir la page suivante.
+    """
     if not copro:
         return []
     
-    query = db.query(Ticket).filter(Ticket.copro_id == copro.id)
+    query = db.query(Ticket).options(*TICKET_LIST_OPTIONS).filter(Ticket.copro_id == copro.id)
     
     if status_filter:
         query = query.filter(Ticket.status == TicketStatus(status_filter))
     
-    tickets = query.order_by(Ticket.created_at.desc()).all()
+    tickets = paginate_by_created_at(query, Ticket, cursor, limit, response)
     
     result = []
     for ticket in tickets:
-        db.refresh(ticket, ['service_instance', 'copro', 'assigned_admin', 'reviewer', 'incident', 'comments'])
         # Récupérer les commentaires
         comments = []
         for comment in ticket.comments:
-            db.refresh(comment, ['admin'])
             comments.append({
                 "id": comment.id,
                 "comment": comment.comment,
@@ -1095,6 +1176,9 @@ async def list_tickets(
             "reviewed_by": ticket.reviewed_by,
             "reviewer": ticket.reviewer.email if ticket.reviewer else None,
             "incident_id": ticket.incident_id,
+            "report_count": ticket.report_count or 1,
+            "attachments": [attachment_urls(key) for key in json.loads(ticket.attachments or "[]")],
+            "last_reported_at": ticket.last_reported_at.isoformat() if ticket.last_reported_at else None,
             "comments": comments,
             "created_at": ticket.created_at.isoformat() if ticket.created_at else None,
             "reviewed_at": ticket.reviewed_at.isoformat() if ticket.reviewed_at else None,
@@ -1108,7 +1192,7 @@ async def assign_ticket(
     ticket_id: int,
     assign_data: TicketAssign,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Assigner un ticket à un administrateur (admin uniquement)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -1136,7 +1220,7 @@ async def review_ticket(
     ticket_id: int,
     review: TicketReview,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Analyser un ticket et décider de créer un incident ou non (admin uniquement)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -1158,6 +1242,7 @@ async def review_ticket(
         ticket.admin_notes = review.admin_notes
     ticket.reviewed_by = admin.id
     ticket.reviewed_at = datetime.utcnow()
+    touched_years = {}
     
     # Si approuvé et demande de création d'incident
     if (review.status == "approved" or ticket.status == TicketStatus.IN_PROGRESS) and review.create_incident:
@@ -1189,8 +1274,12 @@ async def review_ticket(
             ).first()
             if service_instance:
                 service_instance.status = "degraded"
+        
+        touched_years = refresh_incident_availability(db, incident)
     
     db.commit()
+    status_snapshot.invalidate(ticket.copro_id)
+    statistics_cache.invalidate_years(touched_years)
     db.refresh(ticket)
     
     return {"message": "Ticket traité", "ticket_id": ticket.id}
@@ -1201,7 +1290,7 @@ async def reject_ticket(
     ticket_id: int,
     admin_notes: Optional[str] = None,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Rejeter un ticket (admin uniquement) - DEPRECATED, utiliser update_status"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -1225,7 +1314,7 @@ async def update_ticket_status(
     ticket_id: int,
     status_update: TicketStatusUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour le statut d'un ticket (admin uniquement)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -1248,7 +1337,7 @@ async def add_ticket_comment(
     ticket_id: int,
     comment_data: TicketCommentCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Ajouter un commentaire à un ticket (admin uniquement)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
@@ -1278,20 +1367,19 @@ async def add_ticket_comment(
 async def get_ticket_comments(
     ticket_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Récupérer les commentaires d'un ticket (admin uniquement)"""
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket non trouvé")
     
-    comments = db.query(TicketComment).filter(
+    comments = db.query(TicketComment).options(*TICKET_COMMENT_OPTIONS).filter(
         TicketComment.ticket_id == ticket_id
     ).order_by(TicketComment.created_at).all()
     
     result = []
     for comment in comments:
-        db.refresh(comment, ['admin'])
         result.append({
             "id": comment.id,
             "comment": comment.comment,
@@ -1346,13 +1434,33 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+def _get_copro_user(db: Session, user_id: int, copro: Copro) -> User:
+    """Utilisateur de la copropriété de la requête (404 pour celui d'une autre copropriété)
+    
+    User n'est pas filtré automatiquement (voir app.core.tenant) : l'email est unique
+    toutes copropriétés confondues et les administrateurs globaux n'ont pas de copropriété.
+    """
+    user = db.query(User).filter(User.id == user_id, User.copro_id == copro.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    return user
+
+
+def _check_copro_building(db: Session, building_id: int, copro: Copro) -> None:
+    """404 si le bâtiment n'appartient pas à la copropriété de la requête"""
+    building = db.query(Building.id).filter(Building.id == building_id, Building.copro_id == copro.id).first()
+    if not building:
+        raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
+
+
 @router.get("/users", response_model=List[UserResponse])
 async def list_users(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Lister tous les utilisateurs (admin uniquement)"""
-    users = db.query(User).all()
+    """Lister les utilisateurs de la copropriété (admin uniquement)"""
+    users = db.query(User).filter(User.copro_id == copro.id).all()
     result = []
     for user in users:
         user_dict = {
@@ -1380,12 +1488,11 @@ async def list_users(
 async def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Récupérer un utilisateur par ID (admin uniquement)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    """Récupérer un utilisateur de la copropriété par ID (admin uniquement)"""
+    user = _get_copro_user(db, user_id, copro)
     
     user_dict = {
         "id": user.id,
@@ -1411,9 +1518,10 @@ async def get_user(
 async def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Créer un nouvel utilisateur (admin uniquement)"""
+    """Créer un nouvel utilisateur dans la copropriété (admin uniquement)"""
     # Vérifier que l'email n'existe pas déjà
     existing_email = db.query(User).filter(User.email == user_data.email).first()
     if existing_email:
@@ -1421,17 +1529,10 @@ async def create_user(
     
     # Vérifier le bâtiment si fourni
     if user_data.building_id:
-        building = db.query(Building).filter(Building.id == user_data.building_id).first()
-        if not building:
-            raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
-    
-    # Récupérer la copropriété active
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
-    if not copro:
-        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
+        _check_copro_building(db, user_data.building_id, copro)
     
     # Créer l'utilisateur
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -1475,12 +1576,11 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Mettre à jour un utilisateur (admin uniquement)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    """Mettre à jour un utilisateur de la copropriété (admin uniquement)"""
+    user = _get_copro_user(db, user_id, copro)
     
     # Vérifier que l'email n'existe pas déjà (si modifié)
     if user_data.email and user_data.email != user.email:
@@ -1490,15 +1590,17 @@ async def update_user(
         user.email = user_data.email
     
     # Mettre à jour le mot de passe si fourni
+    # Un changement de mot de passe, une désactivation ou un retrait des droits admin
+    # révoquent les jetons déjà émis
+    revoke_tokens = False
     if user_data.password:
-        user.hashed_password = get_password_hash(user_data.password)
+        user.hashed_password = await get_password_hash_async(user_data.password)
+        revoke_tokens = True
     
     # Vérifier le bâtiment si fourni
     if user_data.building_id is not None:
         if user_data.building_id:
-            building = db.query(Building).filter(Building.id == user_data.building_id).first()
-            if not building:
-                raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
+            _check_copro_building(db, user_data.building_id, copro)
         user.building_id = user_data.building_id
     
     # Mettre à jour les autres champs
@@ -1511,11 +1613,16 @@ async def update_user(
     if user_data.floor is not None:
         user.floor = user_data.floor
     if user_data.is_active is not None:
+        revoke_tokens = revoke_tokens or (user.is_active and not user_data.is_active)
         user.is_active = user_data.is_active
     if user_data.is_superuser is not None:
+        revoke_tokens = revoke_tokens or (user.is_superuser and not user_data.is_superuser)
         user.is_superuser = user_data.is_superuser
+    if revoke_tokens:
+        user.token_version = (user.token_version or 0) + 1
     
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     
     user_dict = {
@@ -1543,19 +1650,20 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
-    """Supprimer un utilisateur (admin uniquement)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    """Supprimer un utilisateur de la copropriété (admin uniquement)"""
+    user = _get_copro_user(db, user_id, copro)
     
     # Empêcher la suppression de soi-même
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Vous ne pouvez pas supprimer votre propre compte")
     
+    deleted_id = user.id
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(deleted_id)
     
     return {"message": "Utilisateur supprimé"}
 
@@ -1596,20 +1704,19 @@ class MaintenanceResponse(BaseModel):
 @router.get("/maintenances", response_model=List[MaintenanceResponse])
 async def list_maintenances(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Lister toutes les maintenances (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return []
     
-    maintenances = db.query(Maintenance).filter(
+    maintenances = db.query(Maintenance).options(*MAINTENANCE_OPTIONS).filter(
         Maintenance.copro_id == copro.id
     ).order_by(Maintenance.start_date.desc()).all()
     
     result = []
     for maintenance in maintenances:
-        db.refresh(maintenance, ['service_instances'])
         result.append(MaintenanceResponse(
             id=maintenance.id,
             copro_id=maintenance.copro_id,
@@ -1636,14 +1743,13 @@ async def list_maintenances(
 async def get_maintenance(
     maintenance_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Obtenir une maintenance par ID (admin uniquement)"""
-    maintenance = db.query(Maintenance).filter(Maintenance.id == maintenance_id).first()
+    maintenance = db.query(Maintenance).options(*MAINTENANCE_OPTIONS).filter(Maintenance.id == maintenance_id).first()
     if not maintenance:
         raise HTTPException(status_code=404, detail="Maintenance non trouvée")
     
-    db.refresh(maintenance, ['service_instances'])
     return MaintenanceResponse(
         id=maintenance.id,
         copro_id=maintenance.copro_id,
@@ -1668,13 +1774,10 @@ async def get_maintenance(
 async def create_maintenance(
     maintenance_data: MaintenanceCreate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Copro = Depends(require_current_copro)
 ):
     """Créer une nouvelle maintenance (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
-    if not copro:
-        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
-    
     # Vérifier que la date de fin est après la date de début
     if maintenance_data.end_date <= maintenance_data.start_date:
         raise HTTPException(status_code=400, detail="La date de fin doit être après la date de début")
@@ -1702,6 +1805,7 @@ async def create_maintenance(
     # Associer les équipements
     maintenance.service_instances = service_instances
     db.commit()
+    status_snapshot.invalidate(maintenance.copro_id)
     db.refresh(maintenance, ['service_instances'])
     
     return MaintenanceResponse(
@@ -1729,7 +1833,7 @@ async def update_maintenance(
     maintenance_id: int,
     maintenance_update: MaintenanceUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Mettre à jour une maintenance (admin uniquement)"""
     maintenance = db.query(Maintenance).filter(Maintenance.id == maintenance_id).first()
@@ -1769,6 +1873,7 @@ async def update_maintenance(
     
     maintenance.updated_at = datetime.utcnow()
     db.commit()
+    status_snapshot.invalidate(maintenance.copro_id)
     db.refresh(maintenance, ['service_instances'])
     
     return MaintenanceResponse(
@@ -1795,15 +1900,17 @@ async def update_maintenance(
 async def delete_maintenance(
     maintenance_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user)
 ):
     """Supprimer une maintenance (admin uniquement)"""
     maintenance = db.query(Maintenance).filter(Maintenance.id == maintenance_id).first()
     if not maintenance:
         raise HTTPException(status_code=404, detail="Maintenance non trouvée")
     
+    copro_id = maintenance.copro_id
     db.delete(maintenance)
     db.commit()
+    status_snapshot.invalidate(copro_id)
     return None
 
 
@@ -1812,19 +1919,21 @@ async def delete_maintenance(
 @router.get("/statistics/general", response_model=dict)
 async def get_general_statistics(
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Obtenir les statistiques générales des incidents (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return {
             "incidents_by_day": [],
             "all_incidents": [],
-            "resolution_time_by_equipment": []
+            "resolution_time_by_equipment": [],
+            "equipment_availability": []
         }
     
     # Date de début (6 mois en arrière)
-    six_months_ago = datetime.utcnow() - timedelta(days=180)
+    now = datetime.utcnow()
+    six_months_ago = now - timedelta(days=STATISTICS_WINDOW_DAYS)
     
     # Nombre d'incidents par jour sur les 6 derniers mois
     incidents_by_day_query = db.query(
@@ -1850,13 +1959,12 @@ async def get_general_statistics(
     ]
     
     # Tous les incidents
-    all_incidents_query = db.query(Incident).filter(
+    all_incidents_query = db.query(Incident).options(*INCIDENT_STATISTICS_OPTIONS).filter(
         Incident.copro_id == copro.id
     ).order_by(Incident.created_at.desc()).all()
     
     all_incidents = []
     for incident in all_incidents_query:
-        db.refresh(incident, ['service_instance'])
         resolution_time = None
         if incident.resolved_at and incident.created_at:
             delta = incident.resolved_at - incident.created_at
@@ -1913,10 +2021,22 @@ async def get_general_statistics(
         for row in resolution_stats_query
     ]
     
+    # Disponibilité par équipement sur les 6 derniers mois
+    all_equipments = db.query(ServiceInstance).filter(
+        ServiceInstance.copro_id == copro.id,
+        ServiceInstance.is_active == True
+    ).all()
+    equipment_availability = compute_equipment_availability(
+        db, copro.id, all_equipments,
+        six_months_ago.replace(tzinfo=timezone.utc), now.replace(tzinfo=timezone.utc),
+        STATISTICS_WINDOW_DAYS * 24, now=now
+    )
+    
     return {
         "incidents_by_day": incidents_by_day,
         "all_incidents": all_incidents,
-        "resolution_time_by_equipment": resolution_time_by_equipment
+        "resolution_time_by_equipment": resolution_time_by_equipment,
+        "equipment_availability": equipment_availability
     }
 
 
@@ -1924,15 +2044,16 @@ async def get_general_statistics(
 async def get_statistics_by_building(
     building_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_admin_user)
+    admin: Principal = Depends(get_admin_user),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Obtenir les statistiques des incidents par bâtiment (admin uniquement)"""
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return {
             "incidents_by_day": [],
             "all_incidents": [],
-            "resolution_time_by_equipment": []
+            "resolution_time_by_equipment": [],
+            "equipment_availability": []
         }
     
     # Vérifier que le bâtiment existe et appartient à la copropriété
@@ -1944,7 +2065,8 @@ async def get_statistics_by_building(
         raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
     
     # Date de début (6 mois en arrière)
-    six_months_ago = datetime.utcnow() - timedelta(days=180)
+    now = datetime.utcnow()
+    six_months_ago = now - timedelta(days=STATISTICS_WINDOW_DAYS)
     
     # Récupérer les IDs des équipements du bâtiment
     equipment_ids = [si.id for si in db.query(ServiceInstance.id).filter(
@@ -1958,7 +2080,8 @@ async def get_statistics_by_building(
             "building_name": building.name,
             "incidents_by_day": [],
             "all_incidents": [],
-            "resolution_time_by_equipment": []
+            "resolution_time_by_equipment": [],
+            "equipment_availability": []
         }
     
     # Nombre d'incidents par jour sur les 6 derniers mois pour ce bâtiment
@@ -1986,7 +2109,7 @@ async def get_statistics_by_building(
     ]
     
     # Tous les incidents pour ce bâtiment
-    all_incidents_query = db.query(Incident).filter(
+    all_incidents_query = db.query(Incident).options(*INCIDENT_STATISTICS_OPTIONS).filter(
         and_(
             Incident.copro_id == copro.id,
             Incident.service_instance_id.in_(equipment_ids)
@@ -1995,7 +2118,6 @@ async def get_statistics_by_building(
     
     all_incidents = []
     for incident in all_incidents_query:
-        db.refresh(incident, ['service_instance'])
         resolution_time = None
         if incident.resolved_at and incident.created_at:
             delta = incident.resolved_at - incident.created_at
@@ -2053,10 +2175,23 @@ async def get_statistics_by_building(
         for row in resolution_stats_query
     ]
     
+    # Disponibilité par équipement du bâtiment sur les 6 derniers mois
+    building_equipments = db.query(ServiceInstance).filter(
+        ServiceInstance.building_id == building_id,
+        ServiceInstance.copro_id == copro.id,
+        ServiceInstance.is_active == True
+    ).all()
+    equipment_availability = compute_equipment_availability(
+        db, copro.id, building_equipments,
+        six_months_ago.replace(tzinfo=timezone.utc), now.replace(tzinfo=timezone.utc),
+        STATISTICS_WINDOW_DAYS * 24, now=now
+    )
+    
     return {
         "building_id": building_id,
         "building_name": building.name,
         "incidents_by_day": incidents_by_day,
         "all_incidents": all_incidents,
-        "resolution_time_by_equipment": resolution_time_by_equipment
+        "resolution_time_by_equipment": resolution_time_by_equipment,
+        "equipment_availability": equipment_availability
     }
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, field_validator
@@ -8,12 +8,14 @@ from app.db import get_db
 from app.models.user import User
 from app.models.copro import Copro, Building
 from app.auth import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_user,
 )
 from app.core.config import settings
+from app.core.rate_limit import client_ip, login_rate_limiter
+from app.core.tenant import get_current_copro
 
 router = APIRouter()
 
@@ -55,7 +57,11 @@ class UserResponse(BaseModel):
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(
+    user_data: UserRegister,
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
+):
     """Enregistrer un nouvel utilisateur (public) - Compte inactif par défaut"""
     # Vérifier que l'email n'existe pas déjà
     existing_email = db.query(User).filter(User.email == user_data.email).first()
@@ -70,13 +76,11 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     if not building:
         raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
     
-    # Récupérer la copropriété active
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
     
     # Créer le nouvel utilisateur (inactif par défaut)
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -97,13 +101,16 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login and get access token - Utilise email au lieu de username"""
+    # Limite par IP et par email, vérifiée avant toute requête SQL ou calcul bcrypt
+    login_rate_limiter.check(client_ip(request), form_data.username)
     # OAuth2PasswordRequestForm utilise 'username' comme nom de champ, mais on l'utilise pour l'email
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect",
@@ -114,10 +121,12 @@ async def login(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Compte inactif. Veuillez contacter un administrateur."
         )
+    login_rate_limiter.reset_email(form_data.username)
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id), "is_superuser": user.is_superuser}, expires_delta=access_token_expires
+        data={"sub": str(user.id), "is_superuser": user.is_superuser, "ver": user.token_version or 0},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
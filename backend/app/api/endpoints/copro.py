@@ -4,10 +4,15 @@ API endpoints pour la gestion des copropriétés, bâtiments et services
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 from pydantic import BaseModel
 from app.db import get_db
 from app.models.copro import Copro, Building, ServiceInstance
 from app.models.status import ServiceStatus
+from app.models.loaders import SERVICE_INSTANCE_OPTIONS
+from app.core.tenant import tenant_cache, unique_copro_slug
+from app.services.statistics_cache import statistics_cache
+from app.services.status_snapshot import status_snapshot
 
 router = APIRouter()
 
@@ -28,9 +33,10 @@ class CoproCreate(CoproBase):
 
 class CoproResponse(CoproBase):
     id: int
+    slug: Optional[str] = None
     is_active: bool
-    created_at: str
-    updated_at: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
 
     class Config:
         from_attributes = True
@@ -50,8 +56,8 @@ class BuildingResponse(BuildingBase):
     id: int
     copro_id: int
     is_active: bool
-    created_at: str
-    updated_at: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
 
     class Config:
         from_attributes = True
@@ -76,8 +82,8 @@ class ServiceInstanceResponse(ServiceInstanceBase):
     copro_id: int
     is_active: bool
     building: BuildingResponse
-    created_at: str
-    updated_at: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
 
     class Config:
         from_attributes = True
@@ -88,9 +94,11 @@ class ServiceInstanceResponse(ServiceInstanceBase):
 @router.post("/copros", response_model=CoproResponse, status_code=status.HTTP_201_CREATED)
 async def create_copro(copro: CoproCreate, db: Session = Depends(get_db)):
     """Créer une nouvelle copropriété"""
-    db_copro = Copro(**copro.dict())
+    db_copro = Copro(**copro.dict(), slug=unique_copro_slug(db, copro.name))
     db.add(db_copro)
     db.commit()
+    tenant_cache.invalidate()
+    status_snapshot.invalidate(db_copro.id)
     db.refresh(db_copro)
     return db_copro
 
@@ -132,6 +140,7 @@ async def create_building(building: BuildingCreate, db: Session = Depends(get_db
     db_building = Building(**building.dict())
     db.add(db_building)
     db.commit()
+    status_snapshot.invalidate(db_building.copro_id)
     db.refresh(db_building)
     return db_building
 
@@ -175,6 +184,8 @@ async def create_service_instance(service_instance: ServiceInstanceCreate, db: S
     db_service_instance = ServiceInstance(**service_instance.dict())
     db.add(db_service_instance)
     db.commit()
+    status_snapshot.invalidate(db_service_instance.copro_id)
+    statistics_cache.invalidate_copro(db_service_instance.copro_id)
     db.refresh(db_service_instance)
     
     # Charger les relations pour la réponse
@@ -185,7 +196,7 @@ async def create_service_instance(service_instance: ServiceInstanceCreate, db: S
 @router.get("/copros/{copro_id}/service-instances", response_model=List[ServiceInstanceResponse])
 async def list_service_instances(copro_id: int, building_id: Optional[int] = None, db: Session = Depends(get_db)):
     """Lister les instances de services d'une copropriété (optionnellement filtrées par bâtiment)"""
-    query = db.query(ServiceInstance).filter(
+    query = db.query(ServiceInstance).options(*SERVICE_INSTANCE_OPTIONS).filter(
         ServiceInstance.copro_id == copro_id,
         ServiceInstance.is_active == True
     )
@@ -195,10 +206,6 @@ async def list_service_instances(copro_id: int, building_id: Optional[int] = Non
     
     service_instances = query.order_by(ServiceInstance.order, ServiceInstance.name).all()
     
-    # Charger les relations
-    for instance in service_instances:
-        db.refresh(instance, ['building'])
-    
     return service_instances
 
 
@@ -209,14 +216,11 @@ async def list_building_service_instances(building_id: int, db: Session = Depend
     if not building:
         raise HTTPException(status_code=404, detail="Bâtiment non trouvé")
     
-    service_instances = db.query(ServiceInstance).filter(
+    service_instances = db.query(ServiceInstance).options(*SERVICE_INSTANCE_OPTIONS).filter(
         ServiceInstance.building_id == building_id,
         ServiceInstance.is_active == True
     ).order_by(ServiceInstance.order, ServiceInstance.name).all()
     
-    for instance in service_instances:
-        db.refresh(instance, ['building'])
-    
     return service_instances
 
 
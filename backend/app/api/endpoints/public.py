@@ -1,20 +1,40 @@
 """
 API endpoints publics (sans authentification)
-- Déclaration de tickets d'incident
+- Déclaration de tickets d'incident (limitée par IP / email, doublons regroupés,
+  enregistrement différé par lots en option)
+- Envoi et consultation des photos jointes aux tickets
 - Statistiques publiques
 """
+import json
 import re
 from calendar import isleap
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func as sql_func, and_
-from app.db import get_db
+from sqlalchemy import func as sql_func, and_, select
+from app.db import get_db, get_async_db
 from app.models.ticket import Ticket, TicketStatus, TicketType
 from app.models.copro import Copro, ServiceInstance, Building
 from app.models.status import Incident
+from app.models.loaders import INCIDENT_STATISTICS_OPTIONS, SERVICE_INSTANCE_OPTIONS
+from app.core.config import settings
+from app.core.rate_limit import attachment_rate_limiter, client_ip, ticket_rate_limiter
+from app.core.tenant import get_current_copro, get_current_copro_async
+from app.services.attachments import (
+    CONTENT_TYPES,
+    KEY_PATTERN,
+    attachment_store,
+    attachment_urls,
+    file_response,
+    receive_uploads,
+)
+from app.services.availability import compute_equipment_availability
+from app.services.statistics_cache import statistics_cache
+from app.services.ticket_dedup import attach_to_duplicate
+from app.services.ticket_intake import ticket_intake
 from typing import List
 
 router = APIRouter()
@@ -29,26 +49,40 @@ class TicketCreate(BaseModel):
     description: str
     location: Optional[str] = None
     type: str = "incident"  # "incident" ou "request"
+    attachments: Optional[List[str]] = None  # Clés renvoyées par POST /tickets/attachments
 
 
 @router.post("/tickets", status_code=status.HTTP_201_CREATED)
 async def create_ticket(
+    request: Request,
+    response: Response,
     ticket_data: TicketCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    copro: Optional[Copro] = Depends(get_current_copro_async)
 ):
-    """Créer un ticket de déclaration d'incident (public) - Une seule copropriété"""
+    """Créer un ticket de déclaration d'incident (public) - Une seule copropriété
+    
+    Une déclaration proche d'un ticket ouvert sur le même équipement est ajoutée à ce ticket
+    (« +1 ») au lieu d'en créer un nouveau : la réponse contient alors duplicate=True.
+    En mode TICKET_INTAKE_MODE="queued", le ticket est inséré par lots en tâche de fond :
+    202 avec un intake_id provisoire (voir GET /tickets/intake/{intake_id}).
+    """
+    # Limite par IP et par email, vérifiée avant toute requête SQL
+    ip = client_ip(request)
+    ticket_rate_limiter.check(ip, ticket_data.reporter_email)
     try:
-        # Récupérer la première (et seule) copropriété
-        copro = db.query(Copro).filter(Copro.is_active == True).first()
         if not copro:
             raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
         
         # Vérifier que le service_instance existe (si spécifié)
         if ticket_data.service_instance_id:
-            service_instance = db.query(ServiceInstance).filter(
-                ServiceInstance.id == ticket_data.service_instance_id,
-                ServiceInstance.copro_id == copro.id
-            ).first()
+            result = await db.execute(
+                select(ServiceInstance.id).where(
+                    ServiceInstance.id == ticket_data.service_instance_id,
+                    ServiceInstance.copro_id == copro.id
+                )
+            )
+            service_instance = result.first()
             if not service_instance:
                 raise HTTPException(status_code=404, detail="Équipement non trouvé")
         
@@ -112,54 +146,153 @@ async def create_ticket(
                     detail="Le numéro de téléphone doit être un numéro français valide (10 chiffres, exemple: 0612345678)"
                 )
         
-        ticket = Ticket(
-            copro_id=copro.id,
-            service_instance_id=ticket_data.service_instance_id,
-            reporter_name=ticket_data.reporter_name.strip(),
-            reporter_email=ticket_data.reporter_email.strip(),
-            reporter_phone=clean_phone,  # Utiliser le numéro nettoyé ou None
-            title=ticket_data.title.strip(),
-            description=ticket_data.description.strip(),
-            location=ticket_data.location.strip() if ticket_data.location else None,
-            type=ticket_type,
-            status=TicketStatus.ANALYZING
+        # Photos : envoyées au préalable via POST /tickets/attachments
+        attachments = list(dict.fromkeys(ticket_data.attachments or []))
+        if len(attachments) > settings.ATTACHMENT_MAX_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{settings.ATTACHMENT_MAX_FILES} photos au maximum"
+            )
+        if not all(attachment_store.exists(key) for key in attachments):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pièce jointe inconnue")
+        
+        # Même équipement, titre proche, ticket encore ouvert : « +1 » sur le ticket existant
+        duplicate = await attach_to_duplicate(
+            db, copro.id, ticket_data.service_instance_id, ticket_type, ticket_data.title.strip(), attachments
         )
+        if duplicate:
+            ticket_id, report_count, ticket_status = duplicate
+            await db.commit()
+            # Un « +1 » ne crée pas de ticket : il n'entame pas le budget de l'IP (immeuble
+            # derrière une même box, résidents qui signalent la même panne)
+            ticket_rate_limiter.refund_ip(ip)
+            return {
+                "message": "Ce problème a déjà été signalé : votre déclaration a été ajoutée au ticket existant",
+                "ticket_id": ticket_id,
+                "status": ticket_status.value,
+                "duplicate": True,
+                "report_count": report_count
+            }
+        
+        values = {
+            "copro_id": copro.id,
+            "service_instance_id": ticket_data.service_instance_id,
+            "reporter_name": ticket_data.reporter_name.strip(),
+            "reporter_email": ticket_data.reporter_email.strip(),
+            "reporter_phone": clean_phone,  # Utiliser le numéro nettoyé ou None
+            "title": ticket_data.title.strip(),
+            "description": ticket_data.description.strip(),
+            "location": ticket_data.location.strip() if ticket_data.location else None,
+            "attachments": json.dumps(attachments) if attachments else None,
+        }
+        
+        # Enregistrement différé : journalisé sur disque, inséré par lots en tâche de fond
+        if ticket_intake.running:
+            await db.rollback()
+            intake_id = await ticket_intake.submit({**values, "type": ticket_type.value})
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {
+                "message": "Déclaration reçue, elle sera enregistrée dans quelques instants",
+                "intake_id": intake_id,
+                "ticket_id": None,
+                "status": TicketStatus.ANALYZING.value,
+                "duplicate": False,
+                "report_count": 1
+            }
+        
+        ticket = Ticket(**values, type=ticket_type, status=TicketStatus.ANALYZING)
         
         db.add(ticket)
-        db.commit()
-        db.refresh(ticket)
+        await db.commit()
         
         return {
             "message": "Ticket créé avec succès",
             "ticket_id": ticket.id,
-            "status": ticket.status.value
+            "status": ticket.status.value,
+            "duplicate": False,
+            "report_count": 1
         }
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la création du ticket: {str(e)}"
         )
 
 
+@router.get("/tickets/intake/{intake_id}")
+async def get_ticket_intake(
+    intake_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    copro: Optional[Copro] = Depends(get_current_copro_async)
+):
+    """Suivre un ticket accepté en mode différé (202) : en attente, ou id du ticket créé"""
+    result = await db.execute(select(Ticket.id).where(Ticket.intake_id == intake_id))
+    ticket_id = result.scalar_one_or_none()
+    if ticket_id is not None:
+        return {"intake_id": intake_id, "status": "created", "ticket_id": ticket_id}
+    if ticket_intake.is_pending(intake_id):
+        return {"intake_id": intake_id, "status": "queued", "ticket_id": None}
+    raise HTTPException(status_code=404, detail="Déclaration non trouvée")
+
+
+@router.post("/tickets/attachments", status_code=status.HTTP_201_CREATED)
+async def upload_ticket_attachments(request: Request):
+    """Envoyer des photos (multipart/form-data) avant de créer le ticket
+    
+    Le corps est lu en flux et écrit sur disque par morceaux. Retourne une clé par fichier,
+    à passer dans `attachments` lors de la création du ticket.
+    """
+    attachment_rate_limiter.check(client_ip(request), None)
+    keys = await receive_uploads(request, attachment_store, settings.ATTACHMENT_MAX_FILES)
+    return {"attachments": [attachment_urls(key) for key in keys]}
+
+
+def _attachment_key(key: str) -> str:
+    if not KEY_PATTERN.match(key):
+        raise HTTPException(status_code=404, detail="Pièce jointe non trouvée")
+    return key
+
+
+@router.get("/attachments/{key}")
+async def get_attachment(key: str, request: Request):
+    """Photo jointe à un ticket (requêtes Range acceptées, mise en cache longue)"""
+    path = attachment_store.path(_attachment_key(key))
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Pièce jointe non trouvée")
+    return file_response(request, path, key, CONTENT_TYPES[key.rsplit(".", 1)[1]])
+
+
+@router.get("/attachments/{key}/thumbnail")
+async def get_attachment_thumbnail(key: str, request: Request):
+    """Miniature JPEG d'une photo (l'original si la miniature n'a pas pu être générée)"""
+    path = attachment_store.thumbnail_path(_attachment_key(key))
+    if path.is_file():
+        return file_response(request, path, f"thumbnail-{key}", "image/jpeg")
+    return await get_attachment(key, request)
+
+
 @router.get("/service-instances")
-async def get_public_service_instances(db: Session = Depends(get_db)):
+async def get_public_service_instances(
+    db: AsyncSession = Depends(get_async_db),
+    copro: Optional[Copro] = Depends(get_current_copro_async)
+):
     """Obtenir la liste des équipements (public, pour le formulaire) - Une seule copropriété"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return []
     
-    service_instances = db.query(ServiceInstance).filter(
-        ServiceInstance.copro_id == copro.id,
-        ServiceInstance.is_active == True
-    ).order_by(ServiceInstance.order, ServiceInstance.name).all()
+    rows = await db.execute(
+        select(ServiceInstance).options(*SERVICE_INSTANCE_OPTIONS).where(
+            ServiceInstance.copro_id == copro.id,
+            ServiceInstance.is_active == True
+        ).order_by(ServiceInstance.order, ServiceInstance.name)
+    )
+    service_instances = rows.scalars().all()
     
     result = []
     for instance in service_instances:
-        db.refresh(instance, ['building'])
         result.append({
             "id": instance.id,
             "name": instance.name,
@@ -171,10 +304,11 @@ async def get_public_service_instances(db: Session = Depends(get_db)):
 
 
 @router.get("/buildings")
-async def get_public_buildings(db: Session = Depends(get_db)):
+async def get_public_buildings(
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
+):
     """Obtenir la liste des bâtiments (public, pour le formulaire d'inscription) - Une seule copropriété"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return []
     
@@ -195,17 +329,81 @@ async def get_public_buildings(db: Session = Depends(get_db)):
 
 # ============ Statistiques publiques ============
 
+def _day_label(day) -> Optional[str]:
+    """Jour au format AAAA-MM-JJ : date() renvoie une date sous PostgreSQL, une chaîne sous SQLite"""
+    if day is None:
+        return None
+    return day if isinstance(day, str) else day.isoformat()
+
+
+def _resolution_hours(db: Session):
+    """Durée de résolution d'un incident en heures (extract('epoch', ...) n'existe pas sous SQLite)"""
+    if db.get_bind().dialect.name == "sqlite":
+        return (sql_func.julianday(Incident.resolved_at) - sql_func.julianday(Incident.created_at)) * 24
+    return sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
+
+
+def _resolution_time_by_equipment(db: Session, copro_id: int, building_id: Optional[int] = None) -> list:
+    """Temps de résolution par équipement (moyen, min, max) sur tous les incidents résolus
+    
+    Cette section ne dépend pas de l'année : elle est mise en cache séparément (année None)
+    et invalidée à chaque écriture d'incident de la copropriété.
+    """
+    cached = statistics_cache.get(copro_id, building_id, None)
+    if cached is not None:
+        return cached["resolution_time_by_equipment"]
+    generation = statistics_cache.generation(copro_id)
+    
+    filters = [
+        ServiceInstance.copro_id == copro_id,
+        Incident.copro_id == copro_id,
+        Incident.resolved_at.isnot(None)
+    ]
+    if building_id is not None:
+        filters.append(ServiceInstance.building_id == building_id)
+    resolution_hours = _resolution_hours(db)
+    resolution_stats_query = db.query(
+        ServiceInstance.id,
+        ServiceInstance.name,
+        sql_func.avg(resolution_hours).label('avg_hours'),
+        sql_func.min(resolution_hours).label('min_hours'),
+        sql_func.max(resolution_hours).label('max_hours'),
+        sql_func.count(Incident.id).label('incident_count')
+    ).join(
+        Incident, ServiceInstance.id == Incident.service_instance_id
+    ).filter(
+        and_(*filters)
+    ).group_by(
+        ServiceInstance.id,
+        ServiceInstance.name
+    ).all()
+    
+    resolution_time_by_equipment = [
+        {
+            "equipment_id": row.id,
+            "equipment_name": row.name,
+            "avg_hours": float(row.avg_hours) if row.avg_hours else None,
+            "min_hours": float(row.min_hours) if row.min_hours else None,
+            "max_hours": float(row.max_hours) if row.max_hours else None,
+            "incident_count": row.incident_count
+        }
+        for row in resolution_stats_query
+    ]
+    statistics_cache.set(copro_id, building_id, None, {"resolution_time_by_equipment": resolution_time_by_equipment}, generation)
+    return resolution_time_by_equipment
+
+
 @router.get("/statistics/general", response_model=dict)
 async def get_public_general_statistics(
     year: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Obtenir les statistiques générales des incidents (public, sans authentification)
     
     Args:
         year: Année pour laquelle calculer les statistiques (par défaut: année en cours)
     """
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return {
             "incidents_by_day": [],
@@ -218,6 +416,12 @@ async def get_public_general_statistics(
     if year is None:
         year = datetime.utcnow().year
     
+    # Statistiques de l'année déjà calculées
+    cached = statistics_cache.get(copro.id, None, year)
+    if cached is not None:
+        return {**cached, "resolution_time_by_equipment": _resolution_time_by_equipment(db, copro.id)}
+    generation = statistics_cache.generation(copro.id)
+    
     # Dates de début et fin de l'année (1er janvier 00:00:00 au 31 décembre 23:59:59) - avec timezone UTC
     start_date = datetime(year, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
     end_date = datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
@@ -240,14 +444,14 @@ async def get_public_general_statistics(
     
     incidents_by_day = [
         {
-            "date": row.date.isoformat() if row.date else None,
+            "date": _day_label(row.date),
             "count": row.count
         }
         for row in incidents_by_day_query
     ]
     
     # Tous les incidents de l'année sélectionnée
-    all_incidents_query = db.query(Incident).filter(
+    all_incidents_query = db.query(Incident).options(*INCIDENT_STATISTICS_OPTIONS).filter(
         and_(
             Incident.copro_id == copro.id,
             Incident.created_at >= start_date,
@@ -257,7 +461,6 @@ async def get_public_general_statistics(
     
     all_incidents = []
     for incident in all_incidents_query:
-        db.refresh(incident, ['service_instance'])
         resolution_time = None
         if incident.resolved_at and incident.created_at:
             delta = incident.resolved_at - incident.created_at
@@ -276,43 +479,7 @@ async def get_public_general_statistics(
         })
     
     # Temps de résolution par équipement (moyen, min, max)
-    resolution_stats_query = db.query(
-        ServiceInstance.id,
-        ServiceInstance.name,
-        sql_func.avg(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('avg_hours'),
-        sql_func.min(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('min_hours'),
-        sql_func.max(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('max_hours'),
-        sql_func.count(Incident.id).label('incident_count')
-    ).join(
-        Incident, ServiceInstance.id == Incident.service_instance_id
-    ).filter(
-        and_(
-            ServiceInstance.copro_id == copro.id,
-            Incident.copro_id == copro.id,
-            Incident.resolved_at.isnot(None)
-        )
-    ).group_by(
-        ServiceInstance.id,
-        ServiceInstance.name
-    ).all()
-    
-    resolution_time_by_equipment = [
-        {
-            "equipment_id": row.id,
-            "equipment_name": row.name,
-            "avg_hours": float(row.avg_hours) if row.avg_hours else None,
-            "min_hours": float(row.min_hours) if row.min_hours else None,
-            "max_hours": float(row.max_hours) if row.max_hours else None,
-            "incident_count": row.incident_count
-        }
-        for row in resolution_stats_query
-    ]
+    resolution_time_by_equipment = _resolution_time_by_equipment(db, copro.id)
     
     # Calcul de la disponibilité par équipement
     # Période de référence : année complète
@@ -320,79 +487,32 @@ async def get_public_general_statistics(
     days_in_year = 366 if isleap(year) else 365
     total_hours = days_in_year * 24
     
-    equipment_availability = []
     all_equipments = db.query(ServiceInstance).filter(
         ServiceInstance.copro_id == copro.id,
         ServiceInstance.is_active == True
     ).all()
     
-    for equipment in all_equipments:
-        # Récupérer tous les incidents pour cet équipement dans l'année sélectionnée
-        equipment_incidents = db.query(Incident).filter(
-            and_(
-                Incident.service_instance_id == equipment.id,
-                Incident.copro_id == copro.id,
-                Incident.created_at >= start_date,
-                Incident.created_at <= end_date
-            )
-        ).all()
-        
-        incident_count = len(equipment_incidents)
-        
-        # Calculer le temps total en panne
-        downtime_hours = 0
-        total_resolution_time = 0
-        resolved_count = 0
-        
-        for incident in equipment_incidents:
-            if incident.resolved_at and incident.created_at:
-                # Incident résolu : temps de résolution (limité à la période de l'année)
-                # S'assurer que les dates sont timezone-aware pour la comparaison
-                incident_created = incident.created_at if incident.created_at.tzinfo else incident.created_at.replace(tzinfo=timezone.utc)
-                incident_resolved = incident.resolved_at if incident.resolved_at.tzinfo else incident.resolved_at.replace(tzinfo=timezone.utc)
-                incident_start = max(incident_created, start_date)
-                incident_end = min(incident_resolved, end_date)
-                resolution_time = (incident_end - incident_start).total_seconds() / 3600
-                downtime_hours += resolution_time
-                total_resolution_time += resolution_time
-                resolved_count += 1
-            elif incident.created_at:
-                # Incident non résolu : temps depuis la création jusqu'à la fin de l'année (ou maintenant si année en cours)
-                incident_created = incident.created_at if incident.created_at.tzinfo else incident.created_at.replace(tzinfo=timezone.utc)
-                now_utc = datetime.utcnow().replace(tzinfo=timezone.utc)
-                incident_start = max(incident_created, start_date)
-                incident_end = min(now_utc, end_date)
-                downtime_hours += (incident_end - incident_start).total_seconds() / 3600
-        
-        # Calculer la disponibilité
-        availability_percent = ((total_hours - downtime_hours) / total_hours * 100) if total_hours > 0 else 100.0
-        availability_percent = max(0.0, min(100.0, availability_percent))  # Clamp entre 0 et 100
-        
-        # Temps moyen de résolution (seulement pour les incidents résolus)
-        avg_resolution_hours = (total_resolution_time / resolved_count) if resolved_count > 0 else None
-        
-        equipment_availability.append({
-            "equipment_id": equipment.id,
-            "equipment_name": equipment.name,
-            "availability_percent": round(availability_percent, 2),
-            "incident_count": incident_count,
-            "avg_resolution_hours": round(avg_resolution_hours, 2) if avg_resolution_hours else None
-        })
+    equipment_availability = compute_equipment_availability(
+        db, copro.id, all_equipments, start_date, end_date, total_hours
+    )
     
-    return {
+    payload = {
         "year": year,
         "incidents_by_day": incidents_by_day,
         "all_incidents": all_incidents,
         "resolution_time_by_equipment": resolution_time_by_equipment,
         "equipment_availability": equipment_availability
     }
+    statistics_cache.set(copro.id, None, year, payload, generation)
+    return payload
 
 
 @router.get("/statistics/by-building/{building_id}", response_model=dict)
 async def get_public_statistics_by_building(
     building_id: int,
     year: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Obtenir les statistiques des incidents par bâtiment (public, sans authentification)
     
@@ -400,7 +520,6 @@ async def get_public_statistics_by_building(
         building_id: ID du bâtiment
         year: Année pour laquelle calculer les statistiques (par défaut: année en cours)
     """
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
     if not copro:
         return {
             "incidents_by_day": [],
@@ -421,6 +540,12 @@ async def get_public_statistics_by_building(
     if year is None:
         year = datetime.utcnow().year
     
+    # Statistiques de l'année déjà calculées
+    cached = statistics_cache.get(copro.id, building_id, year)
+    if cached is not None:
+        return {**cached, "resolution_time_by_equipment": _resolution_time_by_equipment(db, copro.id, building_id)}
+    generation = statistics_cache.generation(copro.id)
+    
     # Dates de début et fin de l'année (1er janvier 00:00:00 au 31 décembre 23:59:59) - avec timezone UTC
     start_date = datetime(year, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
     end_date = datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
@@ -461,14 +586,14 @@ async def get_public_statistics_by_building(
     
     incidents_by_day = [
         {
-            "date": row.date.isoformat() if row.date else None,
+            "date": _day_label(row.date),
             "count": row.count
         }
         for row in incidents_by_day_query
     ]
     
     # Tous les incidents pour ce bâtiment dans l'année sélectionnée
-    all_incidents_query = db.query(Incident).filter(
+    all_incidents_query = db.query(Incident).options(*INCIDENT_STATISTICS_OPTIONS).filter(
         and_(
             Incident.copro_id == copro.id,
             Incident.service_instance_id.in_(equipment_ids),
@@ -479,7 +604,6 @@ async def get_public_statistics_by_building(
     
     all_incidents = []
     for incident in all_incidents_query:
-        db.refresh(incident, ['service_instance'])
         resolution_time = None
         if incident.resolved_at and incident.created_at:
             delta = incident.resolved_at - incident.created_at
@@ -498,44 +622,7 @@ async def get_public_statistics_by_building(
         })
     
     # Temps de résolution par équipement (moyen, min, max) pour ce bâtiment
-    resolution_stats_query = db.query(
-        ServiceInstance.id,
-        ServiceInstance.name,
-        sql_func.avg(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('avg_hours'),
-        sql_func.min(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('min_hours'),
-        sql_func.max(
-            sql_func.extract('epoch', Incident.resolved_at - Incident.created_at) / 3600
-        ).label('max_hours'),
-        sql_func.count(Incident.id).label('incident_count')
-    ).join(
-        Incident, ServiceInstance.id == Incident.service_instance_id
-    ).filter(
-        and_(
-            ServiceInstance.copro_id == copro.id,
-            ServiceInstance.building_id == building_id,
-            Incident.copro_id == copro.id,
-            Incident.resolved_at.isnot(None)
-        )
-    ).group_by(
-        ServiceInstance.id,
-        ServiceInstance.name
-    ).all()
-    
-    resolution_time_by_equipment = [
-        {
-            "equipment_id": row.id,
-            "equipment_name": row.name,
-            "avg_hours": float(row.avg_hours) if row.avg_hours else None,
-            "min_hours": float(row.min_hours) if row.min_hours else None,
-            "max_hours": float(row.max_hours) if row.max_hours else None,
-            "incident_count": row.incident_count
-        }
-        for row in resolution_stats_query
-    ]
+    resolution_time_by_equipment = _resolution_time_by_equipment(db, copro.id, building_id)
     
     # Calcul de la disponibilité par équipement pour ce bâtiment
     # Période de référence : année complète
@@ -544,67 +631,17 @@ async def get_public_statistics_by_building(
     days_in_year = 366 if isleap(year) else 365
     total_hours = days_in_year * 24
     
-    equipment_availability = []
     building_equipments = db.query(ServiceInstance).filter(
         ServiceInstance.building_id == building_id,
         ServiceInstance.copro_id == copro.id,
         ServiceInstance.is_active == True
     ).all()
     
-    for equipment in building_equipments:
-        # Récupérer tous les incidents pour cet équipement dans l'année sélectionnée
-        equipment_incidents = db.query(Incident).filter(
-            and_(
-                Incident.service_instance_id == equipment.id,
-                Incident.copro_id == copro.id,
-                Incident.created_at >= start_date,
-                Incident.created_at <= end_date
-            )
-        ).all()
-        
-        incident_count = len(equipment_incidents)
-        
-        # Calculer le temps total en panne
-        downtime_hours = 0
-        total_resolution_time = 0
-        resolved_count = 0
-        
-        for incident in equipment_incidents:
-            if incident.resolved_at and incident.created_at:
-                # Incident résolu : temps de résolution (limité à la période de l'année)
-                # S'assurer que les dates sont timezone-aware pour la comparaison
-                incident_created = incident.created_at if incident.created_at.tzinfo else incident.created_at.replace(tzinfo=timezone.utc)
-                incident_resolved = incident.resolved_at if incident.resolved_at.tzinfo else incident.resolved_at.replace(tzinfo=timezone.utc)
-                incident_start = max(incident_created, start_date)
-                incident_end = min(incident_resolved, end_date)
-                resolution_time = (incident_end - incident_start).total_seconds() / 3600
-                downtime_hours += resolution_time
-                total_resolution_time += resolution_time
-                resolved_count += 1
-            elif incident.created_at:
-                # Incident non résolu : temps depuis la création jusqu'à la fin de l'année (ou maintenant si année en cours)
-                incident_created = incident.created_at if incident.created_at.tzinfo else incident.created_at.replace(tzinfo=timezone.utc)
-                now_utc = datetime.utcnow().replace(tzinfo=timezone.utc)
-                incident_start = max(incident_created, start_date)
-                incident_end = min(now_utc, end_date)
-                downtime_hours += (incident_end - incident_start).total_seconds() / 3600
-        
-        # Calculer la disponibilité
-        availability_percent = ((total_hours - downtime_hours) / total_hours * 100) if total_hours > 0 else 100.0
-        availability_percent = max(0.0, min(100.0, availability_percent))  # Clamp entre 0 et 100
-        
-        # Temps moyen de résolution (seulement pour les incidents résolus)
-        avg_resolution_hours = (total_resolution_time / resolved_count) if resolved_count > 0 else None
-        
-        equipment_availability.append({
-            "equipment_id": equipment.id,
-            "equipment_name": equipment.name,
-            "availability_percent": round(availability_percent, 2),
-            "incident_count": incident_count,
-            "avg_resolution_hours": round(avg_resolution_hours, 2) if avg_resolution_hours else None
-        })
+    equipment_availability = compute_equipment_availability(
+        db, copro.id, building_equipments, start_date, end_date, total_hours
+    )
     
-    return {
+    payload = {
         "building_id": building_id,
         "building_name": building.name,
         "year": year,
@@ -613,4 +650,6 @@ async def get_public_statistics_by_building(
         "resolution_time_by_equipment": resolution_time_by_equipment,
         "equipment_availability": equipment_availability
     }
+    statistics_cache.set(copro.id, building_id, year, payload, generation)
+    return payload
 
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select, func
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from app.db import get_db
 from app.models.status import Service, Incident, IncidentUpdate, ServiceStatus, IncidentStatus
 from app.models.copro import ServiceInstance, Copro
 from app.models.maintenance import Maintenance
+from app.core.pagination import MAX_PAGE_SIZE
+from app.core.tenant import get_current_copro, get_current_copro_async
+from app.models.loaders import PUBLIC_INCIDENT_OPTIONS
+from app.services.status_snapshot import status_snapshot, etag_matches
+from app.services.status_events import status_events
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -154,56 +161,126 @@ async def get_services(db: Session = Depends(get_db)):
 
 @router.get("/incidents", response_model=List[IncidentResponse])
 async def get_incidents(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
 ):
     """Get recent incidents (public endpoint)"""
-    incidents = db.query(Incident).order_by(desc(Incident.created_at)).limit(limit).all()
+    # Filtrés sur la copropriété de la requête (voir app.core.tenant)
+    incidents = db.query(Incident).options(*PUBLIC_INCIDENT_OPTIONS).order_by(
+        desc(Incident.created_at)
+    ).limit(limit).all()
     return [IncidentResponse.from_incident(i) for i in incidents]
 
 
 @router.get("/status", response_model=StatusPageResponse)
-async def get_status_page(db: Session = Depends(get_db)):
-    """Get complete status page data (public endpoint) - Une seule copropriété"""
-    # Récupérer la première (et seule) copropriété
-    copro = db.query(Copro).filter(Copro.is_active == True).first()
+async def get_status_page(
+    if_none_match: Optional[str] = Header(default=None),
+    copro: Optional[Copro] = Depends(get_current_copro_async)
+):
+    """Get complete status page data (public endpoint) - Copropriété de la requête
+    
+    Servi depuis le snapshot en mémoire de la copropriété (voir app.services.status_snapshot).
+    Répond 304 Not Modified si le client envoie l'ETag du contenu courant.
+    """
+    snapshot = await status_snapshot.get(copro.id if copro else None)
+    headers = {
+        "ETag": snapshot.etag,
+        "X-Status-Revision": str(snapshot.revision),
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@router.get("/stream")
+async def stream_status_page(copro: Optional[Copro] = Depends(get_current_copro_async)):
+    """Flux Server-Sent Events de la page de statut (public endpoint)
+    
+    Envoie d'abord un événement `snapshot` (payload complet de /status), puis un
+    événement `status` contenant le diff à chaque changement, et un `ping` périodique.
+    """
+    # S'abonner avant de lire le snapshot pour ne manquer aucun changement
+    copro_id = copro.id if copro else None
+    subscription = status_events.subscribe(copro_id)
+    try:
+        snapshot = await status_snapshot.get(copro_id)
+    except Exception:
+        status_events.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        status_events.stream(subscription, snapshot),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Désactiver le buffering des reverse proxies (nginx)
+        },
+    )
+
+
+@status_snapshot.builder
+async def build_status_page(db: AsyncSession, copro_id: Optional[int]):
+    """Construire le payload de la page de statut d'une copropriété et la date du prochain
+    changement lié au temps (début ou fin d'une maintenance)"""
+    copro = await db.get(Copro, copro_id) if copro_id is not None else None
     if not copro:
-        return {
-            "services": [],
-            "incidents": [],
-            "maintenances": [],
-            "overall_status": "operational",
-            "copro": None
-        }
+        empty = StatusPageResponse(services=[], incidents=[], maintenances=[], overall_status="operational", copro=None)
+        return empty.model_dump(mode="json"), None
     
     # Utiliser ServiceInstance au lieu de Service (ancien modèle)
-    service_instances = db.query(ServiceInstance).filter(
-        ServiceInstance.copro_id == copro.id,
-        ServiceInstance.is_active == True
-    ).order_by(ServiceInstance.order, ServiceInstance.name).all()
+    # Les relations sont chargées en amont : pas de lazy loading possible avec une session asynchrone
+    result = await db.execute(
+        select(ServiceInstance).options(
+            selectinload(ServiceInstance.building)
+        ).where(
+            ServiceInstance.copro_id == copro.id,
+            ServiceInstance.is_active == True
+        ).order_by(ServiceInstance.order, ServiceInstance.name)
+    )
+    service_instances = result.scalars().all()
     
     # Get recent incidents (last 20) avec les relations chargées
-    from sqlalchemy.orm import joinedload
-    incidents = db.query(Incident).options(
-        joinedload(Incident.service_instance),
-        joinedload(Incident.service_instances)
-    ).filter(
-        Incident.copro_id == copro.id
-    ).order_by(desc(Incident.created_at)).limit(20).all()
+    result = await db.execute(
+        select(Incident).options(
+            selectinload(Incident.service_instance),
+            selectinload(Incident.service_instances),
+            selectinload(Incident.updates)
+        ).where(
+            Incident.copro_id == copro.id
+        ).order_by(desc(Incident.created_at)).limit(20)
+    )
+    incidents = result.scalars().all()
     
     # Get active maintenances (maintenances dont la date actuelle est entre start_date et end_date)
     now = datetime.utcnow()
-    active_maintenances = db.query(Maintenance).filter(
-        Maintenance.copro_id == copro.id,
-        Maintenance.start_date <= now,
-        Maintenance.end_date >= now
-    ).all()
+    result = await db.execute(
+        select(Maintenance).options(
+            selectinload(Maintenance.service_instances)
+        ).where(
+            Maintenance.copro_id == copro.id,
+            Maintenance.start_date <= now,
+            Maintenance.end_date >= now
+        )
+    )
+    active_maintenances = result.scalars().all()
+    
+    # Prochaine maintenance à venir : la page change d'elle-même à son début
+    result = await db.execute(
+        select(func.min(Maintenance.start_date)).where(
+            Maintenance.copro_id == copro.id,
+            Maintenance.start_date > now
+        )
+    )
+    next_start = result.scalar()
+    boundaries = [m.end_date for m in active_maintenances]
+    if next_start is not None:
+        boundaries.append(next_start)
     
     # Créer un set des IDs d'équipements en maintenance
     equipment_ids_in_maintenance = set()
     maintenances_data = []
     for maintenance in active_maintenances:
-        db.refresh(maintenance, ['service_instances'])
         service_instance_ids = [si.id for si in maintenance.service_instances]
         equipment_ids_in_maintenance.update(service_instance_ids)
         maintenances_data.append(MaintenanceTimelineResponse(
@@ -241,8 +318,6 @@ async def get_status_page(db: Session = Depends(get_db)):
     # Convertir ServiceInstance en ServiceResponse
     services_data = []
     for si in service_instances:
-        db.refresh(si, ['building'])
-        
         # Nettoyer le nom pour enlever l'identifier entre parenthèses (ex: "Ascenseur 1 (ASC-A-01)" -> "Ascenseur 1")
         display_name = si.name
         if '(' in si.name and ')' in si.name:
@@ -264,12 +339,12 @@ async def get_status_page(db: Session = Depends(get_db)):
             building_name=si.building.name if si.building else None
         ))
     
-    return {
-        "services": services_data,
-        "incidents": [IncidentResponse.from_incident(i) for i in incidents],
-        "maintenances": maintenances_data,
-        "overall_status": overall_status,
-        "copro": CoproInfo(
+    page = StatusPageResponse(
+        services=services_data,
+        incidents=[IncidentResponse.from_incident(i) for i in incidents],
+        maintenances=maintenances_data,
+        overall_status=overall_status,
+        copro=CoproInfo(
             id=copro.id,
             name=copro.name,
             address=copro.address,
@@ -277,11 +352,22 @@ async def get_status_page(db: Session = Depends(get_db)):
             postal_code=copro.postal_code,
             country=copro.country
         ) if copro else None
-    }
+    )
+    next_change = min(boundaries, key=_as_utc) if boundaries else None
+    return page.model_dump(mode="json"), next_change
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Comparer des dates naïves (SQLite) et timezone-aware (PostgreSQL)"""
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
 
 
 @router.get("/incidents/{incident_id}", response_model=IncidentResponse)
-async def get_incident(incident_id: int, db: Session = Depends(get_db)):
+async def get_incident(
+    incident_id: int,
+    db: Session = Depends(get_db),
+    copro: Optional[Copro] = Depends(get_current_copro)
+):
     """Get a specific incident with all updates"""
     incident = db.query(Incident).filter(Incident.id == incident_id).first()
     if not incident:
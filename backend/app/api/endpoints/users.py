@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db import get_db
 from app.models.user import User
-from app.auth import get_current_user
+from app.auth import get_current_principal
+from app.services.principal_cache import Principal
 from app.api.endpoints.auth import UserResponse
 
 router = APIRouter()
@@ -14,7 +15,7 @@ async def read_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get list of users (requires authentication)"""
     users = db.query(User).offset(skip).limit(limit).all()
@@ -25,7 +26,7 @@ async def read_users(
 async def read_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get a specific user by ID"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -1,13 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.password_pool import password_pool
 from app.db import get_db
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -30,6 +32,16 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password exécuté dans le pool bcrypt (endpoints async)"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash exécuté dans le pool bcrypt (endpoints async)"""
+    return await password_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -42,16 +54,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def _decode_token(token: str, credentials_exception: HTTPException) -> Tuple[int, int]:
+    """Extraire (id utilisateur, version de jeton) d'un JWT"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_str: str = payload.get("sub")
@@ -59,15 +63,66 @@ async def get_current_user(
             raise credentials_exception
         # Convertir le string en int pour la requête DB
         user_id: int = int(user_id_str)
+        # Jetons émis avant l'ajout de la version : version 0
+        token_version: int = int(payload.get("ver", 0))
     except (JWTError, ValueError, TypeError) as e:
         import logging
         logging.error(f"JWT Error: {str(e)}, token: {token[:50] if token else 'None'}...")
         raise credentials_exception
+    return user_id, token_version
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _check_principal(principal: Principal, token_version: int, credentials_exception: HTTPException) -> None:
+    """Refuser les comptes désactivés et les jetons révoqués"""
+    if not principal.is_active or principal.token_version != token_version:
+        raise credentials_exception
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get current authenticated user, from the principal cache when possible"""
+    credentials_exception = _credentials_exception()
+    user_id, token_version = _decode_token(token, credentials_exception)
     
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation(user_id)
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            import logging
+            logging.error(f"User not found for id: {user_id}")
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(principal, generation)
+    _check_principal(principal, token_version, credentials_exception)
+    return principal
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user (ORM object, for endpoints that need the full profile)"""
+    credentials_exception = _credentials_exception()
+    user_id, token_version = _decode_token(token, credentials_exception)
+    
+    generation = principal_cache.generation(user_id)
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         import logging
         logging.error(f"User not found for id: {user_id}")
         raise credentials_exception
+    principal = Principal.from_user(user)
+    principal_cache.set(principal, generation)
+    _check_principal(principal, token_version, credentials_exception)
     return user
-
@@ -0,0 +1,138 @@
+"""
+Initialisation de la base au démarrage de l'application (lifespan)
+- Importer app.main ne touche plus à la base : plus de DDL ni de données de test à chaque
+  import (scripts, chaque worker uvicorn, chaque rechargement --reload)
+- Étape unique par déploiement : l'empreinte du schéma déclaré (tables, colonnes, index,
+  INIT_TEST_DATA) est comparée à celle enregistrée dans la table app_bootstrap ; si elle
+  est identique, le worker démarre directement (une seule requête)
+- Sinon : migrations Alembic (alembic upgrade head) puis données de test si INIT_TEST_DATA,
+  sous verrou consultatif PostgreSQL : les workers qui démarrent ensemble attendent le
+  premier au lieu de lancer la même DDL en parallèle
+- Base créée avant Alembic (tables présentes, pas de table alembic_version) : marquée à la
+  révision 0001 (le schéma de ces bases) puis migrée comme les autres
+- DB_BOOTSTRAP_ON_STARTUP=false quand le déploiement s'en charge lui-même :
+  python -m app.scripts.bootstrap_db
+"""
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db import Base, engine
+# Importer les modèles pour que Base.metadata soit complet
+import app.models  # noqa: F401
+
+# Clé du verrou consultatif PostgreSQL (arbitraire, propre à cette application)
+BOOTSTRAP_LOCK_ID = 7_310_412_019
+ALEMBIC_INI = Path(__file__).resolve().parent.parent.parent / "alembic.ini"
+
+# Hors de Base.metadata : ne fait pas partie de l'empreinte
+bootstrap_table = Table(
+    "app_bootstrap",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("bootstrapped_at", DateTime, nullable=False),
+)
+
+
+def alembic_config():
+    """Configuration Alembic de l'application (sans reconfigurer les logs)"""
+    from alembic.config import Config
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def alembic_head() -> str:
+    """Dernière révision Alembic disponible"""
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def schema_fingerprint() -> str:
+    """Empreinte du schéma déclaré par les modèles, de la dernière migration et de
+    l'option de données de test"""
+    parts = [f"init_test_data={settings.INIT_TEST_DATA}", f"alembic_head={alembic_head()}"]
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(f"  {column.name} {column.type!r} nullable={column.nullable}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"  index {index.name} {[c.name for c in index.columns]} unique={index.unique}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def stored_fingerprint():
+    """Empreinte enregistrée par la dernière initialisation (None si jamais initialisée)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(bootstrap_table.c.fingerprint).where(bootstrap_table.c.id == 1)).scalar()
+    except SQLAlchemyError:
+        return None  # Table app_bootstrap absente
+
+
+@contextmanager
+def _bootstrap_lock():
+    """Un seul processus à la fois initialise la base (PostgreSQL ; ailleurs : pas de verrou)"""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+
+
+def _migrate() -> None:
+    from alembic import command
+    with engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+    config = alembic_config()
+    if tables & set(Base.metadata.tables) and "alembic_version" not in tables:
+        print("🔄 Base créée avant Alembic : marquée à la révision 0001")
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+
+def _seed_test_data() -> None:
+    try:
+        from app.scripts.init_test_data import init_test_data
+        print("🔄 Initialisation des données de test...")
+        init_test_data()
+        print("✅ Données de test initialisées")
+    except Exception as e:
+        print(f"⚠️  Erreur lors de l'initialisation des données de test: {e}")
+
+
+def bootstrap_database(force: bool = False) -> bool:
+    """Migrer la base (et créer les données de test) si le schéma a changé depuis la dernière fois
+
+    Retourne True si l'initialisation a été exécutée, False pour le chemin rapide.
+    """
+    fingerprint = schema_fingerprint()
+    if not force and stored_fingerprint() == fingerprint:
+        return False
+    with _bootstrap_lock():
+        # Un autre worker a pu terminer l'initialisation pendant l'attente du verrou
+        if not force and stored_fingerprint() == fingerprint:
+            return False
+        print("🔄 Initialisation de la base de données...")
+        _migrate()
+        bootstrap_table.create(bind=engine, checkfirst=True)
+        if settings.INIT_TEST_DATA:
+            _seed_test_data()
+        with engine.begin() as conn:
+            conn.execute(bootstrap_table.delete())
+            conn.execute(bootstrap_table.insert().values(
+                id=1, fingerprint=fingerprint, bootstrapped_at=datetime.utcnow()
+            ))
+        print("✅ Base de données initialisée")
+    return True
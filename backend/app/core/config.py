@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Optional, Union
 import json
 
 
@@ -11,11 +11,77 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "postgresql://copro:copro_password@db:5432/copro_app"
+    # URL du moteur asynchrone (dérivée de DATABASE_URL si non renseignée)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Création des tables au démarrage, une fois par changement de schéma (voir app/core/bootstrap.py)
+    DB_BOOTSTRAP_ON_STARTUP: bool = True
+    INIT_TEST_DATA: bool = False  # Données de test créées lors de cette initialisation
+    # Instrumentation SQL par requête (en-tête Server-Timing, voir app/core/query_stats.py)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_SLOW_QUERY_MS: int = 200  # Instructions journalisées au-delà de cette durée (0 : jamais)
+    # Métriques Prometheus sur /metrics (voir app/services/metrics.py)
+    METRICS_ENABLED: bool = True
+    # Si renseigné : en-tête "Authorization: Bearer <token>" exigé, métriques par copropriété exposées
+    METRICS_TOKEN: Optional[str] = None
+    METRICS_BUSINESS_TTL_SECONDS: int = 30  # Incidents ouverts / tickets non résolus recalculés au plus toutes les N s
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 heures pour faciliter le développement
+    # Utilisateurs authentifiés gardés en mémoire (invalidés par les écritures admin, bornés entre workers)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+    # Hachage bcrypt hors de la boucle d'événements : calculs simultanés, attente max (sinon 503)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" (bcrypt relâche le GIL) ou "process"
+    # Tentatives de connexion max par fenêtre glissante, par IP et par email (au-delà : 429)
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 300
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Clés suivies en mémoire par worker
+    # Proxys de confiance (load balancer) : IP ou réseaux CIDR, liste JSON ou séparée par des virgules.
+    # Pour une connexion venant de l'un d'eux, l'IP du client est lue dans X-Forwarded-For
+    TRUSTED_PROXIES: Union[List[str], str] = []
+    # Déclarations publiques de tickets max par fenêtre glissante, par IP et par email
+    TICKET_RATE_LIMIT_PER_IP: int = 10
+    TICKET_RATE_LIMIT_PER_EMAIL: int = 5
+    TICKET_RATE_LIMIT_WINDOW_SECONDS: int = 3600
+    # Doublons : ticket ouvert sur le même équipement, titre proche, créé depuis moins de N secondes
+    TICKET_DEDUP_WINDOW_SECONDS: int = 7200
+    TICKET_DEDUP_MIN_SIMILARITY: float = 0.6  # Similarité des titres (0 à 1)
+    # Enregistrement des tickets publics : "direct" (dans la requête) ou "queued" (202 puis insertion par lots)
+    TICKET_INTAKE_MODE: str = "direct"
+    TICKET_INTAKE_BATCH_SIZE: int = 100
+    TICKET_INTAKE_FLUSH_MS: int = 50  # Attente max avant l'écriture d'un lot incomplet
+    TICKET_INTAKE_MAX_PENDING: int = 10000  # Tickets acceptés non encore écrits (au-delà : 503)
+    TICKET_INTAKE_SPOOL_DIR: str = "data/ticket-intake"  # Journaux des tickets acceptés (un par processus)
+    # Photos jointes aux tickets publics (stockage adressé par contenu)
+    ATTACHMENT_STORE_DIR: str = "data/attachments"
+    ATTACHMENT_MAX_BYTES: int = 10 * 1024 * 1024  # Taille max d'un fichier
+    ATTACHMENT_MAX_FILES: int = 5  # Fichiers max par envoi et par ticket
+    ATTACHMENT_THUMBNAIL_SIZE: int = 320  # Côté max des miniatures (px)
+    ATTACHMENT_THUMBNAIL_WORKERS: int = 2
+    ATTACHMENT_CACHE_MAX_AGE_SECONDS: int = 31536000  # Contenu immuable : cache navigateur d'un an
+    # Envois de photos max par IP par fenêtre glissante (pas de limite par email : envoi anonyme)
+    ATTACHMENT_RATE_LIMIT_PER_IP: int = 30
+    ATTACHMENT_RATE_LIMIT_WINDOW_SECONDS: int = 3600
+    
+    # Page de statut : durée de vie max du snapshot en cache (borne la fraîcheur entre workers)
+    STATUS_SNAPSHOT_MAX_AGE_SECONDS: int = 60
+    # Flux SSE de la page de statut
+    STATUS_STREAM_QUEUE_SIZE: int = 16  # Messages en attente max par connexion avant déconnexion
+    STATUS_STREAM_HEARTBEAT_SECONDS: int = 15
+    # Statistiques publiques : l'année en cours expire vite, les années closes expirent aussi (délai plus long)
+    STATISTICS_CACHE_CURRENT_YEAR_TTL_SECONDS: int = 60
+    STATISTICS_CACHE_CLOSED_YEAR_TTL_SECONDS: int = 3600  # Corrections faites par un autre worker visibles après ce délai
+    STATISTICS_CACHE_MAX_ENTRIES: int = 256
+    # Multi-copropriétés : {slug}.TENANT_BASE_DOMAIN (ex: "copro.example.com") ou préfixe /c/{slug}
+    TENANT_BASE_DOMAIN: Optional[str] = None
+    # Copropriétés résolues gardées en mémoire (invalidées par les écritures admin, bornées entre workers)
+    TENANT_CACHE_TTL_SECONDS: int = 300
+    TENANT_CACHE_MAX_ENTRIES: int = 1024
     
     # CORS - can be a JSON string or list
     BACKEND_CORS_ORIGINS: Union[List[str], str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -31,6 +97,28 @@ class Settings(BaseSettings):
                 return [origin.strip() for origin in self.BACKEND_CORS_ORIGINS.split(",")]
         return self.BACKEND_CORS_ORIGINS
     
+    @property
+    def trusted_proxies(self) -> List[str]:
+        """Parse trusted proxies from string or return list"""
+        if isinstance(self.TRUSTED_PROXIES, str):
+            try:
+                return json.loads(self.TRUSTED_PROXIES)
+            except json.JSONDecodeError:
+                return [proxy.strip() for proxy in self.TRUSTED_PROXIES.split(",") if proxy.strip()]
+        return self.TRUSTED_PROXIES
+    
+    @property
+    def async_database_url(self) -> str:
+        """URL for the async engine (asyncpg / aiosqlite drivers)"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        scheme, _, rest = self.DATABASE_URL.partition("://")
+        if scheme in ("postgresql", "postgresql+psycopg2", "postgres"):
+            return f"postgresql+asyncpg://{rest}"
+        if scheme == "sqlite":
+            return f"sqlite+aiosqlite://{rest}"
+        return self.DATABASE_URL
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,181 @@
+"""
+Métriques au format Prometheus (exposées sur /metrics, voir app/services/metrics.py)
+- MetricsMiddleware : nombre de requêtes par route (modèle de chemin, ex:
+  /api/v1/admin/tickets/{ticket_id}) et classe de statut, histogramme des latences,
+  requêtes en cours. Coût par requête : une recherche dans un dict et quelques additions,
+  sans verrou (le middleware ne s'exécute que dans la boucle d'événements) ni dict de labels
+  (une série par route, créée à son premier appel ; labels mis en forme à l'export)
+- InstrumentedQueuePool : pool du moteur synchrone qui mesure l'attente d'une connexion
+  (pool saturé, ouverture d'une nouvelle connexion)
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.pool import QueuePool
+
+# Bornes des histogrammes (secondes)
+HTTP_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Autres méthodes regroupées sous "OTHER" (nombre de séries borné)
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+# Requêtes sans route (404, scans...) : une seule série par méthode
+UNMATCHED_ROUTE = "unmatched"
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Sequence[Tuple[str, object]]) -> str:
+    """{name="value",...} avec l'échappement du format texte Prometheus"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    """Histogramme à bornes fixes ; observe() sans verrou (à protéger si appelé de plusieurs threads)"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Dernière case : au-delà de la plus grande borne
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: Sequence[Tuple[str, object]] = ()) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{format_labels([*labels, ('le', bound)])} {cumulative}")
+        cumulative += self.counts[-1]
+        lines.append(f"{name}_bucket{format_labels([*labels, ('le', '+Inf')])} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class RouteSeries:
+    """Compteurs d'une route (méthode + modèle de chemin)"""
+
+    __slots__ = ("method", "route", "statuses", "duration")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.statuses = [0] * len(STATUS_CLASSES)
+        self.duration = Histogram(HTTP_DURATION_BUCKETS)
+
+
+class HttpMetrics:
+    """Séries HTTP du processus, indexées par (méthode, fonction de l'endpoint)"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.series: Dict[Tuple[str, object], RouteSeries] = {}
+        self._templates: Optional[Dict[object, str]] = None
+
+    def _route_template(self, scope, endpoint) -> str:
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None or endpoint not in self._templates:
+            # Construit une fois (les routes sont fixées au démarrage)
+            routes = getattr(scope.get("app"), "routes", ())
+            self._templates = {route.endpoint: route.path for route in routes if hasattr(route, "endpoint")}
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    def observe(self, scope, status_code: int, seconds: float) -> None:
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+        endpoint = scope.get("endpoint")
+        series = self.series.get((method, endpoint))
+        if series is None:
+            series = self.series[(method, endpoint)] = RouteSeries(method, self._route_template(scope, endpoint))
+        series.statuses[min(max(status_code // 100, 1), 5) - 1] += 1
+        series.duration.observe(seconds)
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP copro_http_requests_total Requêtes HTTP traitées",
+            "# TYPE copro_http_requests_total counter",
+        ]
+        series_list = sorted(self.series.values(), key=lambda s: (s.route, s.method))
+        for series in series_list:
+            for status_class, count in zip(STATUS_CLASSES, series.statuses):
+                if count:
+                    labels = [("method", series.method), ("route", series.route), ("status", status_class)]
+                    lines.append(f"copro_http_requests_total{format_labels(labels)} {count}")
+        lines += [
+            "# HELP copro_http_request_duration_seconds Durée des requêtes HTTP",
+            "# TYPE copro_http_request_duration_seconds histogram",
+        ]
+        for series in series_list:
+            lines += series.duration.render(
+                "copro_http_request_duration_seconds", [("method", series.method), ("route", series.route)]
+            )
+        lines += [
+            "# HELP copro_http_requests_in_flight Requêtes HTTP en cours (flux SSE compris)",
+            "# TYPE copro_http_requests_in_flight gauge",
+            f"copro_http_requests_in_flight {self.in_flight}",
+        ]
+        return lines
+
+
+http_metrics = HttpMetrics()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : compte et chronomètre chaque requête HTTP
+
+    À placer près du routeur (avant TenantRoutingMiddleware) : il voit alors l'endpoint
+    choisi par le routage, qui donne le modèle de chemin de la route.
+    """
+
+    def __init__(self, app, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500  # Exception avant l'envoi de la réponse
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe(scope, status_code, time.perf_counter() - start)
+
+
+# Attente d'une connexion du pool synchrone (appelé depuis les threads des endpoints)
+pool_checkout_wait = Histogram(POOL_WAIT_BUCKETS)
+_pool_checkout_lock = threading.Lock()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'obtention de chaque connexion"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            with _pool_checkout_lock:
+                pool_checkout_wait.observe(elapsed)
@@ -0,0 +1,120 @@
+"""
+Opérations de migration en ligne (à utiliser dans les révisions Alembic)
+- Sur une base en production, une migration ne doit pas bloquer la table tickets : pas de
+  réécriture de table ni de verrou exclusif tenu pendant une mise à jour de toutes les lignes
+- add_enum_value : ALTER TYPE ... ADD VALUE (catalogue seulement, aucune ligne réécrite)
+  au lieu de renommer/recréer le type et convertir la colonne
+- batched_backfill : mise à jour par tranches d'id, une transaction courte par tranche,
+  avec progression ; relançable (la condition exclut les lignes déjà traitées)
+- create_index_concurrently / drop_index_concurrently : CREATE/DROP INDEX CONCURRENTLY
+- Hors PostgreSQL (SQLite en local), les opérations équivalentes simples sont exécutées
+
+Usage dans une révision :
+    from app.core.migrations import add_enum_value, batched_backfill
+    add_enum_value("ticketstatus", "ON_HOLD")
+    batched_backfill("tickets", "status = 'ON_HOLD'", "status::text = 'WAITING'")
+"""
+from typing import List, Optional
+
+from alembic import op
+from sqlalchemy import inspect, text
+
+# Lignes mises à jour par transaction dans batched_backfill
+DEFAULT_BATCH_SIZE = 5000
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(op.get_bind()).get_columns(table)}
+
+
+def enum_values(enum_name: str) -> List[str]:
+    """Valeurs d'un type ENUM PostgreSQL (liste vide si le type n'existe pas)"""
+    if not is_postgresql():
+        return []
+    return list(op.get_bind().execute(text(
+        "SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid "
+        "WHERE t.typname = :name ORDER BY e.enumsortorder"
+    ), {"name": enum_name}).scalars())
+
+
+def add_enum_value(enum_name: str, value: str) -> None:
+    """Ajouter une valeur à un type ENUM sans réécrire les tables qui l'utilisent
+
+    ADD VALUE ne peut pas être utilisée dans la transaction qui l'ajoute : elle est exécutée
+    hors transaction (autocommit), la suite de la révision peut donc s'en servir.
+    """
+    if not is_postgresql():
+        return  # SQLite : les ENUM sont de simples VARCHAR
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{value}'")
+
+
+def batched_backfill(
+    table: str,
+    set_sql: str,
+    where_sql: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """UPDATE table SET set_sql WHERE where_sql, par tranches de batch_size ids
+
+    Chaque tranche est validée séparément : les verrous de ligne sont relâchés au fur et
+    à mesure et une interruption ne perd que la tranche en cours. Retourne le nombre de
+    lignes mises à jour.
+    """
+    bounds = op.get_bind().execute(text(f"SELECT MIN(id), MAX(id) FROM {table} WHERE {where_sql}")).first()
+    if bounds is None or bounds[0] is None:
+        return 0
+    first_id, last_id = bounds
+    updated = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for start in range(first_id, last_id + 1, batch_size):
+            result = bind.execute(text(
+                f"UPDATE {table} SET {set_sql} WHERE id >= :start AND id < :end AND ({where_sql})"
+            ), {"start": start, "end": start + batch_size})
+            updated += result.rowcount
+            done = min(start + batch_size - 1, last_id) - first_id + 1
+            print(f"🔄 {table} : ids {done}/{last_id - first_id + 1} parcourus, {updated} ligne(s) mises à jour")
+    return updated
+
+
+def create_index_concurrently(
+    index_name: str,
+    table: str,
+    columns: List[str],
+    unique: bool = False,
+    where: Optional[str] = None,
+) -> None:
+    """Créer un index sans bloquer les écritures (CONCURRENTLY sur PostgreSQL)
+
+    `where` : condition SQL d'un index partiel (ex: "resolved_at IS NULL").
+    """
+    predicate = {"postgresql_where": text(where), "sqlite_where": text(where)} if where else {}
+    if not is_postgresql():
+        op.create_index(index_name, table, columns, unique=unique, if_not_exists=True, **predicate)
+        return
+    with op.get_context().autocommit_block():
+        # Un CREATE INDEX CONCURRENTLY interrompu laisse un index invalide : le recréer
+        invalid = op.get_bind().execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": index_name}).first()
+        if invalid:
+            op.drop_index(index_name, table_name=table, postgresql_concurrently=True)
+        op.create_index(
+            index_name, table, columns, unique=unique, if_not_exists=True,
+            postgresql_concurrently=True, **predicate
+        )
+
+
+def drop_index_concurrently(index_name: str, table: str) -> None:
+    """Supprimer un index sans bloquer les écritures (CONCURRENTLY sur PostgreSQL)"""
+    if not is_postgresql():
+        op.drop_index(index_name, table_name=table, if_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""
+Pagination par curseur (keyset) sur (created_at, id), du plus récent au plus ancien
+- Le curseur est opaque pour le client : (created_at, id) de la dernière ligne renvoyée
+- Chaque page est une lecture d'index (copro_id, created_at, id), quelle que soit sa profondeur
+- Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor (absent en fin de liste)
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décoder un curseur (400 si invalide)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def paginate_by_created_at(query: Query, model, cursor: Optional[str], limit: int, response: Response) -> List:
+    """Appliquer l'ordre (created_at desc, id desc), le curseur et la limite à une requête
+
+    Lit une ligne de plus que la limite pour savoir s'il existe une page suivante.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
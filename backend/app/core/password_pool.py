@@ -0,0 +1,126 @@
+"""
+Pool borné pour le hachage / la vérification des mots de passe (bcrypt)
+- bcrypt coûte volontairement ~100-300 ms de CPU : exécuté directement dans un
+  `async def`, il bloque toutes les autres requêtes du worker (page de statut comprise)
+- Les appels partent dans un pool de threads (bcrypt relâche le GIL) ou, en option,
+  de processus (PASSWORD_HASH_EXECUTOR=process)
+- Au plus PASSWORD_HASH_WORKERS calculs simultanés, PASSWORD_HASH_MAX_QUEUE en attente :
+  au-delà, 503 avec Retry-After plutôt qu'une file qui grossit sans fin
+- stats() : en cours, en attente, terminés, refusés, temps d'attente (pour le monitoring)
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+class PasswordHashPool:
+    """Exécuteur borné pour les opérations bcrypt"""
+
+    def __init__(self, max_workers: int, max_queue: int, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _admit(self) -> None:
+        """Réserver une place (calcul ou file d'attente), 503 si le pool est saturé"""
+        with self._lock:
+            if self.running + self.waiting >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Service d'authentification surchargé, réessayez dans quelques instants",
+                    headers={"Retry-After": "1"},
+                )
+            self.waiting += 1
+
+    def _started(self, queued_at: float) -> None:
+        waited = time.monotonic() - queued_at
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def _finished(self) -> None:
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Exécuter func(*args) dans le pool sans bloquer la boucle d'événements
+
+        Avec un pool de processus, func doit être une fonction de module (picklable).
+        """
+        self._admit()
+        queued_at = time.monotonic()
+        started = False
+        try:
+            if self.use_processes:
+                # Le début du calcul n'est pas observable dans un autre processus :
+                # la tâche compte comme en cours dès sa soumission
+                self._started(queued_at)
+                started = True
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+            def call():
+                nonlocal started
+                self._started(queued_at)
+                started = True
+                return func(*args)
+
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        finally:
+            if started:
+                self._finished()
+            else:
+                with self._lock:
+                    self.waiting -= 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    use_processes=settings.PASSWORD_HASH_EXECUTOR == "process",
+)
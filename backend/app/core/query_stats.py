@@ -0,0 +1,131 @@
+"""
+Instrumentation SQL par requête HTTP
+- Hooks SQLAlchemy (moteurs synchrone et asynchrone) : chaque instruction exécutée est comptée
+  et sa durée ajoutée aux statistiques de la requête HTTP en cours (ContextVar : suit la
+  requête dans le threadpool des endpoints synchrones comme dans les greenlets du moteur asynchrone)
+- QueryStatsMiddleware ajoute à chaque réponse l'en-tête
+  `Server-Timing: db;dur=12.3;desc="4 SQL"` (visible dans les outils de développement du navigateur)
+- Les instructions plus lentes que SQL_SLOW_QUERY_MS sont journalisées avec l'endpoint et la
+  forme des paramètres (noms et types, jamais les valeurs : emails, noms des résidents...)
+- SQL_INSTRUMENTATION=false désactive le tout
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longueur max d'une instruction dans le journal des requêtes lentes
+SLOW_QUERY_LOG_MAX_CHARS = 1000
+_START_ATTRIBUTE = "_query_stats_start"
+
+
+class RequestQueryStats:
+    """Instructions SQL exécutées pendant une requête HTTP et temps passé en base"""
+
+    __slots__ = ("scope", "statements", "seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.seconds = 0.0
+
+    @property
+    def endpoint(self) -> str:
+        """Méthode et endpoint FastAPI (ex: "GET admin.get_tickets"), à défaut le chemin"""
+        endpoint = self.scope.get("endpoint")
+        if endpoint is not None:
+            name = f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+        else:
+            name = self.scope.get("path", "?")
+        return f"{self.scope.get('method', '')} {name}".strip()
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.statements} SQL"'
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Statistiques de la requête HTTP en cours (None hors requête)"""
+    return _current_stats.get()
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """Forme des paramètres d'une instruction : noms et types, sans les valeurs"""
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x {parameters_shape(rows[0])}" if rows else "0 x ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return "()"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _START_ATTRIBUTE, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, _START_ATTRIBUTE, None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+    if settings.SQL_SLOW_QUERY_MS and elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(
+            "Requête SQL lente (%.1f ms) [%s] %s ; paramètres : %s",
+            elapsed * 1000,
+            stats.endpoint if stats is not None else "hors requête HTTP",
+            " ".join(statement.split())[:SLOW_QUERY_LOG_MAX_CHARS],
+            parameters_shape(parameters, executemany),
+        )
+
+
+def instrument_engine(target) -> None:
+    """Brancher les hooks sur un moteur synchrone (pour un moteur asynchrone : .sync_engine)"""
+    if not settings.SQL_INSTRUMENTATION:
+        return
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Middleware ASGI : statistiques SQL de chaque requête HTTP, en-tête Server-Timing
+
+    À placer au plus près du routeur (ajouté en premier) : il voit alors le scope complété
+    par le routage (endpoint) pour le journal des requêtes lentes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_INSTRUMENTATION:
+            await self.app(scope, receive, send)
+            return
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
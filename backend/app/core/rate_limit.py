@@ -0,0 +1,204 @@
+"""
+Limitation de débit par fenêtre glissante
+- Chaque clé (ex: "login:ip:1.2.3.4") garde les instants de ses dernières tentatives ;
+  au-delà de `limit` tentatives sur `window_seconds`, la requête est refusée (429 + Retry-After)
+- Le stockage est interchangeable (RateLimitBackend) : en mémoire par défaut, donc par
+  worker ; un backend partagé (Redis...) n'a qu'à implémenter hit() et reset()
+- Connexion : vérifiée par IP et par email AVANT toute requête SQL ou calcul bcrypt, pour
+  qu'un attaquant ne puisse pas monopoliser le CPU au détriment des utilisateurs légitimes
+- Tickets publics et envoi de photos (sans authentification) : même principe avant toute écriture
+- IP du client : celle de la connexion, ou celle de X-Forwarded-For quand la connexion vient
+  d'un proxy de confiance (TRUSTED_PROXIES). Sans cela, derrière un load balancer, tous les
+  clients partageraient la même clé
+
+Usage :
+    login_rate_limiter.check(client_ip(request), email)   # lève 429 si l'une des limites est atteinte
+    login_rate_limiter.reset_email(email)                  # après une connexion réussie
+    ticket_rate_limiter.refund_ip(ip)                      # déclaration regroupée avec un ticket existant
+Vérification : python -m app.scripts.check_rate_limit
+"""
+import ipaddress
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Iterable, Optional, Sequence
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+def parse_networks(values: Iterable[str]) -> tuple:
+    """Réseaux des proxys de confiance ("10.0.0.5", "10.0.0.0/8", "fd00::/8"...)"""
+    return tuple(ipaddress.ip_network(value.strip(), strict=False) for value in values)
+
+
+def _is_trusted(address: str, networks: Sequence) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+_TRUSTED_PROXIES = parse_networks(settings.trusted_proxies)
+
+
+def client_ip(request: Request, trusted_proxies: Optional[Sequence] = None) -> Optional[str]:
+    """IP du client pour les limites de débit
+
+    Si la connexion vient d'un proxy de confiance, le client est la dernière adresse de
+    X-Forwarded-For qui n'est pas un proxy de confiance : chaque proxy ajoute à droite
+    l'adresse qu'il voit, les adresses plus à gauche sont fournies par le client.
+    Sinon X-Forwarded-For est ignoré (n'importe quel client peut l'envoyer).
+    """
+    networks = _TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    peer = request.client.host if request.client else None
+    if peer is None or not networks or not _is_trusted(peer, networks):
+        return peer
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, networks):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+class RateLimitBackend(ABC):
+    """Stockage des tentatives ; à sous-classer pour un stockage partagé entre workers"""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Enregistrer une tentative ; retourne 0 si elle est autorisée, sinon le délai
+        (secondes) avant qu'une nouvelle tentative le soit. Une tentative refusée n'est pas comptée."""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Oublier les tentatives d'une clé"""
+
+    @abstractmethod
+    def cancel(self, key: str) -> None:
+        """Retirer la dernière tentative acceptée d'une clé (tentative finalement non comptée)"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Fenêtres glissantes en mémoire du processus, nombre de clés borné (éviction LRU)"""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._hits: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        now = self.clock()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            self._hits.move_to_end(key)
+            while hits and hits[0] <= now - window_seconds:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window_seconds - now
+            hits.append(now)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def cancel(self, key: str) -> None:
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits:
+                hits.pop()
+
+
+class RateLimiter:
+    """Limites de tentatives par IP et par email pour une action (connexion, ticket public...)
+
+    email_limit=None : limite par IP seulement (action anonyme, ex: envoi de photos)
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        scope: str,
+        ip_limit: int,
+        email_limit: Optional[int],
+        window_seconds: float,
+        detail: str,
+    ):
+        self.backend = backend
+        self.scope = scope
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.window_seconds = window_seconds
+        self.detail = detail
+        self.rejected = 0
+
+    def _ip_key(self, client_ip: Optional[str]) -> str:
+        return f"{self.scope}:ip:{client_ip or 'unknown'}"
+
+    def _email_key(self, email: str) -> str:
+        return f"{self.scope}:email:{email.strip().lower()}"
+
+    def check(self, client_ip: Optional[str], email: Optional[str]) -> None:
+        """Compter une tentative, 429 si l'IP ou l'email a dépassé sa limite"""
+        retry_after = self.backend.hit(self._ip_key(client_ip), self.ip_limit, self.window_seconds)
+        if not retry_after and email and self.email_limit is not None:
+            retry_after = self.backend.hit(self._email_key(email), self.email_limit, self.window_seconds)
+        if retry_after:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=self.detail,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def reset_email(self, email: str) -> None:
+        """Remettre à zéro le compteur d'un email (ex: connexion réussie)"""
+        self.backend.reset(self._email_key(email))
+
+    def refund_ip(self, client_ip: Optional[str]) -> None:
+        """Ne pas compter la tentative acceptée de cette IP (ex: déclaration regroupée avec un
+        ticket existant) ; celle de l'email reste comptée"""
+        self.backend.cancel(self._ip_key(client_ip))
+
+
+rate_limit_backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+login_rate_limiter = RateLimiter(
+    backend=rate_limit_backend,
+    scope="login",
+    ip_limit=settings.LOGIN_RATE_LIMIT_PER_IP,
+    email_limit=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    detail="Trop de tentatives de connexion, réessayez plus tard",
+)
+
+ticket_rate_limiter = RateLimiter(
+    backend=rate_limit_backend,
+    scope="ticket",
+    ip_limit=settings.TICKET_RATE_LIMIT_PER_IP,
+    email_limit=settings.TICKET_RATE_LIMIT_PER_EMAIL,
+    window_seconds=settings.TICKET_RATE_LIMIT_WINDOW_SECONDS,
+    detail="Trop de déclarations envoyées, réessayez plus tard",
+)
+
+attachment_rate_limiter = RateLimiter(
+    backend=rate_limit_backend,
+    scope="attachment",
+    ip_limit=settings.ATTACHMENT_RATE_LIMIT_PER_IP,
+    email_limit=None,
+    window_seconds=settings.ATTACHMENT_RATE_LIMIT_WINDOW_SECONDS,
+    detail="Trop de fichiers envoyés, réessayez plus tard",
+)
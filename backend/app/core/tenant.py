@@ -0,0 +1,237 @@
+"""
+Résolution de la copropriété courante (tenant)
+- La copropriété est désignée par un sous-domaine ({slug}.TENANT_BASE_DOMAIN) ou par le
+  préfixe /c/{slug} (TenantRoutingMiddleware) ; sans slug, la première copropriété active
+  est utilisée (déploiement mono-copropriété)
+- Chaque copropriété est lue une fois puis gardée en mémoire : plus de
+  `db.query(Copro).filter(Copro.is_active == True).first()` à chaque requête
+- Invalidée par les écritures admin sur les copropriétés (création, mise à jour)
+- Durée de vie bornée (TENANT_CACHE_TTL_SECONDS) pour les modifications faites hors
+  de ce processus (autre worker, script)
+- Les handlers reçoivent une copie détachée : colonnes lisibles, relations non chargées
+- Une fois la copropriété résolue, toutes les requêtes ORM de la session sur les modèles
+  multi-tenant sont filtrées sur son copro_id (voir _apply_tenant_filter)
+
+Usage :
+    copro: Copro = Depends(require_current_copro)                 # 404 si aucune copropriété
+    copro: Optional[Copro] = Depends(get_current_copro)           # None si aucune copropriété
+    copro: Optional[Copro] = Depends(get_current_copro_async)     # endpoints AsyncSession
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, make_transient_to_detached, with_loader_criteria
+
+from app.core.config import settings
+from app.db import get_db, get_async_db
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.maintenance import Maintenance
+from app.models.status import Incident
+from app.models.ticket import Ticket
+
+TENANT_PATH_PREFIX = "/c/"
+SLUG_PATTERN = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+
+# Modèles filtrés automatiquement sur la copropriété de la requête
+TENANT_SCOPED_MODELS = (Building, ServiceInstance, Incident, Ticket, Maintenance)
+
+
+def slugify(value: str) -> str:
+    """Slug d'URL à partir d'un nom (« Résidence du Parc » -> « residence-du-parc »)"""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "copro"
+
+
+def unique_copro_slug(db: Session, name: str, exclude_id: Optional[int] = None) -> str:
+    """Slug libre dérivé du nom (suffixe -2, -3... en cas de collision)"""
+    base = slugify(name)
+    query = db.query(Copro.slug).filter(Copro.slug.like(f"{base}%"))
+    if exclude_id is not None:
+        query = query.filter(Copro.id != exclude_id)
+    taken = {row[0] for row in query.all()}
+    slug, suffix = base, 2
+    while slug in taken:
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    return slug
+
+
+class TenantRoutingMiddleware:
+    """Middleware ASGI : extrait le slug de la copropriété de l'URL
+
+    - /c/{slug}/api/v1/... : le préfixe est retiré du chemin (ajouté à root_path)
+    - {slug}.{base_domain} : sous-domaine, si base_domain est configuré
+    Le slug est placé dans request.state.tenant_slug.
+    """
+
+    def __init__(self, app, base_domain: Optional[str] = None):
+        self.app = app
+        self.base_domain = base_domain.lower().lstrip(".") if base_domain else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            slug = None
+            path = scope["path"]
+            if path.startswith(TENANT_PATH_PREFIX):
+                slug, _, rest = path[len(TENANT_PATH_PREFIX):].partition("/")
+                prefix = TENANT_PATH_PREFIX + slug
+                scope = dict(scope)
+                scope["path"] = "/" + rest
+                scope["raw_path"] = scope["path"].encode("utf-8")
+                scope["root_path"] = scope.get("root_path", "") + prefix
+            elif self.base_domain:
+                slug = self._slug_from_host(scope)
+            if slug:
+                scope["state"] = {**scope.get("state", {}), "tenant_slug": slug.lower()}
+        await self.app(scope, receive, send)
+
+    def _slug_from_host(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"host":
+                host = value.decode("latin-1").split(":", 1)[0].lower()
+                suffix = "." + self.base_domain
+                if host.endswith(suffix):
+                    subdomain = host[:-len(suffix)]
+                    if subdomain and "." not in subdomain and subdomain != "www":
+                        return subdomain
+                return None
+        return None
+
+
+def _detached_copy(copro: Optional[Copro]) -> Optional[Copro]:
+    """Copie indépendante de toute session, partageable entre requêtes"""
+    if copro is None:
+        return None
+    copy = Copro(**{attr.key: getattr(copro, attr.key) for attr in Copro.__mapper__.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _copro_query(slug: Optional[str]):
+    query = select(Copro).where(Copro.is_active == True)
+    if slug is not None:
+        return query.where(Copro.slug == slug)
+    return query.order_by(Copro.id).limit(1)
+
+
+class TenantCache:
+    """Copropriétés actives résolues une fois par processus, par slug (None = copropriété par défaut)"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Optional[str], Tuple[Optional[Copro], float]]" = OrderedDict()
+        # Incrémentée à chaque invalidation : une lecture commencée avant n'est pas mise en cache
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, slug: Optional[str]) -> Tuple[bool, Optional[Copro], int]:
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(slug)
+                self.hits += 1
+                return True, entry[0], self._generation
+            self.misses += 1
+            return False, None, self._generation
+
+    def _store(self, slug: Optional[str], copro: Optional[Copro], generation: int) -> Optional[Copro]:
+        copy = _detached_copy(copro)
+        # Un slug inconnu n'est pas mémorisé (sinon n'importe quelle URL remplirait le cache)
+        if copy is None and slug is not None:
+            return None
+        with self._lock:
+            if generation == self._generation:
+                self._entries[slug] = (copy, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(slug)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return copy
+
+    def resolve(self, db: Session, slug: Optional[str] = None) -> Optional[Copro]:
+        found, copro, generation = self._cached(slug)
+        if found:
+            return copro
+        return self._store(slug, db.execute(_copro_query(slug)).scalars().first(), generation)
+
+    async def resolve_async(self, db: AsyncSession, slug: Optional[str] = None) -> Optional[Copro]:
+        found, copro, generation = self._cached(slug)
+        if found:
+            return copro
+        result = await db.execute(_copro_query(slug))
+        return self._store(slug, result.scalars().first(), generation)
+
+    def invalidate(self) -> None:
+        """À appeler après le commit d'une création / modification de copropriété"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+tenant_cache = TenantCache(
+    ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS,
+    max_entries=settings.TENANT_CACHE_MAX_ENTRIES,
+)
+
+
+def tenant_slug(request: Request) -> Optional[str]:
+    """Slug de la copropriété demandée (None : copropriété par défaut)"""
+    return getattr(request.state, "tenant_slug", None)
+
+
+def _bind(session: Session, slug: Optional[str], copro: Optional[Copro]) -> Optional[Copro]:
+    if slug is not None and copro is None:
+        raise HTTPException(status_code=404, detail="Copropriété inconnue")
+    if copro is not None:
+        session.info["copro_id"] = copro.id
+    return copro
+
+
+def get_current_copro(request: Request, db: Session = Depends(get_db)) -> Optional[Copro]:
+    """Dependency : copropriété de la requête, ou None si aucune n'est configurée"""
+    slug = tenant_slug(request)
+    return _bind(db, slug, tenant_cache.resolve(db, slug))
+
+
+async def get_current_copro_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> Optional[Copro]:
+    """Dependency : copropriété de la requête (endpoints sur session asynchrone)"""
+    slug = tenant_slug(request)
+    copro = await tenant_cache.resolve_async(db, slug)
+    # Rendre la connexion au pool : la session peut rester ouverte longtemps (flux SSE)
+    if db.in_transaction():
+        await db.rollback()
+    return _bind(db.sync_session, slug, copro)
+
+
+def require_current_copro(copro: Optional[Copro] = Depends(get_current_copro)) -> Copro:
+    """Dependency : copropriété de la requête, 404 si aucune n'est configurée"""
+    if not copro:
+        raise HTTPException(status_code=404, detail="Aucune copropriété configurée")
+    return copro
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_tenant_filter(execute_state: ORMExecuteState) -> None:
+    """Restreindre les SELECT ORM d'une session liée à une copropriété à ses propres lignes
+    (y compris les relations chargées par la requête)"""
+    copro_id = execute_state.session.info.get("copro_id")
+    if (
+        copro_id is None
+        or not execute_state.is_select
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+    ):
+        return
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.copro_id == copro_id, include_aliases=True)
+        for model in TENANT_SCOPED_MODELS
+    ))
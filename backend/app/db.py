@@ -1,16 +1,38 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import InstrumentedQueuePool
+from app.core.query_stats import instrument_engine
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     echo=False,
+    poolclass=InstrumentedQueuePool,  # Attente d'une connexion exposée sur /metrics
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone pour les endpoints publics les plus sollicités (ne bloque pas la boucle d'événements)
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    echo=False,
+)
+
+# Nombre d'instructions et temps passé en base par requête HTTP, requêtes lentes
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -23,4 +45,8 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
 
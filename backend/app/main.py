@@ -1,32 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.db import engine, Base, SessionLocal
 from app.api import api_router
-# Import models to ensure tables are created
-from app.models import User, Service, Incident, IncidentUpdate, IncidentComment, Copro, Building, ServiceInstance, Ticket, TicketComment, Maintenance
-import os
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Initialize test data if requested
-if os.getenv("INIT_TEST_DATA", "false").lower() == "true":
-    try:
-        from app.scripts.init_test_data import init_test_data
-        print("🔄 Initialisation des données de test...")
-        init_test_data()
-        print("✅ Données de test initialisées")
-    except Exception as e:
-        print(f"⚠️  Erreur lors de l'initialisation des données de test: {e}")
+from app.core.bootstrap import bootstrap_database
+from app.core.metrics import MetricsMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.tenant import TenantRoutingMiddleware
+from app.core.password_pool import password_pool
+from app.services.ticket_intake import ticket_intake
+from app.services.attachments import attachment_store
+from app.services.metrics import render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt de chaque worker
+
+    L'import du module ne fait aucune requête : la base est initialisée ici, une fois par
+    changement de schéma (les workers suivants ne font qu'une lecture).
+    """
+    if settings.DB_BOOTSTRAP_ON_STARTUP:
+        await asyncio.to_thread(bootstrap_database)
+    # Enregistrement différé des tickets publics (rejoue les journaux des processus arrêtés)
+    await ticket_intake.start()
+    yield
+    # Vider la file des tickets, puis arrêter les pools (bcrypt, miniatures)
+    await ticket_intake.stop()
+    attachment_store.shutdown()
+    password_pool.shutdown()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+# Statistiques SQL de chaque requête (Server-Timing) : au plus près du routeur
+app.add_middleware(QueryStatsMiddleware)
+# Métriques Prometheus par route (/metrics) : voit lui aussi la route choisie par le routeur
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Copropriété de la requête : sous-domaine ou préfixe /c/{slug}
+app.add_middleware(TenantRoutingMiddleware, base_domain=settings.TENANT_BASE_DOMAIN)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Status-Revision", "X-Next-Cursor", "Server-Timing"],
 )
 
 # Include API router
@@ -49,3 +75,17 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Métriques du processus au format Prometheus"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Jeton de métriques invalide")
+    # Sans jeton, l'endpoint est public : pas d'activité par copropriété
+    return PlainTextResponse(
+        render_metrics(include_business=bool(settings.METRICS_TOKEN)), media_type="text/plain; version=0.0.4"
+    )
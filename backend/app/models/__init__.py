@@ -4,6 +4,7 @@ from app.models.copro import Copro, Building, ServiceInstance
 from app.models.ticket import Ticket, TicketStatus, TicketType
 from app.models.ticket_comment import TicketComment
 from app.models.maintenance import Maintenance
+from app.models.availability import EquipmentDailyAvailability
 
 __all__ = [
     "User", 
@@ -11,6 +12,7 @@ __all__ = [
     "Copro", "Building", "ServiceInstance",
     "Ticket", "TicketStatus", "TicketType",
     "TicketComment",
-    "Maintenance"
+    "Maintenance",
+    "EquipmentDailyAvailability"
 ]
 
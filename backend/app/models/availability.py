@@ -0,0 +1,24 @@
+"""
+Agrégat journalier de disponibilité des équipements
+Maintenu par app.services.availability à chaque écriture d'incident (admin)
+"""
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.db import Base
+
+
+class EquipmentDailyAvailability(Base):
+    """Indisponibilité d'un équipement sur une journée (UTC)
+
+    - downtime_seconds : union des intervalles des incidents résolus sur la journée
+      (les incidents non résolus sont calculés à la volée)
+    - incident_count / resolved_count / resolution_seconds : incidents créés ce jour-là
+    """
+    __tablename__ = "equipment_daily_availability"
+
+    service_instance_id = Column(Integer, ForeignKey("service_instances.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    copro_id = Column(Integer, ForeignKey("copros.id"), nullable=False, index=True)
+    downtime_seconds = Column(Float, default=0, nullable=False)
+    incident_count = Column(Integer, default=0, nullable=False)
+    resolved_count = Column(Integer, default=0, nullable=False)
+    resolution_seconds = Column(Float, default=0, nullable=False)  # Somme des temps de résolution
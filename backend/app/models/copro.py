@@ -13,6 +13,7 @@ class Copro(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)  # Nom de la copropriété
+    slug = Column(String, nullable=True, unique=True, index=True)  # Identifiant d'URL (sous-domaine ou /c/{slug})
     address = Column(Text, nullable=True)  # Adresse complète
     city = Column(String, nullable=True)
     postal_code = Column(String, nullable=True)
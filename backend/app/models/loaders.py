@@ -0,0 +1,61 @@
+"""
+Options de chargement des relations (eager loading) partagées par les endpoints
+Chaque liste charge ses relations en un nombre constant de requêtes, quel que soit le nombre
+de lignes, au lieu d'un db.refresh(obj, [...]) par ligne :
+- joinedload pour les relations many-to-one (une jointure dans la requête principale)
+- selectinload pour les collections (une requête IN (...) par relation)
+Usage : db.query(Ticket).options(*TICKET_LIST_OPTIONS)
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.copro import ServiceInstance
+from app.models.maintenance import Maintenance
+from app.models.status import Incident, IncidentComment
+from app.models.ticket import Ticket
+from app.models.ticket_comment import TicketComment
+
+# Équipements avec leur bâtiment
+SERVICE_INSTANCE_OPTIONS = (
+    joinedload(ServiceInstance.building),
+)
+
+# Liste des incidents : équipement historique + équipements de la table de liaison
+INCIDENT_LIST_OPTIONS = (
+    joinedload(Incident.service_instance),
+    selectinload(Incident.service_instances),
+)
+
+# Liste publique des incidents : équipements et mises à jour
+PUBLIC_INCIDENT_OPTIONS = INCIDENT_LIST_OPTIONS + (
+    selectinload(Incident.updates),
+)
+
+# Détail d'un incident : mises à jour et commentaires (avec leur auteur)
+INCIDENT_DETAIL_OPTIONS = INCIDENT_LIST_OPTIONS + (
+    selectinload(Incident.updates),
+    selectinload(Incident.comments).joinedload(IncidentComment.admin),
+)
+
+# Statistiques : nom de l'équipement de chaque incident
+INCIDENT_STATISTICS_OPTIONS = (
+    joinedload(Incident.service_instance),
+)
+
+# Liste des tickets : équipement, copropriété, admins et commentaires (avec leur auteur)
+TICKET_LIST_OPTIONS = (
+    joinedload(Ticket.service_instance),
+    joinedload(Ticket.copro),
+    joinedload(Ticket.assigned_admin),
+    joinedload(Ticket.reviewer),
+    selectinload(Ticket.comments).joinedload(TicketComment.admin),
+)
+
+# Commentaires de ticket avec leur auteur
+TICKET_COMMENT_OPTIONS = (
+    joinedload(TicketComment.admin),
+)
+
+# Maintenances : équipements concernés et leur bâtiment
+MAINTENANCE_OPTIONS = (
+    selectinload(Maintenance.service_instances).joinedload(ServiceInstance.building),
+)
@@ -1,7 +1,7 @@
 """
 Modèle pour la gestion des maintenances planifiées
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
@@ -38,4 +38,11 @@ class Maintenance(Base):
         back_populates="maintenances"
     )
 
+    __table_args__ = (
+        # Prochaine maintenance et liste admin (triée par date de début)
+        Index('ix_maintenances_copro_start', 'copro_id', 'start_date'),
+        # Maintenances en cours (end_date >= maintenant : seules les plus récentes sont lues)
+        Index('ix_maintenances_copro_end', 'copro_id', 'end_date'),
+    )
+
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, Enum as SQLEnum, Table, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -9,7 +9,10 @@ incident_service_instances = Table(
     'incident_service_instances',
     Base.metadata,
     Column('incident_id', Integer, ForeignKey('incidents.id', ondelete='CASCADE'), primary_key=True),
-    Column('service_instance_id', Integer, ForeignKey('service_instances.id', ondelete='CASCADE'), primary_key=True)
+    Column('service_instance_id', Integer, ForeignKey('service_instances.id', ondelete='CASCADE'), primary_key=True),
+    # Incidents d'un équipement (disponibilité, statistiques par bâtiment) : la clé primaire
+    # commence par incident_id
+    Index('ix_incident_service_instances_instance', 'service_instance_id', 'incident_id'),
 )
 
 
@@ -77,6 +80,21 @@ class Incident(Base):
     updates = relationship("IncidentUpdate", back_populates="incident", cascade="all, delete-orphan", order_by="IncidentUpdate.created_at")
     comments = relationship("IncidentComment", back_populates="incident", cascade="all, delete-orphan", order_by="IncidentComment.created_at")
 
+    __table_args__ = (
+        # Pagination par curseur de la liste admin (copro_id, created_at desc, id desc)
+        Index('ix_incidents_copro_created_id', 'copro_id', 'created_at', 'id'),
+        # Liste admin filtrée par statut
+        Index('ix_incidents_copro_status_created_id', 'copro_id', 'status', 'created_at', 'id'),
+        # Incidents en cours d'une copropriété (disponibilité, page de statut) : index partiel
+        Index(
+            'ix_incidents_open_copro_created', 'copro_id', 'created_at',
+            postgresql_where=text('resolved_at IS NULL'),
+            sqlite_where=text('resolved_at IS NULL'),
+        ),
+        # Incidents d'un équipement sur une période (statistiques par bâtiment, disponibilité)
+        Index('ix_incidents_instance_created', 'service_instance_id', 'created_at'),
+    )
+
 
 class IncidentUpdate(Base):
     """Updates/updates for an incident"""
@@ -91,6 +109,11 @@ class IncidentUpdate(Base):
     # Relationships
     incident = relationship("Incident", back_populates="updates")
 
+    __table_args__ = (
+        # Incident.updates (chargé avec selectinload, trié par date)
+        Index('ix_incident_updates_incident_created', 'incident_id', 'created_at'),
+    )
+
 
 class IncidentComment(Base):
     """Commentaires des administrateurs sur un incident"""
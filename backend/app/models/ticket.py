@@ -1,7 +1,7 @@
 """
 Modèle pour les tickets de déclaration d'incidents (public)
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -51,9 +51,16 @@ class Ticket(Base):
     reviewed_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # Admin qui a traité
     reviewed_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Déclarations identiques rattachées à ce ticket (« +1 »), celle d'origine comprise
+    report_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_reported_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Lien avec incident (si créé)
     incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=True, index=True)
     
+    # Identifiant provisoire renvoyé par l'enregistrement différé (TICKET_INTAKE_MODE="queued")
+    intake_id = Column(String(32), nullable=True)
+    
     # Métadonnées
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -66,4 +73,15 @@ class Ticket(Base):
     incident = relationship("Incident", foreign_keys=[incident_id])
     comments = relationship("TicketComment", back_populates="ticket", cascade="all, delete-orphan", order_by="TicketComment.created_at")
 
+    __table_args__ = (
+        # Pagination par curseur de la liste admin (copro_id, created_at desc, id desc)
+        Index('ix_tickets_copro_created_id', 'copro_id', 'created_at', 'id'),
+        # Liste admin filtrée par statut
+        Index('ix_tickets_copro_status_created_id', 'copro_id', 'status', 'created_at', 'id'),
+        # Déclarations récentes d'un équipement (détection des doublons)
+        Index('ix_tickets_copro_instance_created', 'copro_id', 'service_instance_id', 'created_at'),
+        # Unicité de l'identifiant provisoire (index unique créé en ligne, révision 0009)
+        Index('uq_tickets_intake_id', 'intake_id', unique=True),
+    )
+
 
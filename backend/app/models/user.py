@@ -12,6 +12,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Incrémentée pour révoquer les jetons déjà émis (claim "ver" du JWT)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Informations personnelles
     first_name = Column(String, nullable=True)  # Prénom (obligatoire pour nouveaux utilisateurs)
@@ -0,0 +1,81 @@
+"""
+Script pour (re)calculer l'agrégat journalier de disponibilité (equipment_daily_availability)
+à partir des incidents existants. À lancer une fois après le déploiement de la table,
+puis en cas de doute sur l'agrégat (il est ensuite maintenu par les endpoints admin).
+Usage: python -m app.scripts.backfill_availability [--copro-id 1] [--year 2025]
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import func as sql_func
+
+from app.db import SessionLocal, engine, Base
+from app.models.copro import Copro, ServiceInstance
+from app.models.status import Incident
+from app.models.availability import EquipmentDailyAvailability
+from app.services.availability import refresh_daily_availability
+
+
+def backfill_availability(copro_id=None, year=None):
+    """Recalculer l'agrégat, année par année, pour chaque copropriété"""
+    # Créer la table si elle n'existe pas encore
+    Base.metadata.create_all(bind=engine, tables=[EquipmentDailyAvailability.__table__])
+
+    db = SessionLocal()
+    try:
+        copros = db.query(Copro)
+        if copro_id is not None:
+            copros = copros.filter(Copro.id == copro_id)
+        copros = copros.all()
+        if not copros:
+            print("❌ Aucune copropriété trouvée")
+            return
+
+        today = date.today()
+        for copro in copros:
+            equipment_ids = [row.id for row in db.query(ServiceInstance.id).filter(
+                ServiceInstance.copro_id == copro.id
+            ).all()]
+            first_created, last_resolved = db.query(
+                sql_func.min(Incident.created_at),
+                sql_func.max(Incident.resolved_at)
+            ).filter(Incident.copro_id == copro.id).one()
+            if not equipment_ids or first_created is None:
+                print(f"⏭️  {copro.name} : aucun incident")
+                continue
+
+            first_year = first_created.year
+            last_year = max(today.year, last_resolved.year if last_resolved else today.year)
+            years = [year] if year is not None else range(first_year, last_year + 1)
+            for current_year in years:
+                refresh_daily_availability(
+                    db, copro.id, equipment_ids,
+                    date(current_year, 1, 1), date(current_year, 12, 31)
+                )
+                db.commit()
+                rows = db.query(EquipmentDailyAvailability).filter(
+                    EquipmentDailyAvailability.copro_id == copro.id,
+                    EquipmentDailyAvailability.day >= date(current_year, 1, 1),
+                    EquipmentDailyAvailability.day <= date(current_year, 12, 31)
+                ).count()
+                print(f"✅ {copro.name} - {current_year} : {rows} lignes")
+        print("✅ Agrégat de disponibilité recalculé")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erreur lors du calcul de l'agrégat: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalculer l'agrégat journalier de disponibilité")
+    parser.add_argument("--copro-id", type=int, default=None, help="Limiter à une copropriété")
+    parser.add_argument("--year", type=int, default=None, help="Limiter à une année")
+    args = parser.parse_args()
+    backfill_availability(copro_id=args.copro_id, year=args.year)
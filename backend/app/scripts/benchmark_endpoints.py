@@ -0,0 +1,258 @@
+"""
+Benchmark des endpoints principaux avec seuils de régression
+Usage: python -m app.scripts.benchmark_endpoints [--database-url URL] [--incidents 50000] [--requests 200]
+       [--baseline benchmark_baseline.json] [--save-baseline]
+
+L'application est démarrée dans le processus (TestClient) sur un jeu de données généré par
+app.scripts.generate_dataset. Pour chaque endpoint, après quelques requêtes de chauffe :
+latence (p50/p95/p99), débit (requêtes successives par seconde) et nombre de requêtes SQL
+par appel (médiane et maximum).
+- un endpoint qui renvoie des erreurs fait échouer le benchmark (code de sortie 1) : ses
+  mesures ne sont ni enregistrées ni comparées
+- --save-baseline : enregistre les résultats comme référence (JSON)
+- sinon, si la référence existe : échoue (code de sortie 1) si le p95 d'un endpoint dépasse
+  celui de la référence de plus de --tolerance (et de plus de --slack-ms) ou si son nombre de
+  requêtes SQL augmente
+Les limites de débit (connexion, tickets publics) sont relevées pour la mesure.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark des endpoints principaux")
+    parser.add_argument("--database-url", help="Base dédiée au benchmark (défaut : SQLite temporaire)")
+    parser.add_argument("--incidents", type=int, default=50_000, help="Nombre d'incidents du jeu de données")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du jeu de données")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Requêtes de chauffe (non mesurées) par endpoint")
+    parser.add_argument("--baseline", default=str(BACKEND_DIR / "benchmark_baseline.json"),
+                        help="Fichier de référence (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer les résultats comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Hausse relative tolérée du p95 (0.20 = +20 %%)")
+    parser.add_argument("--slack-ms", type=float, default=1.0,
+                        help="Hausse absolue du p95 toujours tolérée (bruit de mesure des endpoints rapides)")
+    parser.add_argument("--query-tolerance", type=int, default=0, help="Requêtes SQL supplémentaires tolérées par appel")
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+
+# Base du benchmark : à définir avant tout import de l'application
+if ARGS.database_url:
+    os.environ["DATABASE_URL"] = ARGS.database_url
+else:
+    _DB_PATH = os.path.join(tempfile.mkdtemp(prefix="copro-benchmark-"), "benchmark.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["INIT_TEST_DATA"] = "false"
+os.environ["DB_BOOTSTRAP_ON_STARTUP"] = "false"
+# Toutes les requêtes viennent du même client : sans cela, connexion et tickets répondent 429
+for _limit in ("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_PER_EMAIL",
+               "TICKET_RATE_LIMIT_PER_IP", "TICKET_RATE_LIMIT_PER_EMAIL"):
+    os.environ[_limit] = str(10 ** 9)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+
+from app.core.bootstrap import bootstrap_database
+from app.db import engine, async_engine
+from app.main import app
+from app.models.availability import EquipmentDailyAvailability
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.status import Incident
+from app.scripts.backfill_availability import backfill_availability
+from app.scripts.generate_dataset import DEFAULT_ADMIN_PASSWORD, admin_email, generate_dataset
+
+# Incidents par copropriété (le nombre de copropriétés suit la taille du jeu de données)
+INCIDENTS_PER_COPRO = 10_000
+
+# (nom, méthode, chemin relatif à /c/{slug}/api/v1, part de --requests)
+# La connexion (bcrypt, volontairement lent) est mesurée sur moins de requêtes
+ENDPOINTS = [
+    ("status", "GET", "/status/status", 1.0),
+    ("statistics_general", "GET", "/public/statistics/general", 1.0),
+    ("statistics_by_building", "GET", "/public/statistics/by-building/{building_id}", 1.0),
+    ("admin_tickets", "GET", "/admin/tickets", 1.0),
+    ("admin_incidents", "GET", "/admin/incidents", 1.0),
+    ("create_ticket", "POST", "/public/tickets", 1.0),
+    ("login", "POST", "/auth/login", 0.1),
+]
+
+
+class StatementCounter:
+    """Compte les requêtes exécutées sur les moteurs synchrone et asynchrone"""
+
+    def __init__(self):
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def prepare_dataset() -> dict:
+    """Migrer et remplir la base si besoin ; retourne la description du jeu de données
+
+    Le générateur calcule l'agrégat de disponibilité ; une base remplie sans lui (version
+    précédente du générateur) est complétée par backfill_availability.
+    """
+    bootstrap_database()
+    with engine.connect() as conn:
+        incidents = conn.execute(select(func.count()).select_from(Incident)).scalar()
+        availability_rows = conn.execute(select(func.count()).select_from(EquipmentDailyAvailability)).scalar()
+    if incidents == 0:
+        generate_dataset(copros=max(1, ARGS.incidents // INCIDENTS_PER_COPRO), incidents=ARGS.incidents, seed=ARGS.seed)
+        incidents = ARGS.incidents
+    elif availability_rows == 0:
+        backfill_availability()
+    with engine.connect() as conn:
+        copros = conn.execute(select(func.count()).select_from(Copro)).scalar()
+    return {"dialect": engine.dialect.name, "incidents": incidents, "copros": copros, "seed": ARGS.seed}
+
+
+def run_endpoint(client, counter, method, url, count, request_kwargs):
+    """Chauffe puis `count` requêtes mesurées ; request_kwargs(i) donne les arguments de la i-ème"""
+    for i in range(ARGS.warmup):
+        client.request(method, url, **request_kwargs(-1 - i))
+    gc.collect()
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for i in range(count):
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.request(method, url, **request_kwargs(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+        errors += 1 if response.status_code >= 400 else 0
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "throughput_rps": round(count / elapsed, 1),
+        "queries": statistics.median_low(queries),
+        "queries_max": max(queries),
+    }
+
+
+def run_benchmark() -> dict:
+    with engine.connect() as conn:
+        copro_id, slug = conn.execute(select(Copro.id, Copro.slug).order_by(Copro.id)).first()
+        building_id = conn.execute(
+            select(Building.id).where(Building.copro_id == copro_id).order_by(Building.id)
+        ).scalar()
+        equipment_ids = conn.execute(
+            select(ServiceInstance.id).where(ServiceInstance.copro_id == copro_id).order_by(ServiceInstance.id)
+        ).scalars().all()
+    credentials = {"username": admin_email(copro_id), "password": DEFAULT_ADMIN_PASSWORD}
+
+    def ticket(i):
+        # Équipements en alternance : déclarations nouvelles puis regroupées avec un ticket ouvert
+        return {"json": {
+            "service_instance_id": equipment_ids[i % len(equipment_ids)],
+            "reporter_name": "Résident",
+            "reporter_email": f"benchmark-{i}@example.com",
+            "title": "Panne signalée",
+            "description": "Déclaration du benchmark",
+        }}
+
+    counter = StatementCounter()
+    results = {}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        base = f"/c/{slug}/api/v1"
+        token = client.post(f"{base}/auth/login", data=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        request_kwargs = {
+            "create_ticket": ticket,
+            "login": lambda i: {"data": credentials},
+        }
+        for name, method, path, share in ENDPOINTS:
+            count = max(10, int(ARGS.requests * share))
+            url = base + path.format(building_id=building_id)
+            kwargs = request_kwargs.get(name, lambda i: {"headers": headers})
+            results[name] = run_endpoint(client, counter, method, url, count, kwargs)
+            result = results[name]
+            note = f"  ({result['errors']} erreur(s))" if result["errors"] else ""
+            print(
+                f"  {name:<24} p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+                f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s  "
+                f"{result['queries']:>3} requête(s) SQL{note}"
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict) -> int:
+    """Comparer aux résultats de référence ; retourne le nombre de régressions"""
+    regressions = 0
+    print(f"🔄 Comparaison avec la référence du {baseline['created_at']}")
+    for name, result in results.items():
+        reference = baseline["endpoints"].get(name)
+        if reference is None:
+            print(f"  ⚠️  {name} : absent de la référence")
+            continue
+        problems = []
+        p95_limit = reference["p95_ms"] * (1 + ARGS.tolerance) + ARGS.slack_ms
+        if result["p95_ms"] > p95_limit:
+            problems.append(f"p95 {reference['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms (max {p95_limit:.2f})")
+        if result["queries"] > reference["queries"] + ARGS.query_tolerance:
+            problems.append(f"requêtes SQL {reference['queries']} -> {result['queries']}")
+        regressions += 1 if problems else 0
+        change = (result["p95_ms"] - reference["p95_ms"]) / reference["p95_ms"] * 100 if reference["p95_ms"] else 0.0
+        detail = " ; ".join(problems) if problems else f"p95 {change:+.0f} %, {result['queries']} requête(s) SQL"
+        print(f"  {'❌' if problems else '✅'} {name} : {detail}")
+    return regressions
+
+
+def main():
+    dataset = prepare_dataset()
+    print(f"🔄 Benchmark ({dataset['dialect']}, {dataset['incidents']} incidents, {dataset['copros']} copropriété(s))")
+    results = run_benchmark()
+    failed = [name for name, result in results.items() if result["errors"]]
+    if failed:
+        print(f"❌ Erreurs sur {', '.join(failed)} : mesures ni enregistrées ni comparées")
+        sys.exit(1)
+    baseline_path = Path(ARGS.baseline)
+
+    if ARGS.save_baseline:
+        baseline = {"created_at": datetime.utcnow().isoformat(timespec="seconds"), "dataset": dataset, "endpoints": results}
+        baseline_path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"✅ Référence enregistrée dans {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"⚠️  Pas de référence ({baseline_path}) : relancer avec --save-baseline pour l'enregistrer")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline["dataset"] != dataset:
+        print(f"❌ Jeu de données différent de celui de la référence ({baseline['dataset']}) : mesures non comparables")
+        sys.exit(1)
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"❌ {regressions} endpoint(s) en régression (tolérance p95 +{ARGS.tolerance:.0%} et {ARGS.slack_ms} ms)")
+        sys.exit(1)
+    print("✅ Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
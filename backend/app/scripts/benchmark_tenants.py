@@ -0,0 +1,156 @@
+"""
+Mesure la latence de la page de statut en fonction du nombre de copropriétés hébergées
+Usage: python -m app.scripts.benchmark_tenants [--tenants 1,10,100,500] [--requests 200] [--max-ratio 2.0]
+
+Le script travaille sur une base SQLite jetable (jamais sur la base configurée) : il ajoute
+des copropriétés (bâtiment, équipements, incidents, maintenance) jusqu'à chaque palier, puis
+mesure GET /c/{slug}/api/v1/status/status sur un échantillon de copropriétés :
+- à froid : snapshot de la copropriété invalidé avant chaque requête (reconstruction)
+- à chaud : snapshot en cache
+Échoue (code de sortie 1) si la médiane au dernier palier dépasse max-ratio fois celle du premier.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Base jetable : à définir avant tout import de l'application
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="copro-tenants-"), "tenants.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["INIT_TEST_DATA"] = "false"
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.db import Base, SessionLocal, engine
+from app.main import app
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.maintenance import Maintenance
+from app.models.status import Incident, IncidentStatus
+from app.services.status_snapshot import status_snapshot
+
+EQUIPMENTS_PER_TENANT = 5
+INCIDENTS_PER_TENANT = 5
+
+
+def add_tenants(first, last):
+    """Créer les copropriétés numérotées de first à last - 1 ; retourne {slug: copro_id}"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        created = {}
+        for n in range(first, last):
+            copro = Copro(name=f"Copropriété {n}", slug=f"copro-{n}", is_active=True)
+            db.add(copro)
+            db.flush()
+            building = Building(copro_id=copro.id, name="Bâtiment A")
+            db.add(building)
+            db.flush()
+            equipments = [
+                ServiceInstance(copro_id=copro.id, building_id=building.id, name=f"Équipement {i}", order=i)
+                for i in range(EQUIPMENTS_PER_TENANT)
+            ]
+            db.add_all(equipments)
+            db.flush()
+            for i in range(INCIDENTS_PER_TENANT):
+                incident = Incident(
+                    copro_id=copro.id,
+                    service_instance_id=equipments[i % EQUIPMENTS_PER_TENANT].id,
+                    title=f"Incident {i}",
+                    status=IncidentStatus.RESOLVED if i else IncidentStatus.INVESTIGATING,
+                    created_at=now - timedelta(days=i)
+                )
+                incident.service_instances = [equipments[i % EQUIPMENTS_PER_TENANT]]
+                db.add(incident)
+            maintenance = Maintenance(
+                copro_id=copro.id,
+                title="Maintenance",
+                start_date=now - timedelta(hours=1),
+                end_date=now + timedelta(hours=1)
+            )
+            maintenance.service_instances = equipments[:1]
+            db.add(maintenance)
+            created[copro.slug] = copro.id
+        db.commit()
+        return created
+    finally:
+        db.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(client, tenants, requests, cold):
+    """Latences (ms) de la page de statut sur un échantillon de copropriétés"""
+    slugs = list(tenants)
+    latencies = []
+    for _ in range(requests):
+        slug = random.choice(slugs)
+        if cold:
+            status_snapshot.invalidate(tenants[slug])
+        start = time.perf_counter()
+        response = client.get(f"/c/{slug}/api/v1/status/status")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"/c/{slug}: HTTP {response.status_code}")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de la page de statut selon le nombre de copropriétés")
+    parser.add_argument("--tenants", default="1,10,100,500", help="Paliers de nombre de copropriétés")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par palier et par mode")
+    parser.add_argument("--max-ratio", type=float, default=2.0, help="Ratio max des médianes dernier / premier palier")
+    args = parser.parse_args()
+    steps = sorted(int(step) for step in args.tenants.split(","))
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    random.seed(42)
+
+    tenants = {}
+    results = []
+    with TestClient(app) as client:
+        for step in steps:
+            tenants.update(add_tenants(len(tenants), step))
+            # Chauffer les caches (copropriétés, snapshots) de toutes les copropriétés
+            for slug in tenants:
+                client.get(f"/c/{slug}/api/v1/status/status")
+            cold = measure(client, tenants, args.requests, cold=True)
+            warm = measure(client, tenants, args.requests, cold=False)
+            results.append((step, cold, warm))
+
+    print(f"🔄 GET /c/{{slug}}/api/v1/status/status ({args.requests} requêtes par mode, latences en ms)")
+    print(f"  {'copropriétés':>12}  {'froid p50':>9}  {'froid p95':>9}  {'chaud p50':>9}  {'chaud p95':>9}")
+    for step, cold, warm in results:
+        print(
+            f"  {step:>12}  {statistics.median(cold):>9.2f}  {percentile(cold, 0.95):>9.2f}"
+            f"  {statistics.median(warm):>9.2f}  {percentile(warm, 0.95):>9.2f}"
+        )
+
+    failures = 0
+    (_, first_cold, first_warm), (last_step, last_cold, last_warm) = results[0], results[-1]
+    for label, first, last in (("froid", first_cold, last_cold), ("chaud", first_warm, last_warm)):
+        ratio = statistics.median(last) / statistics.median(first)
+        flat = ratio <= args.max_ratio
+        failures += 0 if flat else 1
+        print(f"  {'✅' if flat else '❌'} {label} : médiane x{ratio:.2f} entre {steps[0]} et {last_step} copropriétés")
+
+    if failures:
+        print(f"❌ La latence dépend du nombre de copropriétés (ratio max {args.max_ratio})")
+        sys.exit(1)
+    print("✅ Latence de la page de statut indépendante du nombre de copropriétés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Initialise la base de données (migrations Alembic, données de test si INIT_TEST_DATA) une fois par déploiement
+Usage: python -m app.scripts.bootstrap_db [--force]
+
+À lancer avant de démarrer les workers quand DB_BOOTSTRAP_ON_STARTUP=false. Sans --force,
+rien n'est fait si le schéma n'a pas changé depuis la dernière initialisation.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.core.bootstrap import bootstrap_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Initialisation de la base de données")
+    parser.add_argument("--force", action="store_true", help="Initialiser même si le schéma n'a pas changé")
+    args = parser.parse_args()
+    if not bootstrap_database(force=args.force):
+        print("✅ Base de données déjà initialisée pour ce schéma")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Erreur lors de l'initialisation: {e}")
+        raise
@@ -0,0 +1,134 @@
+"""
+Vérifie que la disponibilité des équipements calculée à partir de l'agrégat journalier est
+identique au calcul direct, équipement par équipement, à partir des incidents.
+Usage: python -m app.scripts.check_availability [--copros 2] [--incidents 3000] [--seed 42]
+
+Le script travaille sur une base SQLite jetable (jamais sur la base configurée) : il la
+remplit avec app.scripts.generate_dataset (incidents sur plusieurs années, non résolus,
+à cheval sur deux années, multi-équipements, agrégat calculé à la suite), puis compare pour chaque
+copropriété et chaque année la liste `equipment_availability` des statistiques publiques
+(compute_equipment_availability) au calcul de référence : une requête par équipement, comme
+les endpoints avant l'agrégat. Échoue (code de sortie 1) à la première différence.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from calendar import isleap
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Base jetable : à définir avant tout import de l'application
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="copro-availability-"), "availability.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["INIT_TEST_DATA"] = "false"
+
+from sqlalchemy import or_
+
+from app.core.bootstrap import bootstrap_database
+from app.db import SessionLocal
+from app.models.copro import Copro, ServiceInstance
+from app.models.status import Incident
+from app.scripts.generate_dataset import generate_dataset
+from app.services.availability import compute_equipment_availability, total_duration_hours
+
+FIELDS = ("availability_percent", "incident_count", "downtime_hours", "avg_resolution_hours")
+
+
+def _as_utc(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def reference_availability(db, copro_id, equipments, start_date, end_date, total_hours, now):
+    """Calcul direct : incidents de chaque équipement actifs sur la période, union de leurs intervalles"""
+    # La fin d'année (23:59:59) désigne la fin de la journée, comme total_hours
+    end_date += timedelta(seconds=1)
+    result = []
+    for equipment in equipments:
+        incidents = db.query(Incident).filter(
+            Incident.copro_id == copro_id,
+            or_(
+                Incident.service_instance_id == equipment.id,
+                Incident.service_instances.any(ServiceInstance.id == equipment.id)
+            ),
+            Incident.created_at <= end_date,
+            or_(Incident.resolved_at.is_(None), Incident.resolved_at >= start_date)
+        ).all()
+        intervals, incident_count, resolved_count, resolution_hours = [], 0, 0, 0.0
+        for incident in incidents:
+            created = _as_utc(incident.created_at)
+            resolved = _as_utc(incident.resolved_at) if incident.resolved_at else None
+            intervals.append((max(created, start_date), min(resolved or now, end_date)))
+            if created >= start_date:
+                incident_count += 1
+                if resolved:
+                    resolved_count += 1
+                    # Durée de résolution limitée à la période, comme le calcul d'origine
+                    resolution_hours += max(0.0, (min(resolved, end_date) - created).total_seconds() / 3600)
+        downtime_hours = total_duration_hours(intervals)
+        availability_percent = max(0.0, min(100.0, (total_hours - downtime_hours) / total_hours * 100))
+        avg_resolution_hours = resolution_hours / resolved_count if resolved_count else None
+        result.append({
+            "equipment_id": equipment.id,
+            "equipment_name": equipment.name,
+            "availability_percent": round(availability_percent, 2),
+            "incident_count": incident_count,
+            "downtime_hours": round(downtime_hours, 2),
+            "avg_resolution_hours": round(avg_resolution_hours, 2) if avg_resolution_hours else None
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disponibilité : agrégat journalier contre calcul direct")
+    parser.add_argument("--copros", type=int, default=2, help="Nombre de copropriétés")
+    parser.add_argument("--incidents", type=int, default=3000, help="Nombre d'incidents (toutes copropriétés)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du jeu de données")
+    args = parser.parse_args()
+
+    bootstrap_database()
+    generate_dataset(copros=args.copros, incidents=args.incidents, years=3, seed=args.seed)
+
+    now = datetime.utcnow().replace(tzinfo=timezone.utc)
+    compared, failures = 0, 0
+    db = SessionLocal()
+    try:
+        for copro in db.query(Copro).order_by(Copro.id).all():
+            equipments = db.query(ServiceInstance).filter(
+                ServiceInstance.copro_id == copro.id,
+                ServiceInstance.is_active == True
+            ).order_by(ServiceInstance.id).all()
+            for year in range(now.year - 3, now.year + 1):
+                start_date = datetime(year, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+                end_date = datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+                total_hours = (366 if isleap(year) else 365) * 24
+                expected = reference_availability(db, copro.id, equipments, start_date, end_date, total_hours, now)
+                actual = compute_equipment_availability(
+                    db, copro.id, equipments, start_date, end_date, total_hours, now=now
+                )
+                for reference, computed in zip(expected, actual):
+                    compared += 1
+                    differences = [
+                        f"{field} {reference[field]} != {computed[field]}"
+                        for field in ("equipment_id", *FIELDS) if reference[field] != computed[field]
+                    ]
+                    if differences:
+                        failures += 1
+                        print(f"  ❌ {copro.slug} {year} {reference['equipment_name']} : {', '.join(differences)}")
+                if len(expected) != len(actual):
+                    failures += 1
+                    print(f"  ❌ {copro.slug} {year} : {len(expected)} équipements attendus, {len(actual)} obtenus")
+    finally:
+        db.close()
+
+    if failures:
+        print(f"❌ {failures} différence(s) sur {compared} disponibilités comparées")
+        sys.exit(1)
+    print(f"✅ Disponibilités identiques au calcul direct ({compared} équipements × années)")
+
+
+if __name__ == "__main__":
+    main()
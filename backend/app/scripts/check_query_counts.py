@@ -0,0 +1,192 @@
+"""
+Vérifie que les endpoints de liste exécutent un nombre constant de requêtes SQL,
+quel que soit le nombre de lignes (pas de N+1 via db.refresh / lazy loading).
+Usage: python -m app.scripts.check_query_counts [--small 5] [--large 50]
+
+Le script travaille sur une base SQLite jetable (jamais sur la base configurée) :
+il la remplit deux fois (petit et grand jeu de données), compte les requêtes
+exécutées par chaque endpoint (après une requête de chauffe, pour ne pas compter le
+remplissage des caches) et échoue (code de sortie 1) si un compteur augmente
+ou si un endpoint ne répond pas 200 (une page d'erreur ne mesure rien).
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+# Base jetable : à définir avant tout import de l'application
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="copro-query-counts-"), "query_counts.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["INIT_TEST_DATA"] = "false"
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.auth import get_password_hash
+from app.db import Base, SessionLocal, engine, async_engine
+from app.main import app
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.maintenance import Maintenance
+from app.models.status import Incident, IncidentComment, IncidentUpdate, IncidentStatus
+from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket_comment import TicketComment
+from app.models.user import User
+
+ADMIN_EMAIL = "query-counts@example.com"
+ADMIN_PASSWORD = "query-counts"
+
+# Endpoints vérifiés (chemins relatifs à /api/v1, {incident_id} / {ticket_id} / {copro_id} remplacés)
+ENDPOINTS = [
+    "/admin/tickets",
+    "/admin/tickets/{ticket_id}/comments",
+    "/admin/incidents",
+    "/admin/incidents/{incident_id}",
+    "/admin/service-instances",
+    "/admin/maintenances",
+    "/public/service-instances",
+    "/copro/copros/{copro_id}/service-instances",
+    "/copro/buildings/{building_id}/service-instances",
+    "/status/incidents?limit=200",
+]
+
+
+class StatementCounter:
+    """Compte les requêtes exécutées sur les moteurs synchrone et asynchrone"""
+
+    def __init__(self):
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def seed(size):
+    """Créer une copropriété avec `size` équipements, tickets, incidents et maintenances"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        admin = User(
+            email=ADMIN_EMAIL,
+            hashed_password=get_password_hash(ADMIN_PASSWORD),
+            is_active=True,
+            is_superuser=True
+        )
+        copro = Copro(name="Copropriété de mesure", slug="mesure")
+        db.add_all([admin, copro])
+        db.flush()
+        building = Building(copro_id=copro.id, name="Bâtiment A")
+        db.add(building)
+        db.flush()
+
+        equipments = [
+            ServiceInstance(copro_id=copro.id, building_id=building.id, name=f"Équipement {i}", order=i)
+            for i in range(size)
+        ]
+        db.add_all(equipments)
+        db.flush()
+
+        now = datetime.utcnow()
+        for i in range(size):
+            incident = Incident(
+                copro_id=copro.id,
+                service_instance_id=equipments[i].id,
+                title=f"Incident {i}",
+                status=IncidentStatus.INVESTIGATING,
+                created_at=now - timedelta(hours=i)
+            )
+            incident.service_instances = [equipments[i], equipments[(i + 1) % size]]
+            db.add(incident)
+            db.flush()
+            db.add(IncidentUpdate(incident_id=incident.id, message="Mise à jour", status=IncidentStatus.INVESTIGATING))
+            db.add(IncidentComment(incident_id=incident.id, admin_id=admin.id, comment="Commentaire"))
+
+            ticket = Ticket(
+                copro_id=copro.id,
+                service_instance_id=equipments[i].id,
+                reporter_name="Résident",
+                reporter_email="resident@example.com",
+                title=f"Ticket {i}",
+                description="Description du problème",
+                status=TicketStatus.ANALYZING,
+                assigned_to=admin.id,
+                reviewed_by=admin.id,
+                incident_id=incident.id
+            )
+            db.add(ticket)
+            db.flush()
+            db.add_all([TicketComment(ticket_id=ticket.id, admin_id=admin.id, comment=f"Commentaire {j}") for j in range(2)])
+
+            maintenance = Maintenance(
+                copro_id=copro.id,
+                title=f"Maintenance {i}",
+                start_date=now + timedelta(days=i),
+                end_date=now + timedelta(days=i, hours=2)
+            )
+            maintenance.service_instances = [equipments[i], equipments[(i + 1) % size]]
+            db.add(maintenance)
+        db.commit()
+        return {
+            "copro_id": copro.id,
+            "building_id": building.id,
+            "incident_id": db.query(Incident.id).order_by(Incident.id).first()[0],
+            "ticket_id": db.query(Ticket.id).order_by(Ticket.id).first()[0],
+        }
+    finally:
+        db.close()
+
+
+def measure(client, counter, size):
+    """Nombre de requêtes SQL par endpoint pour un jeu de données de taille `size`"""
+    ids = seed(size)
+    response = client.post("/api/v1/auth/login", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    counts = {}
+    for path in ENDPOINTS:
+        url = "/api/v1" + path.format(**ids)
+        # Requête de chauffe : caches des principaux et des copropriétés remplis dans les deux mesures
+        client.get(url, headers=headers)
+        counter.count = 0
+        response = client.get(url, headers=headers)
+        counts[path] = (counter.count, response.status_code)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifier l'absence de N+1 sur les endpoints de liste")
+    parser.add_argument("--small", type=int, default=5, help="Taille du petit jeu de données")
+    parser.add_argument("--large", type=int, default=50, help="Taille du grand jeu de données")
+    args = parser.parse_args()
+
+    counter = StatementCounter()
+    with TestClient(app, raise_server_exceptions=False) as client:
+        small = measure(client, counter, args.small)
+        large = measure(client, counter, args.large)
+
+    failures = 0
+    print(f"🔄 Requêtes SQL par endpoint ({args.small} lignes → {args.large} lignes)")
+    for path in ENDPOINTS:
+        (small_count, small_status), (large_count, large_status) = small[path], large[path]
+        succeeded = small_status == large_status == 200
+        constant = large_count <= small_count
+        failures += 0 if succeeded and constant else 1
+        note = "" if succeeded else f"  (HTTP {small_status}/{large_status})"
+        print(f"  {'✅' if succeeded and constant else '❌'} {path}: {small_count} → {large_count}{note}")
+
+    if failures:
+        print(f"❌ {failures} endpoint(s) en erreur ou avec un nombre de requêtes qui dépend du nombre de lignes")
+        sys.exit(1)
+    print("✅ Nombre de requêtes constant sur tous les endpoints")
+
+
+if __name__ == "__main__":
+    main()
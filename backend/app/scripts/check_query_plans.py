@@ -0,0 +1,178 @@
+"""
+Vérifie les plans d'exécution (EXPLAIN) des requêtes des endpoints les plus sollicités
+sur un gros jeu de données : échoue si l'une d'elles parcourt séquentiellement une grande table
+ou si un endpoint ne répond pas en 2xx (ses requêtes ne seraient que partiellement vérifiées).
+Usage: python -m app.scripts.check_query_plans [--database-url URL] [--incidents 1000000]
+
+Chaque endpoint est appelé une fois ; chacune de ses requêtes SELECT est passée à EXPLAIN
+(PostgreSQL : EXPLAIN (FORMAT JSON) ; SQLite : EXPLAIN QUERY PLAN) avec ses paramètres réels.
+Jeu de données : app.scripts.generate_dataset (une copropriété pour 10 000 incidents).
+Sans --database-url, une base SQLite temporaire est utilisée. Avec PostgreSQL (le
+planificateur de la production), utiliser une base dédiée : elle est migrée puis remplie si
+elle ne contient pas encore le jeu de données.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Vérifier les plans d'exécution des endpoints principaux")
+    parser.add_argument("--database-url", help="Base dédiée à la vérification (défaut : SQLite temporaire)")
+    parser.add_argument("--incidents", type=int, default=1_000_000, help="Nombre d'incidents du jeu de données")
+    parser.add_argument("--min-rows", type=int, default=10_000,
+                        help="Taille à partir de laquelle un parcours séquentiel est refusé")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du jeu de données")
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+
+# Base de vérification : à définir avant tout import de l'application
+if ARGS.database_url:
+    os.environ["DATABASE_URL"] = ARGS.database_url
+else:
+    _DB_PATH = os.path.join(tempfile.mkdtemp(prefix="copro-query-plans-"), "query_plans.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["INIT_TEST_DATA"] = "false"
+os.environ["DB_BOOTSTRAP_ON_STARTUP"] = "false"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select, text
+
+from app.core.bootstrap import bootstrap_database
+from app.db import engine, async_engine
+from app.main import app
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.status import Incident
+from app.scripts.generate_dataset import DEFAULT_ADMIN_PASSWORD, admin_email, generate_dataset
+
+# Incidents par copropriété (le nombre de copropriétés suit la taille du jeu de données)
+INCIDENTS_PER_COPRO = 10_000
+
+# Endpoints vérifiés (chemins relatifs à /c/{slug}/api/v1)
+ENDPOINTS = [
+    ("GET", "/status/status"),
+    ("GET", "/status/incidents"),
+    ("GET", "/public/statistics/general"),
+    ("GET", "/public/statistics/by-building/{building_id}"),
+    ("GET", "/admin/incidents"),
+    ("GET", "/admin/incidents?status_filter=investigating"),
+    ("GET", "/admin/tickets"),
+    ("GET", "/admin/tickets?status_filter=analyzing"),
+    ("GET", "/admin/maintenances"),
+    ("POST", "/public/tickets"),
+]
+
+EXPLAIN_PREFIX = {"postgresql": "EXPLAIN (FORMAT JSON) ", "sqlite": "EXPLAIN QUERY PLAN "}
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+class PlanCollector:
+    """Passe à EXPLAIN chaque SELECT exécuté (moteurs synchrone et asynchrone) pendant la capture"""
+
+    def __init__(self):
+        self.capturing = False
+        self.plans = []
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.capturing or executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH", "(")):
+            return
+        # Curseur séparé sur la même connexion : mêmes paramètres, même style (%s, ?, %(nom)s)
+        explain = conn.connection.cursor()
+        try:
+            explain.execute(EXPLAIN_PREFIX[conn.dialect.name] + statement, parameters)
+            rows = explain.fetchall()
+        finally:
+            explain.close()
+        self.plans.append((statement, rows))
+
+
+def sequential_scans(dialect: str, rows) -> set:
+    """Tables parcourues séquentiellement dans un plan"""
+    if dialect == "sqlite":
+        return {match.group(1) for match in (SQLITE_FULL_SCAN.match(row[3]) for row in rows) if match}
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    tables, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            tables.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return tables
+
+
+def table_sizes() -> dict:
+    tables = ["incidents", "incident_updates", "incident_service_instances", "tickets", "maintenances"]
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in tables}
+
+
+def main():
+    bootstrap_database()
+    with engine.connect() as conn:
+        seeded = conn.execute(select(func.count()).select_from(Incident)).scalar()
+    if seeded == 0:
+        generate_dataset(copros=max(1, ARGS.incidents // INCIDENTS_PER_COPRO), incidents=ARGS.incidents, seed=ARGS.seed)
+    elif seeded < ARGS.incidents:
+        print(f"⚠️  La base contient déjà {seeded} incidents (moins que --incidents) : jeu de données conservé")
+    large_tables = {table for table, size in table_sizes().items() if size >= ARGS.min_rows}
+
+    with engine.connect() as conn:
+        copro_id, slug = conn.execute(select(Copro.id, Copro.slug).order_by(Copro.id)).first()
+        building_id = conn.execute(select(Building.id).where(Building.copro_id == copro_id)).scalar()
+        equipment_id = conn.execute(select(ServiceInstance.id).where(ServiceInstance.copro_id == copro_id)).scalar()
+    ticket = {
+        "service_instance_id": equipment_id, "reporter_name": "Résident", "reporter_email": "plans@example.com",
+        "title": "Ascenseur bloqué au rez-de-chaussée", "description": "Vérification des plans",
+    }
+
+    collector = PlanCollector()
+    failures = 0
+    print(f"🔄 Plans d'exécution (tables d'au moins {ARGS.min_rows} lignes : {', '.join(sorted(large_tables)) or 'aucune'})")
+    with TestClient(app, raise_server_exceptions=False) as client:
+        base = f"/c/{slug}/api/v1"
+        response = client.post(f"{base}/auth/login", data={"username": admin_email(copro_id), "password": DEFAULT_ADMIN_PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for method, path in ENDPOINTS:
+            collector.plans = []
+            collector.capturing = True
+            url = base + path.format(building_id=building_id)
+            if method == "POST":
+                response = client.post(url, json=ticket)
+            else:
+                response = client.get(url, headers=headers)
+            collector.capturing = False
+
+            scanned = []
+            for statement, rows in collector.plans:
+                tables = sequential_scans(engine.dialect.name, rows) & large_tables
+                if tables:
+                    scanned.append((statement, tables))
+            # Une réponse en erreur n'a pas exécuté toutes ses requêtes : leurs plans manquent
+            failed = scanned or not 200 <= response.status_code < 300
+            failures += 1 if failed else 0
+            note = "" if 200 <= response.status_code < 300 else f"  (HTTP {response.status_code})"
+            print(f"  {'❌' if failed else '✅'} {method} {path}: {len(collector.plans)} requête(s){note}")
+            for statement, tables in scanned:
+                print(f"      parcours séquentiel de {', '.join(sorted(tables))} : {' '.join(statement.split())[:200]}")
+
+    if failures:
+        print(f"❌ {failures} endpoint(s) en erreur ou avec un parcours séquentiel d'une grande table")
+        sys.exit(1)
+    print("✅ Aucun parcours séquentiel de grande table")
+
+
+if __name__ == "__main__":
+    main()
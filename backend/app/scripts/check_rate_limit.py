@@ -0,0 +1,188 @@
+"""
+Vérifie les limites de débit (app/core/rate_limit.py) sans attendre l'écoulement des fenêtres
+Usage: python -m app.scripts.check_rate_limit
+
+Les scénarios s'exécutent sur une horloge simulée, avec le backend en mémoire et avec un
+backend factice partagé par deux limiteurs (comme deux workers derrière un même stockage) :
+limites par IP et par email, tentatives refusées non comptées, fenêtre glissante, Retry-After,
+remise à zéro après une connexion réussie, remboursement de l'IP (déclaration regroupée).
+Vérifie aussi l'IP du client derrière un proxy de confiance (X-Forwarded-For) et que
+RateLimitBackend impose hit(), reset() et cancel().
+Échoue (code de sortie 1) au premier écart. Aucune base de données n'est utilisée.
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimiter,
+    client_ip,
+    parse_networks,
+)
+
+WINDOW = 60.0
+
+
+class FakeClock:
+    """Horloge simulée : le temps n'avance que par advance()"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeSharedBackend(RateLimitBackend):
+    """Stockage partagé minimal (dict de listes d'instants), à la manière d'un backend Redis"""
+
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.hits: Dict[str, List[float]] = {}
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        now = self.clock()
+        hits = [moment for moment in self.hits.get(key, []) if moment > now - window_seconds]
+        self.hits[key] = hits
+        if len(hits) >= limit:
+            return hits[0] + window_seconds - now
+        hits.append(now)
+        return 0.0
+
+    def reset(self, key: str) -> None:
+        self.hits.pop(key, None)
+
+    def cancel(self, key: str) -> None:
+        if self.hits.get(key):
+            self.hits[key].pop()
+
+
+def _limiter(backend: RateLimitBackend, ip_limit: int = 3, email_limit: int = 2) -> RateLimiter:
+    return RateLimiter(backend, "check", ip_limit, email_limit, WINDOW, "Trop de tentatives")
+
+
+def _attempt(limiter: RateLimiter, ip: str, email=None):
+    """None si la tentative est acceptée, sinon la valeur de Retry-After"""
+    try:
+        limiter.check(ip, email)
+    except HTTPException as e:
+        assert e.status_code == 429, e.status_code
+        return int(e.headers["Retry-After"])
+    return None
+
+
+def _scenarios(make_backend):
+    """(nom, vrai si conforme) pour un backend créé par make_backend(clock)"""
+    results = []
+
+    clock = FakeClock()
+    limiter = _limiter(make_backend(clock))
+    accepted = [_attempt(limiter, "1.1.1.1") for _ in range(3)]
+    refused = _attempt(limiter, "1.1.1.1")
+    results.append(("limite par IP, Retry-After = fenêtre", accepted == [None] * 3 and refused == WINDOW))
+    results.append(("autre IP non limitée", _attempt(limiter, "2.2.2.2") is None))
+
+    clock.advance(WINDOW / 2)
+    results.append(("refus tant que la fenêtre court", _attempt(limiter, "1.1.1.1") == WINDOW / 2))
+    clock.advance(WINDOW / 2)
+    # Les tentatives refusées ne sont pas comptées : la fenêtre libère les 3 premières
+    results.append(("refus non comptés, fenêtre glissante", _attempt(limiter, "1.1.1.1") is None))
+
+    clock = FakeClock()
+    limiter = _limiter(make_backend(clock), ip_limit=100)
+    attempts = [_attempt(limiter, f"10.0.0.{i}", "Alice@example.com ") for i in range(3)]
+    results.append(("limite par email, toutes IP confondues", attempts[:2] == [None, None] and attempts[2] == WINDOW))
+    limiter.reset_email("alice@example.com")
+    results.append(("remise à zéro de l'email", _attempt(limiter, "10.0.0.9", "alice@example.com") is None))
+
+    clock = FakeClock()
+    limiter = _limiter(make_backend(clock), email_limit=100)
+    for i in range(5):
+        _attempt(limiter, "4.4.4.4", f"resident-{i}@example.com")
+        limiter.refund_ip("4.4.4.4")
+    results.append(("tentatives remboursées non comptées pour l'IP", _attempt(limiter, "4.4.4.4") is None))
+    limiter = _limiter(make_backend(clock), ip_limit=100)
+    for _ in range(2):
+        _attempt(limiter, "5.5.5.5", "bob@example.com")
+        limiter.refund_ip("5.5.5.5")
+    results.append(("remboursement IP : l'email reste compté", _attempt(limiter, "5.5.5.5", "bob@example.com") == WINDOW))
+
+    clock = FakeClock()
+    backend = make_backend(clock)
+    workers = [_limiter(backend), _limiter(backend)]
+    attempts = [_attempt(workers[i % 2], "3.3.3.3") for i in range(4)]
+    shared = attempts == [None, None, None, WINDOW]
+    results.append(("limiteurs d'un même backend : budget commun", shared and workers[1].rejected == 1))
+    return results
+
+
+def _request(peer: str, forwarded=None) -> Request:
+    headers = [(b"x-forwarded-for", value.encode("latin-1")) for value in forwarded or []]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 5000)})
+
+
+def _client_ip_scenarios():
+    proxies = parse_networks(["10.0.0.0/8", "192.168.1.1"])
+    return [
+        ("sans proxy de confiance : IP de connexion", client_ip(_request("10.0.0.2", ["6.6.6.6"]), ()) == "10.0.0.2"),
+        ("X-Forwarded-For ignoré hors proxy de confiance",
+         client_ip(_request("7.7.7.7", ["6.6.6.6"]), proxies) == "7.7.7.7"),
+        ("derrière le load balancer : IP du client",
+         client_ip(_request("10.0.0.2", ["8.8.8.8"]), proxies) == "8.8.8.8"),
+        ("adresse usurpée par le client ignorée",
+         client_ip(_request("10.0.0.2", ["6.6.6.6, 8.8.8.8"]), proxies) == "8.8.8.8"),
+        ("chaîne de proxys de confiance",
+         client_ip(_request("10.0.0.2", ["6.6.6.6, 8.8.8.8", "192.168.1.1"]), proxies) == "8.8.8.8"),
+        ("proxy de confiance sans en-tête : IP de connexion", client_ip(_request("10.0.0.2"), proxies) == "10.0.0.2"),
+    ]
+
+
+def _backend_is_abstract():
+    class Incomplete(RateLimitBackend):
+        def hit(self, key, limit, window_seconds):
+            return 0.0
+
+        def reset(self, key):
+            pass
+
+    try:
+        Incomplete()
+    except TypeError:
+        return True
+    return False
+
+
+def main():
+    checks = []
+    for name, make_backend in (
+        ("mémoire", lambda clock: InMemoryRateLimitBackend(max_keys=1000, clock=clock)),
+        ("partagé (factice)", FakeSharedBackend),
+    ):
+        checks += [(f"[{name}] {label}", ok) for label, ok in _scenarios(make_backend)]
+    checks += [(f"[IP client] {label}", ok) for label, ok in _client_ip_scenarios()]
+    checks.append(("RateLimitBackend impose hit(), reset() et cancel()", _backend_is_abstract()))
+
+    failures = 0
+    print("🔄 Limites de débit (horloge simulée)")
+    for label, ok in checks:
+        failures += 0 if ok else 1
+        print(f"  {'✅' if ok else '❌'} {label}")
+    if failures:
+        print(f"❌ {failures} vérification(s) en échec")
+        sys.exit(1)
+    print(f"✅ {len(checks)} vérifications réussies")
+
+
+if __name__ == "__main__":
+    main()
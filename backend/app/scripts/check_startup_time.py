@@ -0,0 +1,109 @@
+"""
+Vérifie le temps de démarrage de l'application et l'absence de travail sur la base à l'import
+Usage: python -m app.scripts.check_startup_time [--import-budget 3.0] [--warm-budget 0.5]
+
+Le script travaille sur une base SQLite jetable (jamais sur la base configurée). Chaque mesure
+est faite dans un interpréteur neuf, comme un worker uvicorn :
+- import de app.main : aucune requête SQL ne doit être exécutée
+- premier démarrage (lifespan) : initialisation de la base (tables, empreinte du schéma)
+- démarrage suivant : chemin rapide, aucune DDL
+Échoue (code de sortie 1) si un budget est dépassé ou si de la DDL est exécutée hors de l'initialisation.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+DDL_PREFIXES = ("CREATE", "ALTER", "DROP")
+
+
+def measure_worker():
+    """Exécuté dans le sous-processus : mesure import + démarrage, résultat en JSON sur stdout"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    statements = []
+    event.listen(Engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+    import_statements = len(statements)
+
+    from fastapi.testclient import TestClient
+    statements.clear()
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        healthy = client.get("/health").status_code == 200
+    print(json.dumps({
+        "import_seconds": imported - start,
+        "startup_seconds": started - imported,
+        "import_statements": import_statements,
+        "startup_statements": len(statements),
+        "startup_ddl": sum(1 for s in statements if s.lstrip().upper().startswith(DDL_PREFIXES)),
+        "healthy": healthy,
+    }))
+
+
+def run_worker(env):
+    output = subprocess.run(
+        [sys.executable, "-m", "app.scripts.check_startup_time", "--worker"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage de l'application")
+    parser.add_argument("--import-budget", type=float, default=3.0, help="Durée max de l'import de app.main (s)")
+    parser.add_argument("--warm-budget", type=float, default=0.5, help="Durée max d'un démarrage sans initialisation (s)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        measure_worker()
+        return
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="copro-startup-"), "startup.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "INIT_TEST_DATA": "false",
+        "DB_BOOTSTRAP_ON_STARTUP": "true",
+    }
+    env.pop("ASYNC_DATABASE_URL", None)
+    cold = run_worker(env)
+    warm = run_worker(env)
+
+    print("🔄 Démarrage d'un worker (secondes)")
+    print(f"  {'':>8}  {'import':>7}  {'démarrage':>9}  {'requêtes':>8}  {'DDL':>4}")
+    for label, result in (("premier", cold), ("suivant", warm)):
+        print(
+            f"  {label:>8}  {result['import_seconds']:>7.3f}  {result['startup_seconds']:>9.3f}"
+            f"  {result['startup_statements']:>8}  {result['startup_ddl']:>4}"
+        )
+
+    checks = [
+        ("aucune requête SQL à l'import de app.main", cold["import_statements"] == 0 and warm["import_statements"] == 0),
+        ("tables créées au premier démarrage", cold["startup_ddl"] > 0 and cold["healthy"]),
+        ("aucune DDL aux démarrages suivants", warm["startup_ddl"] == 0 and warm["healthy"]),
+        (f"import en moins de {args.import_budget}s", warm["import_seconds"] <= args.import_budget),
+        (f"démarrage suivant en moins de {args.warm_budget}s", warm["startup_seconds"] <= args.warm_budget),
+    ]
+    for label, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {label}")
+    if not all(passed for _, passed in checks):
+        print("❌ Budget de démarrage dépassé")
+        sys.exit(1)
+    print("✅ Démarrage dans le budget")
+
+
+if __name__ == "__main__":
+    main()
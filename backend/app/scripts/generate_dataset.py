@@ -0,0 +1,394 @@
+"""
+Génère un jeu de données synthétique volumineux (tests de charge, benchmarks, plans d'exécution)
+Usage: python -m app.scripts.generate_dataset [--copros 100] [--incidents 1000000] [--years 3] [--seed 42]
+
+- Copropriétés avec 1 à 4 bâtiments, équipements de chaque bâtiment (ascenseurs, eau, électricité,
+  portes...) et équipements communs (portail, grilles), un administrateur par copropriété
+- Incidents répartis sur `years` années selon la fréquence de panne de chaque type d'équipement,
+  plutôt en journée ; durée de résolution log-normale (quelques heures, parfois plusieurs jours),
+  les plus récents encore ouverts ; 5 % touchent un second équipement
+- Mises à jour d'incident (prise en compte, intervention, résolution), tickets des résidents
+  rattachés aux incidents (0 à 3, doublons regroupés) et demandes sans incident, commentaires
+  des administrateurs, maintenances planifiées par bâtiment (passées et à venir)
+- Agrégat journalier de disponibilité des copropriétés générées calculé à la suite
+  (comme backfill_availability) : les statistiques publiques reflètent les incidents générés
+- Déterministe : même graine et même date de fin (--until, défaut : aujourd'hui) = mêmes données
+- Insertion par lots : COPY sous PostgreSQL (psycopg2), INSERT par lots ailleurs (SQLite)
+- Les données sont ajoutées à celles de la base (identifiants à la suite des existants)
+"""
+import argparse
+import csv
+import io
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import func, select, text
+
+from app.auth import get_password_hash
+from app.core.bootstrap import bootstrap_database
+from app.db import SessionLocal, engine
+from app.models.availability import EquipmentDailyAvailability
+from app.models.copro import Copro, Building, ServiceInstance
+from app.models.maintenance import Maintenance, maintenance_service_instances
+from app.models.status import Incident, IncidentStatus, IncidentUpdate, incident_service_instances
+from app.models.ticket import Ticket, TicketStatus, TicketType
+from app.models.ticket_comment import TicketComment
+from app.models.user import User
+from app.services.availability import refresh_daily_availability
+
+# Tables remplies, dans l'ordre des clés étrangères (parents d'abord), et leurs colonnes
+TABLE_COLUMNS = {
+    Copro.__table__: ["id", "name", "slug", "city", "postal_code", "country", "is_active", "created_at"],
+    Building.__table__: ["id", "copro_id", "name", "is_active", "order", "created_at"],
+    ServiceInstance.__table__: ["id", "copro_id", "building_id", "name", "identifier", "status", "is_active", "order", "created_at"],
+    User.__table__: ["id", "email", "hashed_password", "is_active", "is_superuser", "token_version",
+                     "first_name", "last_name", "copro_id", "created_at"],
+    Incident.__table__: ["id", "copro_id", "service_instance_id", "title", "message", "status",
+                         "is_scheduled", "created_at", "updated_at", "resolved_at"],
+    incident_service_instances: ["incident_id", "service_instance_id"],
+    IncidentUpdate.__table__: ["id", "incident_id", "message", "status", "created_at"],
+    Ticket.__table__: ["id", "copro_id", "service_instance_id", "reporter_name", "reporter_email", "title",
+                       "description", "type", "status", "report_count", "last_reported_at", "incident_id", "created_at"],
+    TicketComment.__table__: ["id", "ticket_id", "admin_id", "comment", "created_at"],
+    Maintenance.__table__: ["id", "copro_id", "title", "description", "start_date", "end_date", "created_at"],
+    maintenance_service_instances: ["maintenance_id", "service_instance_id"],
+}
+
+# Type d'équipement : (nom, pannes par an, titres de déclaration)
+EQUIPMENT_TYPES = {
+    "elevator": ("Ascenseur", 10.0, ["Ascenseur en panne", "Ascenseur bloqué", "Ascenseur à l'arrêt entre deux étages"]),
+    "lighting": ("Éclairage", 5.0, ["Éclairage du hall en panne", "Lumière de l'escalier hors service"]),
+    "hot_water": ("Eau chaude", 3.0, ["Plus d'eau chaude", "Eau tiède au robinet"]),
+    "cold_water": ("Eau froide", 1.5, ["Coupure d'eau froide", "Fuite d'eau"]),
+    "electricity": ("Électricité", 1.0, ["Coupure de courant", "Disjoncteur des parties communes"]),
+    "entrance": ("Porte d'entrée", 4.0, ["Porte d'entrée bloquée", "Digicode hors service"]),
+    "parking_door": ("Porte parking", 8.0, ["Porte du parking bloquée", "Télécommande du parking inopérante"]),
+    "car_gate": ("Grille voiture", 4.0, ["Grille voiture bloquée ouverte", "Grille voiture ne s'ouvre plus"]),
+    "pedestrian_gate": ("Grille piéton", 3.0, ["Grille piéton bloquée", "Serrure de la grille piéton cassée"]),
+}
+BUILDING_EQUIPMENTS = ["elevator", "lighting", "hot_water", "cold_water", "electricity", "entrance"]
+SHARED_EQUIPMENTS = ["parking_door", "car_gate", "pedestrian_gate"]
+CITIES = [("Paris", "75011"), ("Lyon", "69003"), ("Marseille", "13008"), ("Lille", "59000"), ("Nantes", "44000")]
+FIRST_NAMES = ["Camille", "Dominique", "Claude", "Alex", "Sacha", "Morgan", "Charlie", "Maxime"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand"]
+# Poids des heures de déclaration (la nuit, peu de pannes constatées)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 10, 9, 8, 8, 9, 8, 7, 7, 8, 10, 11, 10, 8, 6, 4, 2]
+HOUR_CUM_WEIGHTS = list(accumulate(HOUR_WEIGHTS))
+# Durée de résolution log-normale : médiane de 6 h, plafonnée à 30 jours
+RESOLUTION_MEDIAN_HOURS = 6
+RESOLUTION_SIGMA = 1.2
+RESOLUTION_MAX_HOURS = 30 * 24
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_ADMIN_PASSWORD = "synthetic"
+
+
+def admin_email(copro_id) -> str:
+    """Email de l'administrateur généré pour une copropriété (mot de passe : --admin-password)"""
+    return f"admin-{copro_id}@synthetic.example"
+
+
+class BulkWriter:
+    """Lignes mises en tampon puis insérées par lots : COPY sous PostgreSQL, INSERT par lots ailleurs
+
+    Les tampons sont vidés ensemble, dans l'ordre de TABLE_COLUMNS, pour respecter les clés étrangères.
+    """
+
+    def __init__(self, conn, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        self.counts: Counter = Counter()
+        self._rows: Dict[object, List[tuple]] = defaultdict(list)
+        self._buffered = 0
+
+    def add(self, table, *values) -> None:
+        self._rows[table].append(values)
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for table, columns in TABLE_COLUMNS.items():
+            rows = self._rows.pop(table, None)
+            if not rows:
+                continue
+            if self.use_copy:
+                self._copy(table, columns, rows)
+            else:
+                self.conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+            self.counts[table.name] += len(rows)
+        self._buffered = 0
+        self.conn.commit()
+
+    def _copy(self, table, columns: Sequence[str], rows: List[tuple]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # CSV : champ vide = NULL ; enums stockés par leur nom
+            writer.writerow(["" if value is None else value.name if isinstance(value, Enum) else value for value in row])
+        buffer.seek(0)
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({quoted}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+
+class IdSequence:
+    """Identifiants explicites à la suite des existants (les liens sont écrits sans relecture)"""
+
+    def __init__(self, conn):
+        self._next = {}
+        for table in TABLE_COLUMNS:
+            if "id" in table.c:
+                self._next[table.name] = (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+    def __call__(self, table) -> int:
+        value = self._next[table.name]
+        self._next[table.name] = value + 1
+        return value
+
+
+def _random_moment(rng: random.Random, start: datetime, days: int) -> datetime:
+    """Instant de la période, plutôt en journée"""
+    day = start + timedelta(days=rng.randrange(days))
+    hour = rng.choices(range(24), cum_weights=HOUR_CUM_WEIGHTS)[0]
+    return day + timedelta(hours=hour, minutes=rng.randrange(60), seconds=rng.randrange(60))
+
+
+def _reset_sequences(conn) -> None:
+    """PostgreSQL : séquences des clés primaires après des insertions à identifiant explicite"""
+    for table in TABLE_COLUMNS:
+        if "id" in table.c:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            ))
+    conn.commit()
+
+
+def generate_dataset(
+    copros: int = 10,
+    incidents: int = 100_000,
+    years: int = 3,
+    seed: int = 42,
+    until: Optional[date] = None,
+    admin_password: str = DEFAULT_ADMIN_PASSWORD,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Counter:
+    """Ajouter le jeu de données à la base ; retourne le nombre de lignes insérées par table"""
+    rng = random.Random(seed)
+    until = until or datetime.utcnow().date()
+    end = datetime(until.year, until.month, until.day, tzinfo=timezone.utc)
+    history_days = years * 365
+    start = end - timedelta(days=history_days)
+    # Un seul calcul bcrypt, partagé par tous les administrateurs générés
+    hashed_password = get_password_hash(admin_password)
+    started = time.monotonic()
+
+    with engine.connect() as conn:
+        next_id = IdSequence(conn)
+        writer = BulkWriter(conn, batch_size)
+
+        # Copropriétés, bâtiments, équipements, administrateurs
+        equipments = []  # (id, copro_id, building_id, type)
+        buildings_by_copro = defaultdict(list)
+        admin_by_copro = {}
+        for _ in range(copros):
+            copro_id = next_id(Copro.__table__)
+            city, postal_code = rng.choice(CITIES)
+            writer.add(Copro.__table__, copro_id, f"Résidence synthétique {copro_id}", f"synthetic-{copro_id}",
+                       city, postal_code, "France", True, start)
+            for b in range(rng.randint(1, 4)):
+                building_id = next_id(Building.__table__)
+                buildings_by_copro[copro_id].append(building_id)
+                writer.add(Building.__table__, building_id, copro_id, f"Bâtiment {chr(ord('A') + b)}", True, b, start)
+                kinds = BUILDING_EQUIPMENTS + (["elevator"] if rng.random() < 0.5 else [])
+                if b == 0:
+                    kinds = kinds + SHARED_EQUIPMENTS
+                for order, kind in enumerate(kinds):
+                    equipment_id = next_id(ServiceInstance.__table__)
+                    name = EQUIPMENT_TYPES[kind][0] + (f" {chr(ord('A') + b)}" if kind not in SHARED_EQUIPMENTS else "")
+                    if kind == "elevator" and kinds.count("elevator") > 1:
+                        name += f" {kinds[:order + 1].count('elevator')}"
+                    writer.add(ServiceInstance.__table__, equipment_id, copro_id, building_id, name,
+                               f"{kind.upper()}-{equipment_id}", "operational", True, order, start)
+                    equipments.append((equipment_id, copro_id, building_id, kind))
+            admin_id = next_id(User.__table__)
+            admin_by_copro[copro_id] = admin_id
+            writer.add(User.__table__, admin_id, admin_email(copro_id), hashed_password, True, True, 0,
+                       rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), copro_id, start)
+
+        equipments_by_building = defaultdict(list)
+        for equipment in equipments:
+            equipments_by_building[equipment[2]].append(equipment)
+
+        # Incidents (répartis selon la fréquence de panne de chaque type), mises à jour, tickets
+        cum_weights = list(accumulate(EQUIPMENT_TYPES[kind][1] for _, _, _, kind in equipments))
+        for n in range(incidents):
+            equipment_id, copro_id, building_id, kind = rng.choices(equipments, cum_weights=cum_weights)[0]
+            label, _, titles = EQUIPMENT_TYPES[kind]
+            created_at = _random_moment(rng, start, history_days)
+            hours = min(RESOLUTION_MAX_HOURS, rng.lognormvariate(math.log(RESOLUTION_MEDIAN_HOURS), RESOLUTION_SIGMA))
+            resolved_at = created_at + timedelta(hours=hours)
+            if resolved_at > end:
+                resolved_at = None
+                status = rng.choice([IncidentStatus.INVESTIGATING, IncidentStatus.IN_PROGRESS])
+            else:
+                status = IncidentStatus.RESOLVED if rng.random() < 0.7 else IncidentStatus.CLOSED
+            title = rng.choice(titles)
+            incident_id = next_id(Incident.__table__)
+            writer.add(Incident.__table__, incident_id, copro_id, equipment_id, title,
+                       f"{label} : intervention du prestataire demandée", status, False, created_at,
+                       resolved_at or created_at, resolved_at)
+            writer.add(incident_service_instances, incident_id, equipment_id)
+            if rng.random() < 0.05:
+                neighbours = [e for e in equipments_by_building[building_id] if e[0] != equipment_id]
+                if neighbours:
+                    writer.add(incident_service_instances, incident_id, rng.choice(neighbours)[0])
+
+            writer.add(IncidentUpdate.__table__, next_id(IncidentUpdate.__table__), incident_id,
+                       "Incident pris en compte", IncidentStatus.INVESTIGATING, created_at)
+            if status != IncidentStatus.INVESTIGATING:
+                intervention = created_at + (((resolved_at or end) - created_at) * rng.uniform(0.1, 0.6))
+                writer.add(IncidentUpdate.__table__, next_id(IncidentUpdate.__table__), incident_id,
+                           "Intervention du prestataire en cours", IncidentStatus.IN_PROGRESS, intervention)
+            if resolved_at is not None:
+                writer.add(IncidentUpdate.__table__, next_id(IncidentUpdate.__table__), incident_id,
+                           "Équipement remis en service", IncidentStatus.RESOLVED, resolved_at)
+
+            # Déclarations des résidents : souvent une, parfois aucune, parfois plusieurs
+            for _ in range(rng.choices((0, 1, 2, 3), weights=(30, 50, 15, 5))[0]):
+                reported_at = created_at + timedelta(minutes=rng.randint(1, 120))
+                if reported_at > end:
+                    continue
+                report_count = rng.choices((1, 2, 3, 5), weights=(70, 15, 10, 5))[0]
+                if resolved_at is None:
+                    ticket_status = TicketStatus.IN_PROGRESS if status == IncidentStatus.IN_PROGRESS else TicketStatus.ANALYZING
+                else:
+                    ticket_status = TicketStatus.RESOLVED if rng.random() < 0.6 else TicketStatus.CLOSED
+                _add_ticket(writer, rng, next_id, admin_by_copro[copro_id], copro_id, equipment_id, title,
+                            TicketType.INCIDENT, ticket_status, report_count, incident_id, reported_at, end)
+
+            if (n + 1) % 100_000 == 0:
+                print(f"  🔄 {n + 1}/{incidents} incidents")
+
+        # Demandes sans incident (environ une pour dix incidents)
+        for _ in range(incidents // 10):
+            equipment_id, copro_id, _, kind = rng.choice(equipments)
+            created_at = _random_moment(rng, start, history_days)
+            recent = created_at > end - timedelta(days=14)
+            ticket_status = rng.choice([TicketStatus.ANALYZING, TicketStatus.IN_PROGRESS]) if recent else TicketStatus.CLOSED
+            _add_ticket(writer, rng, next_id, admin_by_copro[copro_id], copro_id, equipment_id,
+                        f"Demande : {EQUIPMENT_TYPES[kind][0].lower()}", TicketType.REQUEST, ticket_status,
+                        1, None, created_at, end)
+
+        # Maintenances planifiées : toutes les 1 à 2 mois par bâtiment, jusqu'à 2 mois à venir
+        for copro_id, building_ids in buildings_by_copro.items():
+            for building_id in building_ids:
+                moment = start + timedelta(days=rng.randint(0, 60))
+                while moment < end + timedelta(days=60):
+                    begin = moment.replace(hour=rng.choice((8, 9, 10, 14)), minute=0, second=0)
+                    maintenance_id = next_id(Maintenance.__table__)
+                    targets = rng.sample(equipments_by_building[building_id], k=min(len(equipments_by_building[building_id]), rng.randint(1, 3)))
+                    writer.add(Maintenance.__table__, maintenance_id, copro_id,
+                               f"Maintenance {EQUIPMENT_TYPES[targets[0][3]][0].lower()}",
+                               "Entretien périodique", begin, begin + timedelta(hours=rng.randint(1, 8)),
+                               begin - timedelta(days=14))
+                    for target in targets:
+                        writer.add(maintenance_service_instances, maintenance_id, target[0])
+                    moment += timedelta(days=rng.randint(30, 60))
+
+        writer.flush()
+        if conn.dialect.name == "postgresql":
+            _reset_sequences(conn)
+        conn.commit()
+
+    equipment_ids_by_copro = defaultdict(list)
+    for equipment_id, copro_id, _, _ in equipments:
+        equipment_ids_by_copro[copro_id].append(equipment_id)
+    writer.counts[EquipmentDailyAvailability.__tablename__] = _refresh_availability(
+        equipment_ids_by_copro, start.year, max(end.year, date.today().year)
+    )
+    with engine.connect() as conn:
+        # Statistiques du planificateur à jour pour les mesures qui suivent
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+    elapsed = time.monotonic() - started
+    total = sum(writer.counts.values())
+    print(f"✅ {total} lignes insérées en {elapsed:.1f}s ({total / max(elapsed, 1e-9) * 60:,.0f} lignes/min)")
+    for table, count in writer.counts.items():
+        print(f"  {table}: {count}")
+    return writer.counts
+
+
+def _refresh_availability(equipment_ids_by_copro: Dict[int, List[int]], first_year: int, last_year: int) -> int:
+    """Calculer l'agrégat journalier de disponibilité, année par année ; retourne le nombre de lignes"""
+    db = SessionLocal()
+    try:
+        for copro_id, equipment_ids in equipment_ids_by_copro.items():
+            for year in range(first_year, last_year + 1):
+                refresh_daily_availability(db, copro_id, equipment_ids, date(year, 1, 1), date(year, 12, 31))
+            db.commit()
+        return db.query(EquipmentDailyAvailability).filter(
+            EquipmentDailyAvailability.copro_id.in_(list(equipment_ids_by_copro))
+        ).count()
+    finally:
+        db.close()
+
+
+def _add_ticket(writer, rng, next_id, admin_id, copro_id, equipment_id, title, ticket_type, ticket_status,
+                report_count, incident_id, created_at, end) -> None:
+    ticket_id = next_id(Ticket.__table__)
+    last_reported_at = created_at + timedelta(minutes=rng.randint(5, 240)) if report_count > 1 else None
+    writer.add(Ticket.__table__, ticket_id, copro_id, equipment_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+               f"resident{rng.randrange(10_000)}@synthetic.example", title, "Constaté ce jour", ticket_type,
+               ticket_status, report_count, last_reported_at, incident_id, created_at)
+    # Commentaires des administrateurs sur les tickets pris en charge
+    if ticket_status != TicketStatus.ANALYZING:
+        for _ in range(rng.choices((0, 1, 2), weights=(40, 45, 15))[0]):
+            commented_at = created_at + timedelta(hours=rng.uniform(0.5, 48))
+            if commented_at <= end:
+                writer.add(TicketComment.__table__, next_id(TicketComment.__table__), ticket_id, admin_id,
+                           "Prestataire contacté", commented_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générer un jeu de données synthétique volumineux")
+    parser.add_argument("--copros", type=int, default=10, help="Nombre de copropriétés")
+    parser.add_argument("--incidents", type=int, default=100_000, help="Nombre d'incidents (toutes copropriétés)")
+    parser.add_argument("--years", type=int, default=3, help="Profondeur de l'historique (années)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine (même graine = mêmes données)")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="Date de fin de l'historique (AAAA-MM-JJ)")
+    parser.add_argument("--admin-password", default=DEFAULT_ADMIN_PASSWORD, help="Mot de passe des administrateurs générés")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Lignes par lot")
+    args = parser.parse_args()
+
+    print(f"🔄 Génération : {args.copros} copropriété(s), {args.incidents} incidents sur {args.years} an(s) (graine {args.seed})")
+    try:
+        bootstrap_database()
+        generate_dataset(
+            copros=args.copros, incidents=args.incidents, years=args.years, seed=args.seed,
+            until=args.until, admin_password=args.admin_password, batch_size=args.batch_size,
+        )
+    except Exception as e:
+        print(f"❌ Erreur lors de la génération: {e}")
+        raise
+    print(f"✅ Administrateurs : {admin_email('<id de la copropriété>')} (mot de passe : {args.admin_password})")
+
+
+if __name__ == "__main__":
+    main()
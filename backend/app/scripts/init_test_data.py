@@ -15,6 +15,7 @@ from app.models.user import User
 from app.models.ticket import Ticket, TicketStatus, TicketType
 from app.models.ticket_comment import TicketComment
 from app.models.status import Incident, IncidentUpdate, IncidentComment
+from app.models.availability import EquipmentDailyAvailability
 from app.models.maintenance import Maintenance
 from sqlalchemy import text
 import bcrypt
@@ -129,7 +130,8 @@ def init_test_data():
             if users_updated > 0:
                 print(f"  ✅ Détaché {users_updated} utilisateurs de la copropriété")
             
-            # 8. Supprimer les équipements (ServiceInstance) - après les maintenances
+            # 8. Supprimer l'agrégat de disponibilité puis les équipements (ServiceInstance) - après les maintenances
+            db.query(EquipmentDailyAvailability).filter(EquipmentDailyAvailability.copro_id == copro_id).delete()
             equipments_count = db.query(ServiceInstance).filter(ServiceInstance.copro_id == copro_id).count()
             db.query(ServiceInstance).filter(ServiceInstance.copro_id == copro_id).delete()
             if equipments_count > 0:
@@ -149,6 +151,7 @@ def init_test_data():
         # 3. Créer la copropriété
         copro = Copro(
             name="Copropriété de Test",
+            slug="copropriete-de-test",
             address="123 Rue de la Test",
             city="Paris",
             postal_code="75001",
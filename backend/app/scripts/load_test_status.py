@@ -0,0 +1,102 @@
+"""
+Test de charge de la page de statut : N clients interrogent l'endpoint en continu
+et on mesure la latence (p50/p95/p99) et le débit.
+Usage: python -m app.scripts.load_test_status --url http://localhost:8000 --pollers 200 --duration 30
+
+Pour comparer avant/après, lancer le script contre chaque version du backend
+(même base, mêmes paramètres) et comparer les percentiles affichés.
+Option --slow-path : envoie en parallèle des requêtes vers un endpoint lent
+(ex: /api/v1/public/statistics/general) pour vérifier qu'il ne bloque plus les autres.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(sorted_values, p):
+    """Percentile par la méthode du rang le plus proche (valeurs déjà triées)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def poller(client, path, deadline, interval, latencies, errors):
+    """Un client qui interroge l'endpoint en boucle jusqu'à la deadline"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        if interval:
+            await asyncio.sleep(interval)
+
+
+async def run_load_test(url, path, pollers, duration, interval, slow_path=None):
+    """Lancer les pollers en parallèle et retourner les mesures"""
+    latencies = []
+    errors = []
+    slow_latencies = []
+    limits = httpx.Limits(max_connections=pollers + 10, max_keepalive_connections=pollers + 10)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        # Requête de chauffe (connexions, caches)
+        await client.get(path)
+        deadline = time.perf_counter() + duration
+        tasks = [
+            asyncio.create_task(poller(client, path, deadline, interval, latencies, errors))
+            for _ in range(pollers)
+        ]
+        if slow_path:
+            tasks.append(asyncio.create_task(poller(client, slow_path, deadline, 0, slow_latencies, errors)))
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return latencies, errors, slow_latencies, elapsed
+
+
+def print_report(label, latencies, elapsed):
+    """Afficher les percentiles en millisecondes"""
+    values = sorted(latencies)
+    if not values:
+        print(f"  {label}: aucune réponse")
+        return
+    print(
+        f"  {label}: {len(values)} requêtes, {len(values) / elapsed:.1f} req/s, "
+        f"p50={percentile(values, 50) * 1000:.1f}ms "
+        f"p95={percentile(values, 95) * 1000:.1f}ms "
+        f"p99={percentile(values, 99) * 1000:.1f}ms "
+        f"max={values[-1] * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de /status/status")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL du backend")
+    parser.add_argument("--path", default="/api/v1/status/status", help="Endpoint interrogé")
+    parser.add_argument("--pollers", type=int, default=200, help="Nombre de clients simultanés")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée du test en secondes")
+    parser.add_argument("--interval", type=float, default=0.0, help="Pause entre deux requêtes d'un client (s)")
+    parser.add_argument("--slow-path", default=None, help="Endpoint lent interrogé en parallèle")
+    args = parser.parse_args()
+
+    print(f"🔄 {args.pollers} clients sur {args.url}{args.path} pendant {args.duration:.0f}s...")
+    latencies, errors, slow_latencies, elapsed = asyncio.run(
+        run_load_test(args.url, args.path, args.pollers, args.duration, args.interval, args.slow_path)
+    )
+    print("✅ Résultats")
+    print_report(args.path, latencies, elapsed)
+    if args.slow_path:
+        print_report(args.slow_path, slow_latencies, elapsed)
+    if errors:
+        print(f"⚠️  {len(errors)} erreurs (ex: {errors[:5]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from app.db import SessionLocal, engine, Base
 from app.models.copro import Copro, Building, ServiceInstance
 from app.models.status import ServiceStatus
+from app.core.tenant import unique_copro_slug
 
 
 def create_sample_copro():
@@ -21,6 +22,7 @@ def create_sample_copro():
         # 1. Créer la copropriété
         copro = Copro(
             name="Résidence Les Jardins",
+            slug=unique_copro_slug(db, "Résidence Les Jardins"),
             address="123 Avenue de la République",
             city="Paris",
             postal_code="75011",
@@ -112,7 +114,7 @@ def create_custom_copro(name: str, buildings: list, equipment_names: list):
     
     try:
         # Créer la copropriété
-        copro = Copro(name=name)
+        copro = Copro(name=name, slug=unique_copro_slug(db, name))
         db.add(copro)
         db.commit()
         db.refresh(copro)
@@ -0,0 +1,3 @@
+# Services métier (caches, calculs partagés entre endpoints)
+
+
@@ -0,0 +1,295 @@
+"""
+Pièces jointes des tickets (photos)
+- Réception en flux : le corps multipart est analysé au fil de l'eau et chaque fichier est
+  écrit sur disque par morceaux, jamais entièrement en mémoire, en calculant son SHA-256
+- Stockage adressé par contenu : ATTACHMENT_STORE_DIR/ab/cd/<sha256>.<ext> ; deux envois
+  identiques ne sont stockés qu'une fois
+- Le type est déterminé par les premiers octets (JPEG, PNG, WebP, GIF), pas par le client
+- Miniatures JPEG générées dans un pool de threads borné (si Pillow est installé ;
+  sinon l'original est servi à la place)
+- Fichiers servis avec les requêtes Range et un cache navigateur long : le contenu
+  d'une clé ne change jamais
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow absent : pas de miniatures
+    Image = None
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp|gif)$")
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """Extension d'après la signature du fichier, None si ce n'est pas une image acceptée"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    return None
+
+
+def attachment_urls(key: str) -> dict:
+    """URLs publiques d'une pièce jointe (original et miniature)"""
+    base = f"{settings.API_V1_STR}/public/attachments/{key}"
+    return {"id": key, "url": base, "thumbnail_url": f"{base}/thumbnail"}
+
+
+class AttachmentStore:
+    """Fichiers adressés par contenu et leurs miniatures"""
+
+    def __init__(self, root: str, max_bytes: int, thumbnail_size: int, thumbnail_workers: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_workers = thumbnail_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def path(self, key: str) -> Path:
+        return self.root / "files" / key[:2] / key[2:4] / key
+
+    def thumbnail_path(self, key: str) -> Path:
+        return self.root / "thumbs" / key[:2] / key[2:4] / f"{key.split('.')[0]}.jpg"
+
+    def exists(self, key: str) -> bool:
+        return bool(KEY_PATTERN.match(key)) and self.path(key).is_file()
+
+    def open_temporary(self):
+        """Fichier temporaire sur le même disque que le stockage (déplacement atomique)"""
+        directory = self.root / "tmp"
+        directory.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=directory, delete=False)
+
+    def commit(self, temporary_path: str, digest: str, extension: str) -> str:
+        """Ranger un fichier reçu sous sa clé ; un contenu déjà stocké n'est pas dupliqué"""
+        key = f"{digest}.{extension}"
+        target = self.path(key)
+        if target.exists():
+            os.unlink(temporary_path)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temporary_path, target)
+        return key
+
+    def _make_thumbnail(self, key: str) -> None:
+        target = self.thumbnail_path(key)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(self.path(key)) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+            with tempfile.NamedTemporaryFile(dir=target.parent, suffix=".jpg", delete=False) as output:
+                image.convert("RGB").save(output, "JPEG", quality=80, optimize=True)
+        os.replace(output.name, target)
+
+    async def ensure_thumbnail(self, key: str) -> None:
+        """Générer la miniature hors de la boucle d'événements (image illisible : ignorée)"""
+        if Image is None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.thumbnail_workers, thread_name_prefix="thumbnail")
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._make_thumbnail, key)
+        except Exception as e:
+            print(f"⚠️  Miniature de {key} impossible: {e}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class _Upload:
+    """Fichier en cours de réception"""
+
+    def __init__(self, store: AttachmentStore):
+        self.file = store.open_temporary()
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+
+    def discard(self) -> None:
+        self.file.close()
+        os.unlink(self.file.name)
+
+
+async def receive_uploads(request: Request, store: AttachmentStore, max_files: int) -> List[str]:
+    """Lire un corps multipart en flux et stocker ses fichiers ; retourne leurs clés
+
+    Les fichiers reçus restent temporaires jusqu'à la fin du corps : si une partie est refusée
+    (type, taille, nombre) ou si l'envoi est interrompu, aucun n'est rangé dans le stockage.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envoi multipart/form-data attendu")
+
+    # Les callbacks du parseur sont synchrones : ils notent les événements, traités ensuite
+    events: List[Tuple[str, bytes]] = []
+    header = {"name": b"", "value": b"", "disposition": b""}
+
+    def on_header_field(data, start, end):
+        header["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        if header["name"].lower() == b"content-disposition":
+            header["disposition"] = header["value"]
+        header["name"], header["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(header["disposition"])
+        events.append(("begin", b"file" if b"filename" in options else b""))
+        header["disposition"] = b""
+
+    callbacks = {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", b"")),
+    }
+    parser = MultipartParser(params[b"boundary"], callbacks)
+
+    staged: List[Tuple[str, str, str]] = []  # (fichier temporaire, SHA-256, extension)
+    current: Optional[_Upload] = None
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except Exception:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corps multipart invalide")
+            pending, events[:] = list(events), []
+            for kind, data in pending:
+                if kind == "begin" and data:
+                    if len(staged) >= max_files:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"{max_files} fichiers au maximum"
+                        )
+                    current = _Upload(store)
+                elif kind == "data" and current is not None:
+                    current.size += len(data)
+                    if current.size > store.max_bytes:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Fichier trop volumineux ({store.max_bytes // (1024 * 1024)} Mo maximum)"
+                        )
+                    if len(current.head) < 12:
+                        current.head += data[:12]
+                    current.digest.update(data)
+                    await asyncio.to_thread(current.file.write, data)
+                elif kind == "end" and current is not None:
+                    upload, current = current, None
+                    upload.file.close()
+                    extension = sniff_extension(upload.head)
+                    if extension is None:
+                        os.unlink(upload.file.name)
+                        raise HTTPException(
+                            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Seules les images JPEG, PNG, WebP et GIF sont acceptées"
+                        )
+                    staged.append((upload.file.name, upload.digest.hexdigest(), extension))
+        parser.finalize()
+        keys = [store.commit(*upload) for upload in staged]
+        staged = []
+    finally:
+        if current is not None:
+            current.discard()
+        for temporary_path, _, _ in staged:
+            Path(temporary_path).unlink(missing_ok=True)
+
+    if not keys:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Aucun fichier reçu")
+    for key in keys:
+        await store.ensure_thumbnail(key)
+    return keys
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Plage demandée (début, fin inclusive) ; None pour servir le fichier entier
+    (en-tête absent, mal formé ou à plusieurs plages). ValueError si la plage est hors du fichier."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        length = int(match.group(2))
+        if length == 0:
+            raise ValueError(range_header)
+        return max(0, size - length), size - 1
+    start = int(match.group(1))
+    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size or start > end:
+        raise ValueError(range_header)
+    return start, end
+
+
+def _iter_file(path: Path, start: int, end: int) -> Iterator[bytes]:
+    # Générateur synchrone : Starlette le parcourt dans son pool de threads
+    with open(path, "rb") as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = source.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request: Request, path: Path, key: str, content_type: str) -> Response:
+    """Servir un fichier immuable (Range, ETag, Cache-Control long)"""
+    etag = f'"{key}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"public, max-age={settings.ATTACHMENT_CACHE_MAX_AGE_SECONDS}, immutable",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    size = path.stat().st_size
+    try:
+        byte_range = _parse_range(request.headers.get("range", ""), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    status_code = status.HTTP_200_OK
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_iter_file(path, start, end), status_code=status_code, media_type=content_type, headers=headers)
+
+
+attachment_store = AttachmentStore(
+    root=settings.ATTACHMENT_STORE_DIR,
+    max_bytes=settings.ATTACHMENT_MAX_BYTES,
+    thumbnail_size=settings.ATTACHMENT_THUMBNAIL_SIZE,
+    thumbnail_workers=settings.ATTACHMENT_THUMBNAIL_WORKERS,
+)
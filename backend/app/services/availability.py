@@ -0,0 +1,441 @@
+"""
+Calcul de la disponibilité des équipements sur une période
+- Temps d'indisponibilité = union des intervalles [début, fin) par équipement :
+  deux incidents qui se chevauchent sur le même équipement ne sont comptés qu'une fois
+- Incidents rattachés via le lien historique service_instance_id et la table de liaison
+  incident_service_instances
+- Les journées complètes sont lues dans l'agrégat equipment_daily_availability, mis à jour
+  à chaque écriture d'incident ; seuls les incidents non résolus et les journées partielles
+  en début / fin de période sont calculés à partir des incidents
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, case, func as sql_func, or_, select, union
+from sqlalchemy.orm import Session
+
+from app.models.availability import EquipmentDailyAvailability
+from app.models.copro import ServiceInstance
+from app.models.status import Incident, incident_service_instances
+
+Interval = Tuple[datetime, datetime]
+# (copro_id, équipements, premier jour, dernier jour, non résolu) couverts par un incident dans l'agrégat
+Footprint = Tuple[int, Set[int], date, date, bool]
+
+ONE_DAY = timedelta(days=1)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """S'assurer que les dates sont timezone-aware pour la comparaison"""
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _midnight(day: date) -> datetime:
+    """Début de journée (UTC)"""
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Union d'intervalles semi-ouverts [début, fin) par tri puis balayage (O(n log n))
+
+    Les intervalles vides sont ignorés, les intervalles qui se chevauchent ou se touchent
+    sont fusionnés.
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(i for i in intervals if i[1] > i[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def total_duration_hours(intervals: Iterable[Interval]) -> float:
+    """Durée cumulée (en heures) de l'union des intervalles"""
+    return sum((end - start).total_seconds() for start, end in merge_intervals(intervals)) / 3600
+
+
+def fetch_equipment_incidents(
+    db: Session,
+    copro_id: int,
+    equipment_ids: Sequence[int],
+    start_date: datetime,
+    end_date: datetime,
+) -> Dict[int, list]:
+    """Incidents actifs sur la période, regroupés par équipement
+
+    Un incident est rattaché à chacun de ses équipements (table de liaison) ainsi qu'à
+    son équipement historique (service_instance_id) ; les doublons sont éliminés par l'UNION.
+    """
+    incidents_by_equipment: Dict[int, list] = defaultdict(list)
+    if not equipment_ids:
+        return incidents_by_equipment
+
+    overlaps_period = and_(
+        Incident.copro_id == copro_id,
+        Incident.created_at <= end_date,
+        or_(Incident.resolved_at.is_(None), Incident.resolved_at >= start_date)
+    )
+    legacy_link = select(
+        Incident.id.label("incident_id"),
+        Incident.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at"),
+        Incident.resolved_at.label("resolved_at")
+    ).where(
+        Incident.service_instance_id.in_(equipment_ids),
+        overlaps_period
+    )
+    multi_link = select(
+        Incident.id.label("incident_id"),
+        incident_service_instances.c.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at"),
+        Incident.resolved_at.label("resolved_at")
+    ).join(
+        incident_service_instances, incident_service_instances.c.incident_id == Incident.id
+    ).where(
+        incident_service_instances.c.service_instance_id.in_(equipment_ids),
+        overlaps_period
+    )
+    for row in db.execute(union(legacy_link, multi_link)).all():
+        incidents_by_equipment[row.service_instance_id].append(row)
+    return incidents_by_equipment
+
+
+
+def _open_incident_starts(
+    db: Session,
+    copro_id: int,
+    equipment_ids: Sequence[int],
+    end_date: datetime,
+) -> Dict[int, datetime]:
+    """Date de création du plus ancien incident non résolu de chaque équipement"""
+    if not equipment_ids:
+        return {}
+    is_open = and_(
+        Incident.copro_id == copro_id,
+        Incident.resolved_at.is_(None),
+        Incident.created_at.isnot(None),
+        Incident.created_at <= end_date
+    )
+    legacy_link = select(
+        Incident.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at")
+    ).where(Incident.service_instance_id.in_(equipment_ids), is_open)
+    multi_link = select(
+        incident_service_instances.c.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at")
+    ).join(
+        incident_service_instances, incident_service_instances.c.incident_id == Incident.id
+    ).where(incident_service_instances.c.service_instance_id.in_(equipment_ids), is_open)
+
+    open_since: Dict[int, datetime] = {}
+    for row in db.execute(union(legacy_link, multi_link)).all():
+        created = _as_utc(row.created_at)
+        if row.service_instance_id not in open_since or created < open_since[row.service_instance_id]:
+            open_since[row.service_instance_id] = created
+    return open_since
+
+
+def _resolved_after_period(
+    db: Session,
+    copro_id: int,
+    equipment_ids: Sequence[int],
+    created_from: datetime,
+    created_until: datetime,
+    end_date: datetime,
+) -> Dict[int, List[datetime]]:
+    """Incidents créés dans [created_from, created_until) et résolus après end_date, par équipement
+
+    L'agrégat compte leur durée de résolution complète ; la période n'en retient que la partie
+    antérieure à sa fin.
+    """
+    if not equipment_ids:
+        return {}
+    overflows = and_(
+        Incident.copro_id == copro_id,
+        Incident.created_at >= created_from,
+        Incident.created_at < created_until,
+        Incident.resolved_at > end_date
+    )
+    legacy_link = select(
+        Incident.id.label("incident_id"),
+        Incident.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at"),
+        Incident.resolved_at.label("resolved_at")
+    ).where(Incident.service_instance_id.in_(equipment_ids), overflows)
+    multi_link = select(
+        Incident.id.label("incident_id"),
+        incident_service_instances.c.service_instance_id.label("service_instance_id"),
+        Incident.created_at.label("created_at"),
+        Incident.resolved_at.label("resolved_at")
+    ).join(
+        incident_service_instances, incident_service_instances.c.incident_id == Incident.id
+    ).where(incident_service_instances.c.service_instance_id.in_(equipment_ids), overflows)
+
+    resolved_after: Dict[int, List[datetime]] = defaultdict(list)
+    for row in db.execute(union(legacy_link, multi_link)).all():
+        resolved_after[row.service_instance_id].append(_as_utc(row.resolved_at))
+    return resolved_after
+
+
+# ============ Agrégat journalier ============
+
+def refresh_daily_availability(
+    db: Session,
+    copro_id: int,
+    equipment_ids: Iterable[int],
+    first_day: date,
+    last_day: date,
+) -> None:
+    """Recalculer les lignes de l'agrégat (équipements × jours) à partir des incidents
+
+    Ne commit pas : à appeler dans la transaction qui modifie les incidents.
+    """
+    equipment_ids = list(equipment_ids)
+    if not equipment_ids or last_day < first_day:
+        return
+    db.query(EquipmentDailyAvailability).filter(
+        EquipmentDailyAvailability.service_instance_id.in_(equipment_ids),
+        EquipmentDailyAvailability.day >= first_day,
+        EquipmentDailyAvailability.day <= last_day
+    ).delete(synchronize_session=False)
+
+    range_start = _midnight(first_day)
+    range_end = _midnight(last_day) + ONE_DAY
+    incidents_by_equipment = fetch_equipment_incidents(db, copro_id, equipment_ids, range_start, range_end)
+
+    for equipment_id, incidents in incidents_by_equipment.items():
+        # jour -> [downtime_seconds, incident_count, resolved_count, resolution_seconds]
+        days: Dict[date, list] = defaultdict(lambda: [0.0, 0, 0, 0.0])
+        resolved_intervals: List[Interval] = []
+        for incident in incidents:
+            if not incident.created_at:
+                continue
+            created = _as_utc(incident.created_at)
+            resolved = _as_utc(incident.resolved_at) if incident.resolved_at else None
+            if first_day <= created.date() <= last_day:
+                stats = days[created.date()]
+                stats[1] += 1
+                if resolved:
+                    stats[2] += 1
+                    stats[3] += max(0.0, (resolved - created).total_seconds())
+            if resolved:
+                resolved_intervals.append((max(created, range_start), min(resolved, range_end)))
+
+        # Découper l'union des intervalles par journée
+        for start, end in merge_intervals(resolved_intervals):
+            while start < end:
+                chunk_end = min(end, _midnight(start.date()) + ONE_DAY)
+                days[start.date()][0] += (chunk_end - start).total_seconds()
+                start = chunk_end
+
+        db.add_all([
+            EquipmentDailyAvailability(
+                service_instance_id=equipment_id,
+                day=day,
+                copro_id=copro_id,
+                downtime_seconds=stats[0],
+                incident_count=stats[1],
+                resolved_count=stats[2],
+                resolution_seconds=stats[3]
+            )
+            for day, stats in days.items()
+        ])
+
+
+def incident_footprint(incident: Incident) -> Optional[Footprint]:
+    """Équipements et jours de l'agrégat concernés par un incident
+
+    À capturer avant de modifier un incident, pour recalculer aussi les anciens jours.
+    """
+    if not incident.created_at or not incident.copro_id:
+        return None
+    equipment_ids = {si.id for si in incident.service_instances}
+    if incident.service_instance_id:
+        equipment_ids.add(incident.service_instance_id)
+    first_day = _as_utc(incident.created_at).date()
+    last_day = _as_utc(incident.resolved_at).date() if incident.resolved_at else first_day
+    return incident.copro_id, equipment_ids, first_day, max(first_day, last_day), incident.resolved_at is None
+
+
+def refresh_incident_availability(
+    db: Session,
+    incident: Incident,
+    before: Optional[Footprint] = None,
+) -> Dict[int, Set[int]]:
+    """Mettre à jour l'agrégat après création / modification d'un incident (avant le commit)
+
+    Args:
+        before: empreinte de l'incident avant modification (incident_footprint)
+
+    Returns:
+        Années dont les statistiques changent, par copropriété (à invalider après le commit)
+    """
+    db.flush()
+    footprints = [fp for fp in (before, incident_footprint(incident)) if fp]
+    touched_years: Dict[int, Set[int]] = defaultdict(set)
+    current_year = datetime.utcnow().year
+    for copro_id, _, first_day, last_day, is_open in footprints:
+        # Un incident non résolu compte dans la disponibilité jusqu'à aujourd'hui
+        last_year = max(last_day.year, current_year) if is_open else last_day.year
+        touched_years[copro_id].update(range(first_day.year, last_year + 1))
+    if not footprints:
+        return touched_years
+
+    if len(touched_years) > 1:
+        for fp in footprints:
+            refresh_daily_availability(db, *fp[:4])
+        return touched_years
+    refresh_daily_availability(
+        db,
+        footprints[0][0],
+        set().union(*(fp[1] for fp in footprints)),
+        min(fp[2] for fp in footprints),
+        max(fp[3] for fp in footprints)
+    )
+    return touched_years
+
+
+# ============ Lecture ============
+
+def compute_equipment_availability(
+    db: Session,
+    copro_id: int,
+    equipments: Sequence[ServiceInstance],
+    start_date: datetime,
+    end_date: datetime,
+    total_hours: float,
+    now: Optional[datetime] = None,
+) -> List[dict]:
+    """Disponibilité, nombre d'incidents et temps moyen de résolution par équipement
+
+    Args:
+        equipments: équipements à inclure (l'ordre est conservé dans le résultat)
+        start_date, end_date: période (timezone-aware) ; les durées sont limitées à la période,
+            une fin à 23:59:59 désigne la fin de la journée
+        total_hours: durée de référence de la période en heures
+        now: date de fin des incidents non résolus (par défaut : maintenant)
+
+    Les incidents comptés (nombre, temps moyen de résolution) sont ceux créés dans la période ;
+    l'indisponibilité inclut aussi les incidents créés avant et encore actifs dans la période.
+    """
+    now_utc = _as_utc(now) if now else datetime.utcnow().replace(tzinfo=timezone.utc)
+    equipment_ids = [equipment.id for equipment in equipments]
+
+    # Une fin à 23:59:59 couvre la journée, comme total_hours (compté en journées entières)
+    if end_date == _midnight(end_date.date()) + ONE_DAY - timedelta(seconds=1):
+        end_date += timedelta(seconds=1)
+    # Journées entièrement couvertes par la période
+    first_day = start_date.date() if start_date == _midnight(start_date.date()) else start_date.date() + ONE_DAY
+    last_day = end_date.date() - ONE_DAY
+    head = (start_date, min(_midnight(first_day), end_date)) if start_date < _midnight(first_day) else None
+    tail_start = max(_midnight(last_day) + ONE_DAY, start_date)
+    tail = (tail_start, end_date) if tail_start < end_date else None
+
+    # Incidents non résolus : calculés à la volée depuis le jour de leur création
+    live_since = {
+        equipment_id: max(start_date, _midnight(created.date()))
+        for equipment_id, created in _open_incident_starts(db, copro_id, equipment_ids, end_date).items()
+    }
+
+    # Journées complètes : une requête agrégée sur l'agrégat journalier
+    totals: Dict[int, list] = {}
+    if equipment_ids and first_day <= last_day:
+        downtime = EquipmentDailyAvailability.downtime_seconds
+        if live_since:
+            downtime = case(
+                *[
+                    (and_(
+                        EquipmentDailyAvailability.service_instance_id == equipment_id,
+                        EquipmentDailyAvailability.day >= since.date()
+                    ), 0.0)
+                    for equipment_id, since in live_since.items()
+                ],
+                else_=EquipmentDailyAvailability.downtime_seconds
+            )
+        rows = db.query(
+            EquipmentDailyAvailability.service_instance_id,
+            sql_func.sum(downtime).label("downtime_seconds"),
+            sql_func.sum(EquipmentDailyAvailability.incident_count).label("incident_count"),
+            sql_func.sum(EquipmentDailyAvailability.resolved_count).label("resolved_count"),
+            sql_func.sum(EquipmentDailyAvailability.resolution_seconds).label("resolution_seconds")
+        ).filter(
+            EquipmentDailyAvailability.service_instance_id.in_(equipment_ids),
+            EquipmentDailyAvailability.day >= first_day,
+            EquipmentDailyAvailability.day <= last_day
+        ).group_by(EquipmentDailyAvailability.service_instance_id).all()
+        for row in rows:
+            totals[row.service_instance_id] = [
+                float(row.downtime_seconds or 0), int(row.incident_count or 0),
+                int(row.resolved_count or 0), float(row.resolution_seconds or 0)
+            ]
+        # Durée de résolution limitée à la fin de la période (l'agrégat compte la durée complète)
+        resolved_after = _resolved_after_period(
+            db, copro_id, list(totals), _midnight(first_day), _midnight(last_day) + ONE_DAY, end_date
+        )
+        for equipment_id, resolved_dates in resolved_after.items():
+            for resolved in resolved_dates:
+                totals[equipment_id][3] -= (resolved - end_date).total_seconds()
+
+    # Fenêtres calculées à partir des incidents : journées partielles et incidents non résolus
+    live_windows: Dict[int, List[Interval]] = {}
+    for equipment_id in equipment_ids:
+        windows = [w for w in (head, tail) if w]
+        if equipment_id in live_since:
+            windows.append((live_since[equipment_id], end_date))
+        if windows:
+            live_windows[equipment_id] = merge_intervals(windows)
+    live_incidents: Dict[int, Dict[int, object]] = defaultdict(dict)
+    if head:
+        for equipment_id, incidents in fetch_equipment_incidents(db, copro_id, equipment_ids, *head).items():
+            live_incidents[equipment_id].update((incident.incident_id, incident) for incident in incidents)
+    late_ids = [equipment_id for equipment_id in equipment_ids if tail or equipment_id in live_since]
+    if late_ids:
+        late_start = min([since for equipment_id, since in live_since.items()] + ([tail[0]] if tail else []))
+        for equipment_id, incidents in fetch_equipment_incidents(db, copro_id, late_ids, late_start, end_date).items():
+            live_incidents[equipment_id].update((incident.incident_id, incident) for incident in incidents)
+    counted_windows = [w for w in (head, tail) if w]
+
+    equipment_availability = []
+    for equipment in equipments:
+        downtime_seconds, incident_count, resolved_count, resolution_seconds = totals.get(equipment.id, [0.0, 0, 0, 0.0])
+
+        intervals: List[Interval] = []
+        for incident in live_incidents.get(equipment.id, {}).values():
+            if not incident.created_at:
+                continue
+            created = _as_utc(incident.created_at)
+            resolved = _as_utc(incident.resolved_at) if incident.resolved_at else None
+            # Incident résolu : jusqu'à sa résolution ; sinon jusqu'à maintenant
+            incident_end = resolved or now_utc
+            for window_start, window_end in live_windows.get(equipment.id, []):
+                intervals.append((max(created, window_start), min(incident_end, window_end)))
+            # Incidents créés pendant une journée partielle (absents de l'agrégat consulté)
+            if any(window_start <= created < window_end for window_start, window_end in counted_windows):
+                incident_count += 1
+                if resolved:
+                    resolved_count += 1
+                    resolution_seconds += max(0.0, (min(resolved, end_date) - created).total_seconds())
+        downtime_hours = (downtime_seconds + sum(
+            (end - start).total_seconds() for start, end in merge_intervals(intervals)
+        )) / 3600
+
+        # Calculer la disponibilité
+        availability_percent = ((total_hours - downtime_hours) / total_hours * 100) if total_hours > 0 else 100.0
+        availability_percent = max(0.0, min(100.0, availability_percent))  # Clamp entre 0 et 100
+
+        # Temps moyen de résolution (seulement pour les incidents résolus)
+        avg_resolution_hours = (resolution_seconds / 3600 / resolved_count) if resolved_count > 0 else None
+
+        equipment_availability.append({
+            "equipment_id": equipment.id,
+            "equipment_name": equipment.name,
+            "availability_percent": round(availability_percent, 2),
+            "incident_count": incident_count,
+            "downtime_hours": round(downtime_hours, 2),
+            "avg_resolution_hours": round(avg_resolution_hours, 2) if avg_resolution_hours else None
+        })
+
+    return equipment_availability
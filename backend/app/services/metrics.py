@@ -0,0 +1,169 @@
+"""
+Export des métriques au format texte Prometheus (GET /metrics)
+- HTTP : requêtes par route et statut, latences, requêtes en cours (app/core/metrics.py)
+- Base : taille et occupation des pools, attente d'une connexion du pool synchrone
+- Caches : succès / échecs et taux de succès (copropriétés, utilisateurs, statistiques, page de statut)
+- Métier : incidents ouverts et tickets non résolus par copropriété. Deux COUNT groupés servis
+  par les index des listes (incidents non résolus, tickets par statut), recalculés au plus
+  toutes les METRICS_BUSINESS_TTL_SECONDS quel que soit le nombre de collecteurs. Exposées
+  seulement derrière METRICS_TOKEN : sans jeton, /metrics est public
+- Pools bcrypt, limites de débit, enregistrement différé des tickets, flux de la page de statut
+Les valeurs sont propres au processus : chaque worker expose les siennes.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.metrics import format_labels, http_metrics, pool_checkout_wait
+from app.core.password_pool import password_pool
+from app.core.rate_limit import attachment_rate_limiter, login_rate_limiter, ticket_rate_limiter
+from app.core.tenant import tenant_cache
+from app.db import async_engine, engine
+from app.models.copro import Copro
+from app.models.status import Incident
+from app.models.ticket import Ticket, TicketStatus
+from app.services.principal_cache import principal_cache
+from app.services.statistics_cache import statistics_cache
+from app.services.status_events import status_events
+from app.services.status_snapshot import status_snapshot
+from app.services.ticket_intake import ticket_intake
+
+UNRESOLVED_TICKET_STATUSES = (TicketStatus.ANALYZING, TicketStatus.IN_PROGRESS)
+
+CACHES = {
+    "tenant": tenant_cache,
+    "principal": principal_cache,
+    "statistics": statistics_cache,
+    "status_snapshot": status_snapshot,
+}
+
+
+def _metric(lines: List[str], name: str, kind: str, help_text: str, samples) -> None:
+    """Ajouter une métrique : samples = [(labels, valeur), ...]"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{format_labels(labels)} {value}")
+
+
+class BusinessGauges:
+    """Incidents ouverts et tickets non résolus par copropriété, recalculés au plus toutes les ttl secondes"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._values: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _compute(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        with engine.connect() as conn:
+            open_incidents = dict(conn.execute(
+                select(Copro.slug, func.count(Incident.id))
+                .join(Copro, Copro.id == Incident.copro_id)
+                .where(Incident.resolved_at.is_(None))
+                .group_by(Copro.slug)
+            ).all())
+            unresolved_tickets = dict(conn.execute(
+                select(Copro.slug, func.count(Ticket.id))
+                .join(Copro, Copro.id == Ticket.copro_id)
+                .where(Ticket.status.in_(UNRESOLVED_TICKET_STATUSES))
+                .group_by(Copro.slug)
+            ).all())
+        return open_incidents, unresolved_tickets
+
+    def get(self) -> Optional[Tuple[Dict[str, int], Dict[str, int]]]:
+        """Valeurs en cache ou recalculées ; les dernières connues si la base est indisponible"""
+        with self._lock:
+            if self._values is None or time.monotonic() >= self._expires_at:
+                try:
+                    self._values = self._compute()
+                except SQLAlchemyError as e:
+                    print(f"⚠️  Métriques métier indisponibles: {e}")
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            return self._values
+
+
+business_gauges = BusinessGauges(ttl_seconds=settings.METRICS_BUSINESS_TTL_SECONDS)
+
+
+def _pool_lines(lines: List[str]) -> None:
+    pools = [(name, target.pool) for name, target in (("sync", engine), ("async", async_engine.sync_engine))]
+    # NullPool (aiosqlite) : pas de connexions conservées, rien à exposer
+    pools = [(name, pool) for name, pool in pools if hasattr(pool, "checkedout")]
+    _metric(lines, "copro_db_pool_size", "gauge", "Connexions permanentes du pool",
+            [([("engine", name)], pool.size()) for name, pool in pools])
+    _metric(lines, "copro_db_pool_checked_out", "gauge", "Connexions du pool en cours d'utilisation",
+            [([("engine", name)], pool.checkedout()) for name, pool in pools])
+    _metric(lines, "copro_db_pool_overflow", "gauge", "Connexions ouvertes au-delà de la taille du pool",
+            [([("engine", name)], max(pool.overflow(), 0)) for name, pool in pools])
+    lines.append("# HELP copro_db_pool_checkout_wait_seconds Temps d'obtention d'une connexion du pool")
+    lines.append("# TYPE copro_db_pool_checkout_wait_seconds histogram")
+    lines.extend(pool_checkout_wait.render("copro_db_pool_checkout_wait_seconds", [("engine", "sync")]))
+
+
+def _cache_lines(lines: List[str]) -> None:
+    _metric(lines, "copro_cache_hits_total", "counter", "Lectures servies par le cache",
+            [([("cache", name)], cache.hits) for name, cache in CACHES.items()])
+    _metric(lines, "copro_cache_misses_total", "counter", "Lectures absentes du cache",
+            [([("cache", name)], cache.misses) for name, cache in CACHES.items()])
+    _metric(lines, "copro_cache_hit_ratio", "gauge", "Taux de succès du cache depuis le démarrage", [
+        ([("cache", name)], round(cache.hits / (cache.hits + cache.misses), 4))
+        for name, cache in CACHES.items() if cache.hits + cache.misses
+    ])
+
+
+def _business_lines(lines: List[str]) -> None:
+    values = business_gauges.get()
+    if values is None:
+        return
+    open_incidents, unresolved_tickets = values
+    _metric(lines, "copro_open_incidents", "gauge", "Incidents non résolus",
+            [([("copro", slug)], count) for slug, count in sorted(open_incidents.items())])
+    _metric(lines, "copro_unresolved_tickets", "gauge", "Tickets en analyse ou en cours de traitement",
+            [([("copro", slug)], count) for slug, count in sorted(unresolved_tickets.items())])
+
+
+def _service_lines(lines: List[str]) -> None:
+    hashing = password_pool.stats()
+    _metric(lines, "copro_password_hash_running", "gauge", "Calculs bcrypt en cours", [([], hashing["running"])])
+    _metric(lines, "copro_password_hash_waiting", "gauge", "Calculs bcrypt en attente", [([], hashing["waiting"])])
+    _metric(lines, "copro_password_hash_completed_total", "counter", "Calculs bcrypt terminés",
+            [([], hashing["completed"])])
+    _metric(lines, "copro_password_hash_rejected_total", "counter", "Calculs bcrypt refusés (file pleine, 503)",
+            [([], hashing["rejected"])])
+    _metric(lines, "copro_password_hash_wait_seconds_total", "counter", "Attente cumulée avant un calcul bcrypt",
+            [([], hashing["wait_seconds_total"])])
+    _metric(lines, "copro_rate_limit_rejected_total", "counter", "Requêtes refusées par une limite de débit (429)", [
+        ([("scope", limiter.scope)], limiter.rejected)
+        for limiter in (login_rate_limiter, ticket_rate_limiter, attachment_rate_limiter)
+    ])
+    _metric(lines, "copro_ticket_intake_accepted_total", "counter", "Tickets publics acceptés en file",
+            [([], ticket_intake.accepted)])
+    _metric(lines, "copro_ticket_intake_written_total", "counter", "Tickets de la file écrits en base",
+            [([], ticket_intake.written)])
+    _metric(lines, "copro_ticket_intake_failures_total", "counter", "Écritures de lots en échec",
+            [([], ticket_intake.failures)])
+    _metric(lines, "copro_ticket_intake_pending", "gauge", "Tickets acceptés non encore écrits",
+            [([], ticket_intake.pending_count)])
+    _metric(lines, "copro_status_stream_subscribers", "gauge", "Connexions au flux de la page de statut",
+            [([], status_events.subscriber_count)])
+    _metric(lines, "copro_status_stream_dropped_total", "counter", "Connexions lentes déconnectées du flux",
+            [([], status_events.dropped_total)])
+
+
+def render_metrics(include_business: bool = False) -> str:
+    """Métriques du processus, format texte Prometheus 0.0.4
+
+    include_business : ajouter les métriques par copropriété (collecteur authentifié)
+    """
+    lines = http_metrics.render()
+    _pool_lines(lines)
+    _cache_lines(lines)
+    if include_business:
+        _business_lines(lines)
+    _service_lines(lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,95 @@
+"""
+Cache en mémoire des utilisateurs authentifiés (principals)
+- Clé : id de l'utilisateur (claim `sub` du JWT)
+- Contient uniquement ce qu'il faut pour autoriser une requête : actif, admin,
+  copropriété, bâtiment et version de jeton
+- Durée de vie courte (AUTH_PRINCIPAL_CACHE_TTL_SECONDS) : borne la fraîcheur entre workers
+- Invalidé par les écritures admin sur les utilisateurs ; la version de jeton (claim `ver`)
+  révoque les jetons déjà émis quand un compte est désactivé, rétrogradé ou change de mot de passe
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Utilisateur authentifié, sans session de base de données"""
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+    copro_id: Optional[int]
+    building_id: Optional[int]
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            copro_id=user.copro_id,
+            building_id=user.building_id,
+            token_version=user.token_version or 0,
+        )
+
+
+class PrincipalCache:
+    """Principals déjà chargés, avec éviction LRU"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Principal, float]]" = OrderedDict()
+        # Incrémentée à chaque invalidation : une lecture commencée avant n'est pas mise en cache
+        self._generations: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, user_id: int) -> int:
+        """À lire avant de charger l'utilisateur, puis à passer à set()"""
+        with self._lock:
+            return self._generations[user_id]
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                principal, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return principal
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def set(self, principal: Principal, generation: int) -> None:
+        """Mettre un principal en cache (ignoré si l'utilisateur a été modifié pendant la lecture)"""
+        with self._lock:
+            if generation != self._generations[principal.id]:
+                return
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """À appeler après le commit d'une modification / suppression d'utilisateur"""
+        with self._lock:
+            self._generations[user_id] += 1
+            self._entries.pop(user_id, None)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+)
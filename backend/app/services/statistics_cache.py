@@ -0,0 +1,96 @@
+"""
+Cache en mémoire des statistiques publiques
+- Clé : (copropriété, bâtiment ou None, année) ; année None = section « tous les temps »
+- Années closes : durée de vie longue (elles ne changent qu'avec une correction d'incident) ;
+  l'invalidation ne concerne que le worker qui a traité l'écriture, la durée de vie borne
+  le délai avant que les autres workers voient la correction
+- Année en cours : durée de vie courte (les incidents non résolus s'allongent avec le temps)
+- Invalidé précisément par les écritures admin : années touchées par un incident,
+  ou toute la copropriété après une modification des bâtiments / équipements
+"""
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+StatisticsKey = Tuple[int, Optional[int], Optional[int]]
+
+
+class StatisticsCache:
+    """Payloads de statistiques déjà calculés, avec éviction LRU"""
+
+    def __init__(self, current_year_ttl_seconds: int, closed_year_ttl_seconds: int, max_entries: int):
+        self.current_year_ttl_seconds = current_year_ttl_seconds
+        self.closed_year_ttl_seconds = closed_year_ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[StatisticsKey, Tuple[dict, float]]" = OrderedDict()
+        # Incrémentée à chaque invalidation : un calcul commencé avant n'est pas mis en cache
+        self._generations: Dict[int, int] = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, copro_id: int) -> int:
+        """À lire avant de calculer un payload, puis à passer à set()"""
+        return self._generations[copro_id]
+
+    def get(self, copro_id: int, building_id: Optional[int], year: Optional[int]) -> Optional[dict]:
+        key = (copro_id, building_id, year)
+        entry = self._entries.get(key)
+        if entry is not None:
+            payload, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(
+        self,
+        copro_id: int,
+        building_id: Optional[int],
+        year: Optional[int],
+        payload: dict,
+        generation: int,
+    ) -> None:
+        """Mettre un payload en cache (ignoré si une invalidation a eu lieu pendant le calcul)"""
+        if generation != self._generations[copro_id]:
+            return
+        if year is None or year >= datetime.utcnow().year:
+            expires_at = time.monotonic() + self.current_year_ttl_seconds
+        else:
+            expires_at = time.monotonic() + self.closed_year_ttl_seconds
+        key = (copro_id, building_id, year)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_years(self, touched_years: Dict[int, Iterable[int]]) -> None:
+        """À appeler après le commit d'une écriture d'incident (années touchées par copropriété)"""
+        for copro_id, years in touched_years.items():
+            years = set(years)
+            self._generations[copro_id] += 1
+            for key in [k for k in self._entries if k[0] == copro_id and (k[2] is None or k[2] in years)]:
+                del self._entries[key]
+
+    def invalidate_copro(self, copro_id: Optional[int] = None) -> None:
+        """Tout invalider pour une copropriété (ou pour toutes si copro_id est None)"""
+        if copro_id is None:
+            for known_copro_id in list(self._generations):
+                self._generations[known_copro_id] += 1
+            self._entries.clear()
+            return
+        self._generations[copro_id] += 1
+        for key in [k for k in self._entries if k[0] == copro_id]:
+            del self._entries[key]
+
+
+statistics_cache = StatisticsCache(
+    current_year_ttl_seconds=settings.STATISTICS_CACHE_CURRENT_YEAR_TTL_SECONDS,
+    closed_year_ttl_seconds=settings.STATISTICS_CACHE_CLOSED_YEAR_TTL_SECONDS,
+    max_entries=settings.STATISTICS_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,200 @@
+"""
+Diffusion en temps réel des changements de la page de statut (Server-Sent Events)
+- Un hub en mémoire par worker, un canal par copropriété, une file bornée par connexion
+- Un client trop lent (file pleine) est déconnecté : EventSource se reconnecte
+  et reçoit un snapshot complet
+- Les diffs sont calculés une seule fois par changement et partagés entre connexions
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.status_snapshot import StatusSnapshot, status_snapshot
+
+
+class Subscription:
+    """Connexion SSE abonnée au canal d'une copropriété"""
+
+    __slots__ = ("copro_id", "queue", "dropped")
+
+    def __init__(self, copro_id: Optional[int], queue_size: int):
+        self.copro_id = copro_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+def _by_id(items: List[dict]) -> Dict[int, dict]:
+    return {item["id"]: item for item in items}
+
+
+def diff_status_pages(old: Optional[dict], new: dict) -> dict:
+    """Différence entre deux payloads de la page de statut
+
+    Les éléments nouveaux ou modifiés sont envoyés en entier, les éléments disparus par ID.
+    """
+    old = old or {"services": [], "incidents": [], "maintenances": [], "copro": None, "overall_status": None}
+    diff = {"overall_status": new["overall_status"]}
+
+    # Équipements dont le statut (ou l'affichage) a changé
+    old_services = _by_id(old["services"])
+    new_services = _by_id(new["services"])
+    diff["services"] = [s for s in new["services"] if old_services.get(s["id"]) != s]
+    diff["removed_service_ids"] = [sid for sid in old_services if sid not in new_services]
+
+    # Incidents nouveaux ou mis à jour (statut, mises à jour, résolution)
+    old_incidents = _by_id(old["incidents"])
+    new_incidents = _by_id(new["incidents"])
+    diff["incidents"] = [i for i in new["incidents"] if old_incidents.get(i["id"]) != i]
+    diff["removed_incident_ids"] = [iid for iid in old_incidents if iid not in new_incidents]
+
+    # Maintenances qui commencent (ou modifiées) / qui se terminent
+    old_maintenances = _by_id(old["maintenances"])
+    new_maintenances = _by_id(new["maintenances"])
+    diff["maintenances"] = [m for m in new["maintenances"] if old_maintenances.get(m["id"]) != m]
+    diff["ended_maintenance_ids"] = [mid for mid in old_maintenances if mid not in new_maintenances]
+
+    if old.get("copro") != new.get("copro"):
+        diff["copro"] = new.get("copro")
+    return diff
+
+
+def format_event(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    """Encoder un message SSE (data est du JSON compact, donc sur une seule ligne)"""
+    header = f"event: {event}\n"
+    if event_id is not None:
+        header += f"id: {event_id}\n"
+    return header.encode("utf-8") + b"data: " + data + b"\n\n"
+
+
+class StatusBroadcaster:
+    """Hub de diffusion des changements de statut vers les connexions SSE
+
+    Chaque copropriété a son canal : ses abonnés, son réveil et sa tâche de rafraîchissement
+    (qui n'existe que tant que le canal a des abonnés).
+    """
+
+    def __init__(self, queue_size: int, heartbeat_seconds: int):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[Optional[int], Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeups: Dict[Optional[int], asyncio.Event] = {}
+        self._refreshers: Dict[Optional[int], asyncio.Task] = {}
+        self.dropped_total = 0
+        self.published_total = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscribe(self, copro_id: Optional[int]) -> Subscription:
+        subscription = Subscription(copro_id, self.queue_size)
+        self._subscribers.setdefault(copro_id, set()).add(subscription)
+        self._ensure_refresher(copro_id)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.copro_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.copro_id]
+
+    def publish(self, copro_id: Optional[int], message: bytes) -> None:
+        """Envoyer un message (déjà encodé) aux connexions d'une copropriété, sans jamais bloquer"""
+        self.published_total += 1
+        for subscription in list(self._subscribers.get(copro_id, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        """Déconnecter un client lent : vider sa file et y placer le signal de fin"""
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        self.dropped_total += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def notify_invalidated(self, copro_id: Optional[int] = None) -> None:
+        """Réveiller le rafraîchissement d'une copropriété, ou de toutes (appelable depuis n'importe quel thread)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if copro_id is None:
+            wakeups = list(self._wakeups.values())
+        else:
+            wakeups = [self._wakeups[copro_id]] if copro_id in self._wakeups else []
+        for wakeup in wakeups:
+            self._loop.call_soon_threadsafe(wakeup.set)
+
+    def notify_changed(self, previous: Optional[StatusSnapshot], snapshot: StatusSnapshot) -> None:
+        """Publier le diff entre deux snapshots d'une copropriété"""
+        if not self._subscribers.get(snapshot.copro_id) or previous is None:
+            return
+        diff = diff_status_pages(previous.payload, snapshot.payload)
+        diff["revision"] = snapshot.revision
+        diff["etag"] = snapshot.etag
+        data = json.dumps(diff, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.publish(snapshot.copro_id, format_event("status", data, snapshot.revision))
+
+    def _ensure_refresher(self, copro_id: Optional[int]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Nouvelle boucle d'événements (redémarrage, tests) : les tâches précédentes sont mortes
+            self._loop = loop
+            self._wakeups.clear()
+            self._refreshers.clear()
+        refresher = self._refreshers.get(copro_id)
+        if refresher is not None and not refresher.done():
+            return
+        self._wakeups[copro_id] = asyncio.Event()
+        self._refreshers[copro_id] = loop.create_task(self._refresh_loop(copro_id))
+
+    async def _refresh_loop(self, copro_id: Optional[int]) -> None:
+        """Tant que la copropriété a des abonnés : reconstruire son snapshot après chaque
+        invalidation ou à son expiration (début/fin de maintenance), et envoyer un heartbeat"""
+        heartbeat = format_event("ping", b"{}")
+        last_heartbeat = time.monotonic()
+        wakeup = self._wakeups[copro_id]
+        while self._subscribers.get(copro_id):
+            try:
+                snapshot = await status_snapshot.get(copro_id)  # notify_changed publie le diff
+                timeout = snapshot.expires_at - time.monotonic()
+            except Exception:
+                # Base indisponible : on réessaie au prochain heartbeat
+                timeout = float(self.heartbeat_seconds)
+            timeout = max(0.05, min(timeout, self.heartbeat_seconds - (time.monotonic() - last_heartbeat)))
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            if time.monotonic() - last_heartbeat >= self.heartbeat_seconds:
+                self.publish(copro_id, heartbeat)
+                last_heartbeat = time.monotonic()
+        self._wakeups.pop(copro_id, None)
+        self._refreshers.pop(copro_id, None)
+
+    async def stream(self, subscription: Subscription, snapshot: StatusSnapshot) -> AsyncIterator[bytes]:
+        """Générateur de la réponse SSE : snapshot complet puis diffs"""
+        try:
+            yield b"retry: 5000\n" + format_event("snapshot", snapshot.body, snapshot.revision)
+            while True:
+                message = await subscription.queue.get()
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+
+status_events = StatusBroadcaster(
+    queue_size=settings.STATUS_STREAM_QUEUE_SIZE,
+    heartbeat_seconds=settings.STATUS_STREAM_HEARTBEAT_SECONDS,
+)
+status_snapshot.on_invalidate(status_events.notify_invalidated)
+status_snapshot.on_change(status_events.notify_changed)
@@ -0,0 +1,174 @@
+"""
+Cache en mémoire de la page de statut publique
+- Un snapshot par copropriété (clé : copro_id, None si aucune copropriété n'est configurée)
+- Le payload est sérialisé une seule fois puis servi tel quel à chaque poll
+- Invalidé par les écritures admin qui modifient la page (statuts, incidents, maintenances),
+  pour la seule copropriété concernée
+- Rafraîchi automatiquement au début / à la fin d'une fenêtre de maintenance
+- Révision + ETag pour les requêtes conditionnelles (If-None-Match -> 304)
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+
+# (session, copro_id) -> (payload sérialisable, prochaine date à laquelle le contenu change tout seul)
+StatusPageBuilder = Callable[[AsyncSession, Optional[int]], Awaitable[Tuple[dict, Optional[datetime]]]]
+
+
+@dataclass
+class StatusSnapshot:
+    """Page de statut pré-calculée"""
+    copro_id: Optional[int]
+    payload: dict
+    body: bytes
+    revision: int  # Incrémentée à chaque changement de contenu
+    etag: str  # Dérivé du contenu : identique d'un worker à l'autre pour un même payload
+    generation: Tuple[int, int]  # (génération globale, génération de la copropriété)
+    built_at: float
+    expires_at: float
+
+
+def _seconds_until(moment: datetime) -> float:
+    """Secondes entre maintenant (UTC) et une date, naïve (UTC) ou timezone-aware"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - datetime.now(timezone.utc)).total_seconds()
+
+
+class StatusSnapshotCache:
+    """Snapshots de la page de statut par copropriété, reconstruits à la demande après invalidation"""
+
+    def __init__(self, max_age_seconds: int):
+        self.max_age_seconds = max_age_seconds
+        self._build: Optional[StatusPageBuilder] = None
+        self._snapshots: Dict[Optional[int], StatusSnapshot] = {}
+        # Génération globale (toutes les copropriétés) et générations par copropriété
+        self._generation = 0
+        self._copro_generations: Dict[Optional[int], int] = {}
+        self._revisions: Dict[Optional[int], int] = {}
+        self._locks: Dict[Optional[int], asyncio.Lock] = {}
+        # Abonnés notifiés à chaque invalidation / à chaque nouveau contenu (flux SSE)
+        self._invalidation_hooks: List[Callable[[Optional[int]], None]] = []
+        self._change_listeners: List[Callable[[Optional["StatusSnapshot"], "StatusSnapshot"], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def builder(self, func: StatusPageBuilder) -> StatusPageBuilder:
+        """Décorateur : enregistre la fonction qui construit la page de statut"""
+        self._build = func
+        return func
+
+    def on_invalidate(self, hook: Callable[[Optional[int]], None]) -> None:
+        """Enregistrer un callback appelé à chaque invalidation (copro_id, None = toutes)"""
+        self._invalidation_hooks.append(hook)
+
+    def on_change(self, listener: Callable[[Optional["StatusSnapshot"], "StatusSnapshot"], None]) -> None:
+        """Enregistrer un callback (ancien snapshot, nouveau snapshot) appelé quand le contenu change"""
+        self._change_listeners.append(listener)
+
+    def invalidate(self, copro_id: Optional[int] = None) -> None:
+        """À appeler après un commit qui modifie la page de statut d'une copropriété
+        (sans copro_id : toutes les copropriétés)"""
+        if copro_id is None:
+            self._generation += 1
+        else:
+            self._copro_generations[copro_id] = self._copro_generations.get(copro_id, 0) + 1
+        for hook in self._invalidation_hooks:
+            hook(copro_id)
+
+    def revision(self, copro_id: Optional[int]) -> int:
+        """Révision du dernier snapshot construit pour une copropriété (0 si aucun)"""
+        return self._revisions.get(copro_id, 0)
+
+    def _current_generation(self, copro_id: Optional[int]) -> Tuple[int, int]:
+        return self._generation, self._copro_generations.get(copro_id, 0)
+
+    def _is_fresh(self, snapshot: Optional[StatusSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.generation == self._current_generation(snapshot.copro_id)
+            and time.monotonic() < snapshot.expires_at
+        )
+
+    async def get(self, copro_id: Optional[int]) -> StatusSnapshot:
+        """Retourner le snapshot courant d'une copropriété, en le reconstruisant s'il est périmé"""
+        snapshot = self._snapshots.get(copro_id)
+        if self._is_fresh(snapshot):
+            self.hits += 1
+            return snapshot
+        # Un seul rebuild à la fois par copropriété : les autres requêtes attendent puis lisent le résultat
+        lock = self._locks.setdefault(copro_id, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(copro_id)
+            if self._is_fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            previous = snapshot
+            snapshot = await self._rebuild(copro_id)
+            self._snapshots[copro_id] = snapshot
+            if previous is None or previous.revision != snapshot.revision:
+                for listener in self._change_listeners:
+                    listener(previous, snapshot)
+            return snapshot
+
+    async def _rebuild(self, copro_id: Optional[int]) -> StatusSnapshot:
+        if self._build is None:
+            raise RuntimeError("Aucun builder enregistré pour la page de statut")
+        # Capturer la génération avant la lecture : une invalidation pendant le rebuild
+        # rendra ce snapshot immédiatement périmé
+        generation = self._current_generation(copro_id)
+        async with AsyncSessionLocal() as db:
+            payload, next_change = await self._build(db, copro_id)
+        now = time.monotonic()
+        ttl = float(self.max_age_seconds)
+        if next_change is not None:
+            ttl = max(0.0, min(ttl, _seconds_until(next_change)))
+        body = payload_to_json(payload)
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        # La révision n'avance que si le contenu a réellement changé
+        previous = self._snapshots.get(copro_id)
+        if previous is None or previous.etag != etag:
+            self._revisions[copro_id] = self._revisions.get(copro_id, 0) + 1
+        return StatusSnapshot(
+            copro_id=copro_id,
+            payload=payload,
+            body=body,
+            revision=self._revisions[copro_id],
+            etag=etag,
+            generation=generation,
+            built_at=now,
+            expires_at=now + ttl,
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vérifier un en-tête If-None-Match (liste d'ETags, forme faible W/ ou *)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def payload_to_json(payload: dict) -> bytes:
+    """Sérialisation compacte (le payload est déjà composé de types JSON)"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+status_snapshot = StatusSnapshotCache(max_age_seconds=settings.STATUS_SNAPSHOT_MAX_AGE_SECONDS)
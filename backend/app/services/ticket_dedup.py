@@ -0,0 +1,110 @@
+"""
+Détection des déclarations en double (tickets publics)
+- Quand un équipement tombe en panne, beaucoup de résidents le signalent en quelques minutes
+- Un nouveau ticket est considéré comme un doublon d'un ticket ouvert (en analyse ou en cours)
+  du même type, sur le même équipement, créé depuis moins de TICKET_DEDUP_WINDOW_SECONDS,
+  dont le titre est proche (similarité >= TICKET_DEDUP_MIN_SIMILARITY)
+- Le doublon n'est pas enregistré : le ticket existant est incrémenté (report_count, « +1 »)
+  et reçoit ses photos
+"""
+import json
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Iterable, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.ticket import Ticket, TicketStatus, TicketType
+
+OPEN_TICKET_STATUSES = (TicketStatus.ANALYZING, TicketStatus.IN_PROGRESS)
+# Tickets récents comparés au plus (les plus récents d'abord)
+MAX_CANDIDATES = 20
+# Mises à jour du ticket existant tentées au plus si ses photos changent entre-temps
+MAX_UPDATE_ATTEMPTS = 3
+# Mots ignorés dans la comparaison des titres
+STOP_WORDS = {"le", "la", "les", "l", "un", "une", "des", "de", "du", "d", "au", "aux", "et", "en", "est", "ne", "pas", "plus"}
+
+
+def _words(title: str) -> Set[str]:
+    text = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii").lower()
+    return {word for word in re.findall(r"[a-z0-9]+", text) if word not in STOP_WORDS}
+
+
+def title_similarity(first: str, second: str) -> float:
+    """Similarité de deux titres entre 0 et 1 (mots communs ou caractères communs, la meilleure)"""
+    first_words, second_words = _words(first), _words(second)
+    if not first_words or not second_words:
+        return 0.0
+    jaccard = len(first_words & second_words) / len(first_words | second_words)
+    sequence = SequenceMatcher(None, " ".join(sorted(first_words)), " ".join(sorted(second_words))).ratio()
+    return max(jaccard, sequence)
+
+
+def best_match(title: str, candidates: Iterable[Tuple[int, str]], min_similarity: float) -> Optional[int]:
+    """Id du candidat (id, titre) le plus proche du titre, si assez proche"""
+    best_id, best_score = None, min_similarity
+    for candidate_id, candidate_title in candidates:
+        score = title_similarity(title, candidate_title)
+        if score >= best_score:
+            best_id, best_score = candidate_id, score
+    return best_id
+
+
+def merge_attachments(current: Optional[str], added: Sequence[str]) -> Optional[str]:
+    """Tableau JSON des photos d'un ticket complété par `added` (sans doublon, ordre conservé)"""
+    keys = json.loads(current) if current else []
+    merged = list(dict.fromkeys([*keys, *added]))
+    return json.dumps(merged) if merged else current
+
+
+async def attach_to_duplicate(
+    db: AsyncSession,
+    copro_id: int,
+    service_instance_id: Optional[int],
+    ticket_type: TicketType,
+    title: str,
+    attachments: Sequence[str] = (),
+) -> Optional[Tuple[int, int, TicketStatus]]:
+    """Incrémenter le ticket ouvert dont la déclaration est un doublon et lui ajouter ses photos
+
+    Retourne (id, report_count, status) du ticket existant, ou None s'il faut créer un ticket.
+    Les déclarations sans équipement ne sont jamais dédoublonnées. Le commit est laissé à l'appelant.
+    """
+    if not service_instance_id:
+        return None
+    since = datetime.utcnow() - timedelta(seconds=settings.TICKET_DEDUP_WINDOW_SECONDS)
+    rows = await db.execute(
+        select(Ticket.id, Ticket.title).where(
+            Ticket.copro_id == copro_id,
+            Ticket.service_instance_id == service_instance_id,
+            Ticket.type == ticket_type,
+            Ticket.status.in_(OPEN_TICKET_STATUSES),
+            Ticket.created_at >= since,
+        ).order_by(Ticket.created_at.desc()).limit(MAX_CANDIDATES)
+    )
+    ticket_id = best_match(title, rows.all(), settings.TICKET_DEDUP_MIN_SIMILARITY)
+    if ticket_id is None:
+        return None
+    # Incrément atomique : les déclarations simultanées ne se perdent pas. Les photos sont
+    # ajoutées dans le même UPDATE, conditionné au tableau lu (sinon relu et recalculé)
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        conditions = [Ticket.id == ticket_id, Ticket.status.in_(OPEN_TICKET_STATUSES)]
+        values = {"report_count": Ticket.report_count + 1, "last_reported_at": datetime.utcnow()}
+        if attachments:
+            current = await db.scalar(select(Ticket.attachments).where(Ticket.id == ticket_id))
+            conditions.append(Ticket.attachments.is_(None) if current is None else Ticket.attachments == current)
+            values["attachments"] = merge_attachments(current, attachments)
+        result = await db.execute(
+            update(Ticket).where(*conditions).values(**values).returning(Ticket.report_count, Ticket.status)
+        )
+        row = result.first()
+        if row is not None:
+            return ticket_id, row.report_count, row.status
+        if not attachments:
+            break
+    # Ticket clos entre la lecture et la mise à jour (ou photos modifiées à chaque tentative)
+    return None
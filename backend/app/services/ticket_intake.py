@@ -0,0 +1,256 @@
+"""
+File d'attente des tickets publics (TICKET_INTAKE_MODE="queued")
+- Pendant une panne, POST /public/tickets devient le chemin d'écriture le plus sollicité :
+  en mode "queued", un ticket validé n'est plus inséré par la requête elle-même
+- Il est d'abord écrit (fsync) dans un journal en ajout seul propre au processus, puis mis
+  en file ; la requête répond 202 avec un identifiant provisoire (intake_id)
+- Un writer en tâche de fond insère les tickets par lots (INSERT multi-lignes, un seul
+  commit) : au plus TICKET_INTAKE_BATCH_SIZE tickets ou TICKET_INTAKE_FLUSH_MS d'attente
+- Le journal est vidé quand tous les tickets qu'il contient sont en base ; au démarrage,
+  les journaux laissés par un processus arrêté brutalement sont rejoués (l'intake_id,
+  unique en base, évite les doublons)
+- Le mode "direct" (par défaut) garde l'insertion dans la requête
+"""
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models.ticket import Ticket, TicketStatus, TicketType
+
+SPOOL_SUFFIX = ".spool"
+# Attente max (secondes) entre deux tentatives d'écriture quand la base est indisponible
+MAX_RETRY_DELAY_SECONDS = 30
+
+
+class TicketSpool:
+    """Journal en ajout seul d'un processus (une ligne JSON par ticket accepté)
+
+    Le fichier est verrouillé (flock) tant que le processus vit : un journal non verrouillé
+    appartient à un processus arrêté et peut être rejoué.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.path = directory / f"intake-{os.getpid()}-{uuid.uuid4().hex[:8]}{SPOOL_SUFFIX}"
+        self._fd: Optional[int] = None
+
+    def open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, record: dict) -> None:
+        """Écrire un ticket sur disque avant de l'accepter"""
+        os.write(self._fd, (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        os.fsync(self._fd)
+
+    def truncate(self) -> None:
+        os.ftruncate(self._fd, 0)
+
+    def close(self) -> None:
+        """Fermer le journal (supprimé s'il est vide, sinon rejoué au prochain démarrage)"""
+        if self._fd is None:
+            return
+        empty = os.fstat(self._fd).st_size == 0
+        os.close(self._fd)
+        self._fd = None
+        if empty:
+            self.path.unlink(missing_ok=True)
+
+    def orphans(self) -> Iterator[Tuple[Path, List[dict]]]:
+        """Journaux des processus arrêtés : (chemin, tickets) ; à supprimer une fois rejoués"""
+        for path in sorted(self.directory.glob(f"*{SPOOL_SUFFIX}")):
+            if path == self.path:
+                continue
+            try:
+                spool = open(path, "rb")
+            except FileNotFoundError:
+                continue  # Rejoué et supprimé entre-temps par un autre processus
+            with spool:
+                try:
+                    fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Processus encore en vie
+                records = []
+                for line in spool:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # Dernière ligne tronquée par l'arrêt : jamais acceptée
+                yield path, records
+
+
+def _ticket_row(record: dict) -> dict:
+    return {
+        "intake_id": record["intake_id"],
+        "copro_id": record["copro_id"],
+        "service_instance_id": record["service_instance_id"],
+        "reporter_name": record["reporter_name"],
+        "reporter_email": record["reporter_email"],
+        "reporter_phone": record["reporter_phone"],
+        "title": record["title"],
+        "description": record["description"],
+        "location": record["location"],
+        "attachments": record.get("attachments"),
+        "type": TicketType(record["type"]),
+        "status": TicketStatus.ANALYZING,
+        "created_at": datetime.fromisoformat(record["received_at"]),
+    }
+
+
+class TicketIntake:
+    """File en mémoire + writer par lots + journal sur disque"""
+
+    def __init__(self, enabled: bool, spool_dir: str, batch_size: int, flush_seconds: float, max_pending: int):
+        self.enabled = enabled
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._spool: Optional[TicketSpool] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        # Tickets écrits dans le journal mais pas encore en base
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Rejouer les journaux orphelins puis démarrer le writer (au démarrage de l'application)"""
+        if not self.enabled:
+            return
+        self._spool = TicketSpool(self.spool_dir)
+        self._spool.open()
+        for path, records in self._spool.orphans():
+            for start in range(0, len(records), self.batch_size):
+                await self._write(records[start:start + self.batch_size], skip_existing=True)
+            path.unlink(missing_ok=True)
+            print(f"✅ Journal {path.name} rejoué ({len(records)} ticket(s))")
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Écrire les tickets en attente puis arrêter le writer (à l'arrêt de l'application)"""
+        if self._writer is not None:
+            self._queue.put_nowait(None)
+            try:
+                await asyncio.wait_for(self._writer, timeout=10)
+            except asyncio.TimeoutError:
+                # Base indisponible : les tickets restent dans le journal, rejoué au démarrage
+                self._writer.cancel()
+            self._writer = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def _append(self, record: dict) -> None:
+        with self._lock:
+            self._spool.append(record)
+            self._pending.add(record["intake_id"])
+
+    async def submit(self, values: dict) -> str:
+        """Accepter un ticket validé ; retourne son identifiant provisoire"""
+        if len(self._pending) >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Trop de déclarations en cours d'enregistrement, réessayez dans quelques instants",
+                headers={"Retry-After": "1"},
+            )
+        record = {"intake_id": uuid.uuid4().hex, "received_at": datetime.utcnow().isoformat(), **values}
+        # Le fsync ne doit pas bloquer la boucle d'événements
+        await asyncio.to_thread(self._append, record)
+        self._queue.put_nowait(record)
+        self.accepted += 1
+        return record["intake_id"]
+
+    def is_pending(self, intake_id: str) -> bool:
+        with self._lock:
+            return intake_id in self._pending
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._write_with_retry(batch)
+
+    async def _write_with_retry(self, batch: List[dict]) -> None:
+        attempt = 0
+        while True:
+            try:
+                # Après un échec, le commit a pu réussir malgré l'erreur : ne pas réinsérer
+                await self._write(batch, skip_existing=attempt > 0)
+                return
+            except Exception as e:
+                self.failures += 1
+                attempt += 1
+                print(f"⚠️  Écriture de {len(batch)} ticket(s) impossible (tentative {attempt}): {e}")
+                await asyncio.sleep(min(MAX_RETRY_DELAY_SECONDS, 2 ** attempt))
+
+    async def _write(self, records: List[dict], skip_existing: bool = False) -> None:
+        intake_ids = [record["intake_id"] for record in records]
+        async with AsyncSessionLocal() as session:
+            if skip_existing:
+                existing = set((await session.execute(
+                    select(Ticket.intake_id).where(Ticket.intake_id.in_(intake_ids))
+                )).scalars())
+                unique = {record["intake_id"]: record for record in records if record["intake_id"] not in existing}
+                records = list(unique.values())
+            if records:
+                # Une seule instruction INSERT ... VALUES (...), (...), ... pour tout le lot
+                await session.execute(insert(Ticket.__table__).values([_ticket_row(record) for record in records]))
+                await session.commit()
+        self.written += len(records)
+        self.batches += 1
+        with self._lock:
+            self._pending.difference_update(intake_ids)
+            # Tout ce que contient le journal est en base : il peut être vidé
+            if not self._pending and self._spool is not None:
+                self._spool.truncate()
+
+
+ticket_intake = TicketIntake(
+    enabled=settings.TICKET_INTAKE_MODE == "queued",
+    spool_dir=settings.TICKET_INTAKE_SPOOL_DIR,
+    batch_size=settings.TICKET_INTAKE_BATCH_SIZE,
+    flush_seconds=settings.TICKET_INTAKE_FLUSH_MS / 1000,
+    max_pending=settings.TICKET_INTAKE_MAX_PENDING,
+)
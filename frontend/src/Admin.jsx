@@ -1,14 +1,43 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import toast from 'react-hot-toast'
 import './Admin.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+// Taille des pages des listes tickets / incidents (pagination par curseur, en-tête X-Next-Cursor)
+const PAGE_SIZE = 50
+
+// Déclenche le chargement de la page suivante quand la fin de la liste devient visible
+function LoadMoreSentinel({ onVisible, hasMore, loading }) {
+  const ref = useRef(null)
+
+  useEffect(() => {
+    if (!hasMore || loading || !ref.current) return
+    const observer = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting) onVisible()
+    }, { rootMargin: '200px' })
+    observer.observe(ref.current)
+    return () => observer.disconnect()
+  }, [onVisible, hasMore, loading])
+
+  if (!hasMore) return null
+  return <div ref={ref} className="load-more-sentinel">{loading ? 'Chargement...' : ''}</div>
+}
+
+// Ajouter une page à une liste en ignorant les éléments déjà présents
+const appendPage = (items, page) => {
+  const ids = new Set(items.map(item => item.id))
+  return [...items, ...page.filter(item => !ids.has(item.id))]
+}
 
 function Admin() {
   const [equipments, setEquipments] = useState([])
   const [tickets, setTickets] = useState([])
+  const [ticketsCursor, setTicketsCursor] = useState(null)
+  const [loadingMoreTickets, setLoadingMoreTickets] = useState(false)
   const [incidents, setIncidents] = useState([])
+  const [incidentsCursor, setIncidentsCursor] = useState(null)
+  const [loadingMoreIncidents, setLoadingMoreIncidents] = useState(false)
   const [admins, setAdmins] = useState([])
   const [buildings, setBuildings] = useState([])
   const [copro, setCopro] = useState(null)
@@ -76,6 +105,7 @@ function Admin() {
   const [editingCopro, setEditingCopro] = useState(null)
   const [coproFormData, setCoproFormData] = useState({
     name: '',
+    slug: '',
     address: '',
     city: '',
     postal_code: '',
@@ -177,7 +207,7 @@ function Admin() {
       }
 
       const response = await fetch(
-        `${API_URL}/api/v1/admin/tickets`,
+        `${API_URL}/api/v1/admin/tickets?limit=${PAGE_SIZE}`,
         {
           headers: {
             'Authorization': `Bearer ${token}`
@@ -187,6 +217,7 @@ function Admin() {
       if (response.ok) {
         const data = await response.json()
         setTickets(data)
+        setTicketsCursor(response.headers.get('X-Next-Cursor'))
       } else if (response.status === 401) {
         localStorage.removeItem('token')
         window.location.href = '/login'
@@ -199,6 +230,27 @@ function Admin() {
     }
   }, [])
 
+  const loadMoreTickets = useCallback(async () => {
+    if (!ticketsCursor || loadingMoreTickets) return
+    try {
+      setLoadingMoreTickets(true)
+      const token = localStorage.getItem('token')
+      const response = await fetch(
+        `${API_URL}/api/v1/admin/tickets?limit=${PAGE_SIZE}&cursor=${encodeURIComponent(ticketsCursor)}`,
+        { headers: { 'Authorization': `Bearer ${token}` } }
+      )
+      if (response.ok) {
+        const data = await response.json()
+        setTickets(prev => appendPage(prev, data))
+        setTicketsCursor(response.headers.get('X-Next-Cursor'))
+      }
+    } catch (error) {
+      console.error('Erreur chargement tickets:', error)
+    } finally {
+      setLoadingMoreTickets(false)
+    }
+  }, [ticketsCursor, loadingMoreTickets])
+
   const loadCopro = useCallback(async () => {
     try {
       setLoading(true)
@@ -274,12 +326,13 @@ function Admin() {
         return
       }
 
-      const response = await fetch(`${API_URL}/api/v1/admin/incidents`, {
+      const response = await fetch(`${API_URL}/api/v1/admin/incidents?limit=${PAGE_SIZE}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       })
       if (response.ok) {
         const data = await response.json()
         setIncidents(data)
+        setIncidentsCursor(response.headers.get('X-Next-Cursor'))
       } else if (response.status === 401) {
         localStorage.removeItem('token')
         window.location.href = '/login'
@@ -292,6 +345,27 @@ function Admin() {
     }
   }, [])
 
+  const loadMoreIncidents = useCallback(async () => {
+    if (!incidentsCursor || loadingMoreIncidents) return
+    try {
+      setLoadingMoreIncidents(true)
+      const token = localStorage.getItem('token')
+      const response = await fetch(
+        `${API_URL}/api/v1/admin/incidents?limit=${PAGE_SIZE}&cursor=${encodeURIComponent(incidentsCursor)}`,
+        { headers: { 'Authorization': `Bearer ${token}` } }
+      )
+      if (response.ok) {
+        const data = await response.json()
+        setIncidents(prev => appendPage(prev, data))
+        setIncidentsCursor(response.headers.get('X-Next-Cursor'))
+      }
+    } catch (error) {
+      console.error('Erreur chargement incidents:', error)
+    } finally {
+      setLoadingMoreIncidents(false)
+    }
+  }, [incidentsCursor, loadingMoreIncidents])
+
   const loadUsers = useCallback(async () => {
     try {
       setLoading(true)
@@ -640,26 +714,8 @@ function Admin() {
           )
           if (incidentResponse.ok) {
             const incident = await incidentResponse.json()
-            // Récupérer tous les incidents liés (car un incident peut avoir plusieurs équipements via plusieurs incidents créés)
-            const allIncidentsResponse = await fetch(
-              `${API_URL}/api/v1/admin/incidents`,
-              {
-                headers: { 'Authorization': `Bearer ${token}` }
-              }
-            )
-            if (allIncidentsResponse.ok) {
-              const allIncidents = await allIncidentsResponse.json()
-              // Trouver tous les incidents avec le même titre et créés à la même date (incidents créés ensemble)
-              const relatedIncidents = allIncidents.filter(i => 
-                i.title === incident.title && 
-                new Date(i.created_at).getTime() === new Date(incident.created_at).getTime()
-              )
-              relatedIncidents.forEach(inc => {
-                if (inc.service_instance_id) {
-                  equipmentIds.push(inc.service_instance_id)
-                }
-              })
-            }
+            // Tous les équipements de l'incident (table de liaison, ou équipement historique)
+            (incident.service_instance_ids || []).forEach(id => equipmentIds.push(id))
           }
         } catch (error) {
           console.error('Erreur récupération incident:', error)
@@ -1220,6 +1276,7 @@ function Admin() {
     setEditingCopro(null)
     setCoproFormData({
       name: '',
+      slug: '',
       address: '',
       city: '',
       postal_code: '',
@@ -1232,6 +1289,7 @@ function Admin() {
     setEditingCopro(coproData)
     setCoproFormData({
       name: coproData.name || '',
+      slug: coproData.slug || '',
       address: coproData.address || '',
       city: coproData.city || '',
       postal_code: coproData.postal_code || '',
@@ -1270,7 +1328,8 @@ function Admin() {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify(coproFormData)
+        // Slug vide : généré à partir du nom (création) ou inchangé (modification)
+        body: JSON.stringify({ ...coproFormData, slug: coproFormData.slug || undefined })
       })
 
       if (response.ok) {
@@ -1639,13 +1698,13 @@ function Admin() {
           className={activeTab === 'tickets' ? 'active' : ''}
           onClick={() => setActiveTab('tickets')}
         >
-          Demande à traiter ({tickets.filter(t => t.status !== 'closed').length})
+          Demande à traiter ({tickets.filter(t => t.status !== 'closed').length}{ticketsCursor ? '+' : ''})
         </button>
         <button 
           className={activeTab === 'incidents' ? 'active' : ''}
           onClick={() => setActiveTab('incidents')}
         >
-          Incidents ({incidents.filter(i => i.status !== 'closed').length})
+          Incidents ({incidents.filter(i => i.status !== 'closed').length}{incidentsCursor ? '+' : ''})
         </button>
         <button 
           className={activeTab === 'maintenances' ? 'active' : ''}
@@ -1952,6 +2011,18 @@ function Admin() {
                     />
                   </div>
 
+                  <div className="form-group">
+                    <label>Identifiant d'URL (slug)</label>
+                    <input
+                      type="text"
+                      name="slug"
+                      value={coproFormData.slug}
+                      onChange={handleCoproFormChange}
+                      pattern="[a-z0-9]+(-[a-z0-9]+)*"
+                      placeholder="Ex: residence-les-jardins (généré à partir du nom si vide)"
+                    />
+                  </div>
+
                   <div className="form-group">
                     <label>Adresse</label>
                     <input
@@ -2155,6 +2226,11 @@ function Admin() {
                     <span className="ticket-type">
                       {ticket.type === 'incident' ? '🔴 Incident' : '🔵 Demande'}
                     </span>
+                    {ticket.report_count > 1 && (
+                      <span className="ticket-report-count" title="Déclarations identiques regroupées sur ce ticket">
+                        +{ticket.report_count - 1} signalement{ticket.report_count > 2 ? 's' : ''}
+                      </span>
+                    )}
                   </div>
                   <select
                     value={ticket.status}
@@ -2176,6 +2252,15 @@ function Admin() {
                   {ticket.reporter_phone && <p><strong>Téléphone:</strong> {ticket.reporter_phone}</p>}
                   {ticket.location && <p><strong>Localisation:</strong> {ticket.location}</p>}
                   {ticket.service_instance && <p><strong>Équipement:</strong> {ticket.service_instance}</p>}
+                  {ticket.attachments && ticket.attachments.length > 0 && (
+                    <div className="ticket-attachments">
+                      {ticket.attachments.map(attachment => (
+                        <a key={attachment.id} href={`${API_URL}${attachment.url}`} target="_blank" rel="noopener noreferrer">
+                          <img src={`${API_URL}${attachment.thumbnail_url}`} alt="Photo jointe" loading="lazy" />
+                        </a>
+                      ))}
+                    </div>
+                  )}
                   {ticket.assigned_admin && <p><strong>Assigné à:</strong> {ticket.assigned_admin}</p>}
                   {ticket.incident_id && <p><strong>Incident créé:</strong> #{ticket.incident_id}</p>}
                   <p><strong>Date:</strong> {new Date(ticket.created_at).toLocaleString('fr-FR')}</p>
@@ -2265,6 +2350,7 @@ function Admin() {
               </div>
             ))}
             {tickets.length === 0 && <p>Aucun ticket</p>}
+            <LoadMoreSentinel onVisible={loadMoreTickets} hasMore={!!ticketsCursor} loading={loadingMoreTickets} />
           </div>
         </div>
       )}
@@ -2334,6 +2420,7 @@ function Admin() {
               )
             })}
             {incidents.length === 0 && <p>Aucun incident</p>}
+            <LoadMoreSentinel onVisible={loadMoreIncidents} hasMore={!!incidentsCursor} loading={loadingMoreIncidents} />
           </div>
 
           {showSimpleIncidentForm && (
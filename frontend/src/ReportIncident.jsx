@@ -3,6 +3,8 @@ import { QRCodeSVG } from 'qrcode.react'
 import './ReportIncident.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+const MAX_PHOTOS = 5
+const MAX_PHOTO_SIZE = 10 * 1024 * 1024
 
 function ReportIncident() {
   const [formData, setFormData] = useState({
@@ -19,6 +21,8 @@ function ReportIncident() {
   const [equipmentSearch, setEquipmentSearch] = useState('')
   const [loading, setLoading] = useState(false)
   const [submitted, setSubmitted] = useState(false)
+  const [duplicate, setDuplicate] = useState(false)
+  const [photos, setPhotos] = useState([])
   const [error, setError] = useState(null)
   const [fieldErrors, setFieldErrors] = useState({})
   const [showQR, setShowQR] = useState(false)
@@ -98,6 +102,12 @@ function ReportIncident() {
       }
     }
     
+    if (photos.length > MAX_PHOTOS) {
+      errors.photos = `${MAX_PHOTOS} photos au maximum`
+    } else if (photos.some(photo => photo.size > MAX_PHOTO_SIZE)) {
+      errors.photos = 'Chaque photo doit faire moins de 10 Mo'
+    }
+    
     setFieldErrors(errors)
     return Object.keys(errors).length === 0
   }
@@ -116,6 +126,24 @@ function ReportIncident() {
     setLoading(true)
 
     try {
+      // Envoyer d'abord les photos : le ticket référence les clés renvoyées
+      let attachments = []
+      if (photos.length > 0) {
+        const upload = new FormData()
+        photos.forEach(photo => upload.append('files', photo))
+        const uploadResponse = await fetch(`${API_URL}/api/v1/public/tickets/attachments`, {
+          method: 'POST',
+          body: upload
+        })
+        const uploadData = await uploadResponse.json().catch(() => ({}))
+        if (!uploadResponse.ok) {
+          setFieldErrors({ photos: uploadData.detail || `Erreur ${uploadResponse.status}` })
+          setError("Les photos n'ont pas pu être envoyées")
+          return
+        }
+        attachments = uploadData.attachments.map(attachment => attachment.id)
+      }
+
       const response = await fetch(`${API_URL}/api/v1/public/tickets`, {
         method: 'POST',
         headers: {
@@ -134,11 +162,14 @@ function ReportIncident() {
           reporter_email: formData.reporter_email.trim(),
           reporter_phone: formData.reporter_phone && formData.reporter_phone.trim() 
             ? formData.reporter_phone.replace(/[\s\-\.]/g, '') 
-            : null
+            : null,
+          attachments
         })
       })
 
       if (response.ok) {
+        const data = await response.json()
+        setDuplicate(Boolean(data.duplicate))
         setSubmitted(true)
       } else {
         try {
@@ -254,11 +285,22 @@ function ReportIncident() {
     return (
       <div className="report-incident-page">
         <div className="success-message">
-          <h2>✅ Ticket créé avec succès</h2>
-          <p>Votre déclaration a été enregistrée et sera analysée par un administrateur.</p>
+          {duplicate ? (
+            <>
+              <h2>✅ Signalement enregistré</h2>
+              <p>Ce problème a déjà été signalé : votre déclaration a été ajoutée au ticket existant, en cours d'analyse par un administrateur.</p>
+            </>
+          ) : (
+            <>
+              <h2>✅ Ticket créé avec succès</h2>
+              <p>Votre déclaration a été enregistrée et sera analysée par un administrateur.</p>
+            </>
+          )}
           <p>Vous recevrez une réponse par email si vous avez fourni votre adresse.</p>
           <button onClick={() => {
             setSubmitted(false)
+            setDuplicate(false)
+            setPhotos([])
             setFormData({
               type: 'incident',
               service_instance_ids: [],
@@ -486,6 +528,28 @@ function ReportIncident() {
           )}
         </div>
 
+        <div className="form-group">
+          <label htmlFor="photos">Photos</label>
+          <input
+            type="file"
+            id="photos"
+            name="photos"
+            accept="image/jpeg,image/png,image/webp,image/gif"
+            multiple
+            onChange={(e) => {
+              setPhotos(Array.from(e.target.files || []))
+              if (fieldErrors.photos) {
+                setFieldErrors({ ...fieldErrors, photos: null })
+              }
+            }}
+            className={fieldErrors.photos ? 'error' : ''}
+          />
+          <p className="form-hint">{MAX_PHOTOS} photos maximum, 10 Mo chacune (optionnel)</p>
+          {fieldErrors.photos && (
+            <span className="field-error">{fieldErrors.photos}</span>
+          )}
+        </div>
+
         <h3>Vos coordonnées</h3>
         <p className="form-hint">Le nom et l'email sont obligatoires, le téléphone est optionnel</p>
 
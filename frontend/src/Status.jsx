@@ -1,15 +1,45 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import toast from 'react-hot-toast'
 import './Status.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
+// Fusionner une liste d'éléments (par id) avec les éléments modifiés et supprimés d'un diff
+const mergeById = (items, updates = [], removedIds = []) => {
+  const removed = new Set(removedIds)
+  const updatesById = new Map(updates.map(item => [item.id, item]))
+  const existingIds = new Set(items.map(item => item.id))
+  const merged = items
+    .filter(item => !removed.has(item.id))
+    .map(item => updatesById.get(item.id) || item)
+  return [...merged, ...updates.filter(item => !existingIds.has(item.id))]
+}
+
+// Appliquer un événement `status` du flux SSE aux données affichées
+const applyStatusDiff = (data, diff) => {
+  if (!data) return data
+  const incidents = mergeById(data.incidents, diff.incidents, diff.removed_incident_ids)
+    .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
+  const services = mergeById(data.services, diff.services, diff.removed_service_ids)
+    .sort((a, b) => a.order - b.order)
+  return {
+    ...data,
+    overall_status: diff.overall_status,
+    services,
+    incidents,
+    maintenances: mergeById(data.maintenances || [], diff.maintenances, diff.ended_maintenance_ids),
+    copro: 'copro' in diff ? diff.copro : data.copro
+  }
+}
+
 function Status() {
   const [statusData, setStatusData] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [isAdmin, setIsAdmin] = useState(false)
   const [expandedBuildings, setExpandedBuildings] = useState({})
+  // ETag de la dernière réponse : le serveur répond 304 si rien n'a changé
+  const etagRef = useRef(null)
 
   useEffect(() => {
     // Vérifier si l'utilisateur est admin
@@ -17,9 +47,44 @@ function Status() {
     setIsAdmin(!!token)
     
     fetchStatus()
-    // Refresh every 30 seconds
-    const interval = setInterval(fetchStatus, 30000)
-    return () => clearInterval(interval)
+    
+    // Mises à jour en temps réel via SSE ; polling toutes les 30 s seulement si le flux est indisponible
+    let interval = null
+    const startPolling = () => {
+      if (!interval) interval = setInterval(fetchStatus, 30000)
+    }
+    const stopPolling = () => {
+      if (interval) {
+        clearInterval(interval)
+        interval = null
+      }
+    }
+    
+    if (!window.EventSource) {
+      startPolling()
+      return stopPolling
+    }
+    
+    const source = new EventSource(`${API_URL}/api/v1/status/stream`)
+    source.addEventListener('snapshot', (event) => {
+      // Envoyé à chaque (re)connexion : état complet
+      setStatusData(JSON.parse(event.data))
+      setError(null)
+      setLoading(false)
+      stopPolling()
+    })
+    source.addEventListener('status', (event) => {
+      const diff = JSON.parse(event.data)
+      etagRef.current = diff.etag
+      setStatusData(prev => applyStatusDiff(prev, diff))
+    })
+    // EventSource se reconnecte automatiquement ; en attendant, on repasse en polling
+    source.onerror = startPolling
+    
+    return () => {
+      stopPolling()
+      source.close()
+    }
   }, [])
 
   // Initialiser les sections expandées quand les données sont chargées
@@ -50,9 +115,16 @@ function Status() {
 
   const fetchStatus = async () => {
     try {
-      const response = await fetch(`${API_URL}/api/v1/status/status`)
+      const headers = etagRef.current ? { 'If-None-Match': etagRef.current } : {}
+      const response = await fetch(`${API_URL}/api/v1/status/status`, { headers, cache: 'no-store' })
+      if (response.status === 304) {
+        // Contenu inchangé : on garde les données déjà affichées
+        setError(null)
+        return
+      }
       if (!response.ok) throw new Error('Failed to fetch status')
       const data = await response.json()
+      etagRef.current = response.headers.get('ETag')
       setStatusData(data)
       setError(null)
     } catch (err) {